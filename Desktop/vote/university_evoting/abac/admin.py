@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import ElectionPolicy
+
+
+@admin.register(ElectionPolicy)
+class ElectionPolicyAdmin(admin.ModelAdmin):
+    list_display = ("election", "action", "enabled", "roll_built_at", "updated_at")
+    list_filter = ("enabled", "action")
+    readonly_fields = ("roll_built_at",)
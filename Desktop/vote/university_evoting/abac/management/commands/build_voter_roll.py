@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from abac.models import ElectionPolicy
+from abac.voter_roll import build_voter_roll
+
+
+class Command(BaseCommand):
+    help = "Precompute an election's voter roll from its ABAC policy for O(1) cast-time checks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument("--action", default="cast_vote")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Users evaluated per batch")
+
+    def handle(self, *args, **options):
+        election_id = options["election_id"]
+        try:
+            total, eligible = build_voter_roll(
+                election_id,
+                action=options["action"],
+                chunk_size=options["chunk_size"],
+                progress=lambda done, ok: self.stdout.write(f"{done} users evaluated, {ok} eligible"),
+            )
+        except ElectionPolicy.DoesNotExist:
+            raise CommandError(f"No enabled {options['action']} policy for election {election_id}")
+        self.stdout.write(self.style.SUCCESS(f"Voter roll for election {election_id}: {eligible} of {total} users eligible"))
@@ -0,0 +1,12 @@
+from .policy import request_scope
+
+
+class ABACRequestMemoMiddleware:
+    """Memoize ABAC decisions for the duration of each request (see abac.policy.request_scope)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_scope():
+            return self.get_response(request)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('elections', '0002_candidate_qr_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElectionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(default='cast_vote', max_length=50)),
+                ('rules', models.JSONField(blank=True, default=dict)),
+                ('enabled', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('roll_built_at', models.DateTimeField(blank=True, null=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='abac_policies', to='elections.election')),
+            ],
+            options={
+                'unique_together': {('election', 'action')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VoterRoll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eligible', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voter_roll', to='elections.election')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voter_rolls', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('election', 'user')},
+            },
+        ),
+    ]
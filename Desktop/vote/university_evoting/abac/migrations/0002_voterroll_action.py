@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0002_candidate_qr_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('abac', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='voterroll',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='voterroll',
+            name='action',
+            field=models.CharField(default='cast_vote', max_length=50),
+        ),
+        migrations.AlterUniqueTogether(
+            name='voterroll',
+            unique_together={('election', 'action', 'user')},
+        ),
+    ]
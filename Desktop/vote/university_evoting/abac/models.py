@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from .rules import compile_rules
+
+
+class ElectionPolicy(models.Model):
+    """Admin-defined eligibility rules for one action in one election (see abac.rules)."""
+    election = models.ForeignKey("elections.Election", on_delete=models.CASCADE, related_name="abac_policies")
+    action = models.CharField(max_length=50, default="cast_vote")
+    rules = models.JSONField(default=dict, blank=True)
+    enabled = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # set by build_voter_roll; cleared whenever the policy is edited
+    roll_built_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("election", "action")
+
+    def clean(self):
+        try:
+            compile_rules(self.rules)
+        except ValueError as e:
+            raise ValidationError({"rules": str(e)})
+
+    def save(self, *args, **kwargs):
+        # any edit may change who is eligible; the roll is ignored until rebuilt
+        self.roll_built_at = None
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"roll_built_at"}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.action} policy for {self.election}"
+
+
+class VoterRoll(models.Model):
+    """Precomputed eligibility per election, action and user (built by build_voter_roll)."""
+    election = models.ForeignKey("elections.Election", on_delete=models.CASCADE, related_name="voter_roll")
+    action = models.CharField(max_length=50, default="cast_vote")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="voter_rolls")
+    eligible = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("election", "action", "user")
+
+    def __str__(self):
+        return f"{self.user} {'eligible' if self.eligible else 'not eligible'} for {self.action} in {self.election}"
+
+
+# Keep compiled policies and voter rolls in step with edits
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=ElectionPolicy)
+@receiver(post_delete, sender=ElectionPolicy)
+def _invalidate_policies(sender, **kwargs):
+    from .policy import policy_store
+    policy_store.invalidate()
+
+
+@receiver(post_save, sender="accounts.Profile")
+def _refresh_roll_on_profile_change(sender, instance, **kwargs):
+    try:
+        from .voter_roll import refresh_voter_rolls
+        refresh_voter_rolls([instance.user_id])
+    except Exception:
+        # Non-critical; cast-time checks fall back to evaluating the policy
+        import logging
+        logging.getLogger(__name__).exception("voter roll refresh failed for user %s", instance.user_id)
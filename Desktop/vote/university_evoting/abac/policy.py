@@ -6,73 +6,160 @@ This POC implements a few straightforward policies:
 - a profile.attributes flag 'allowed_to_vote': False denies voting actions
 
 The evaluator uses Django's cache framework (configure a cache named 'abac' to use Redis
-or another shared backend). A profile version key is incremented on profile change to
-allow efficient invalidation without key enumeration. If no cache is configured this
-falls back to a local LRU cache for the POC.
+or another shared backend). A profile version key is replaced on profile change to
+allow efficient invalidation without key enumeration.
+
+Decisions are looked up in three tiers: a per-request memo (active inside
+`request_scope()`, which ABACRequestMemoMiddleware opens for every request), a
+process-local LRU keyed by (user_id, action, resource, profile_version) whose entries
+expire after `ABAC_CACHE_TTL` seconds like the shared ones, and the shared
+cache. The profile version is the only shared-cache read on a warm decision; it is
+fetched with get_many so `evaluate_versions` can batch it for many users.
+
+Per-election rules (abac.models.ElectionPolicy, see abac.rules) are compiled once per
+process into predicates and applied on top of the base decision whenever `resource` is
+an election id. `evaluate_many` decides for a whole cohort with one version lookup and
+one shared-cache read; `is_eligible` answers cast-time checks from the precomputed
+VoterRoll table once an election's roll has been built.
 """
-from functools import lru_cache
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
 import time
+import uuid
 import logging
 import hashlib
 import json
 from django.conf import settings
 from django.core.cache import caches
+from django.db import transaction
+
+from .rules import compile_rules
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TTL = getattr(settings, 'ABAC_CACHE_TTL', 5)
+VOTING_ACTIONS = frozenset(("issue_token", "cast_vote"))
+
+_request_memo = ContextVar("abac_request_memo", default=None)
+_local_lock = threading.Lock()
+_local = OrderedDict()
 
 
-def _compute_decision(user_id, action, resource, context_tuple):
-    # context_tuple is a tuple of (key, value) pairs
-    ctx = dict(context_tuple)
-    profile = ctx.get("profile")
-    # Support cached profile_key form: ('profile_key', (role, status, attributes_tuple))
-    if profile is None and 'profile_key' in ctx:
-        pk = ctx.get('profile_key')
-        if pk is None:
-            return False
-        role, status, attributes_tuple = pk
-        # reconstruct a minimal profile-like object
-        profile = type("P", (), {})()
-        profile.role = role
-        profile.status = status
-        attrs = dict(attributes_tuple) if attributes_tuple is not None else {}
-        profile.attributes = attrs
+def _decide(user_id, action, profile):
+    """Apply the policy rules to a profile-like object (role, status, attributes)."""
     if profile is None:
         return False
     # admin bypass
     if profile.role == "admin":
-        logger.debug("ABAC allow: admin", extra={"user_id": user_id, "action": action})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ABAC allow: admin", extra={"user_id": user_id, "action": action})
         return True
     # status check
     if profile.status != "active":
-        logger.debug("ABAC deny: status not active", extra={"user_id": user_id, "action": action, "status": profile.status})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ABAC deny: status not active", extra={"user_id": user_id, "action": action, "status": profile.status})
         return False
     # explicit attribute checks
-    allowed = profile.attributes.get("allowed_to_vote") if hasattr(profile, 'attributes') else None
-    if allowed is False and action in ("issue_token", "cast_vote"):
-        logger.debug("ABAC deny: attribute denies voting", extra={"user_id": user_id, "action": action, "attributes": profile.attributes})
+    attributes = getattr(profile, 'attributes', None) or {}
+    if action in VOTING_ACTIONS and attributes.get("allowed_to_vote") is False:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ABAC deny: attribute denies voting", extra={"user_id": user_id, "action": action, "attributes": attributes})
         return False
     # default allow for now
-    logger.debug("ABAC allow: default", extra={"user_id": user_id, "action": action})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ABAC allow: default", extra={"user_id": user_id, "action": action})
     return True
 
 
-# Fallback LRU cached path for local dev / tests
-@lru_cache(maxsize=2048)
-def _evaluate_lru_cached(user_id, action, resource, context_tuple):
-    return _compute_decision(user_id, action, resource, context_tuple)
+class PolicyStore:
+    """Process-local snapshot of compiled election policies.
+
+    Like elections.ballot_cache, the snapshot is dropped when the shared version key
+    moves; processes compare versions at most every `ABAC_POLICY_CHECK_INTERVAL` seconds.
+    """
+    VERSION_KEY = "abac:policy_version"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._checked_at = 0.0
+        self._policies = None
+
+    def _sync_version(self):
+        interval = float(getattr(settings, "ABAC_POLICY_CHECK_INTERVAL", 1.0))
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        cache = _get_cache()
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            cache.add(self.VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(self.VERSION_KEY)
+        if version != self._version:
+            self._policies = None
+            self._version = version
+
+    def _load(self):
+        from .models import ElectionPolicy
+        policies = {}
+        for policy in ElectionPolicy.objects.filter(enabled=True):
+            try:
+                predicate = compile_rules(policy.rules)
+            except ValueError:
+                # an invalid policy denies rather than silently allowing everyone
+                logger.warning("ABAC policy %s has invalid rules; denying", policy.pk)
+                predicate = lambda profile: False  # noqa: E731
+            policies[(policy.election_id, policy.action)] = (predicate, policy.roll_built_at is not None)
+        return policies
+
+    def policies(self):
+        """Return {(election_id, action): (predicate, roll_built)} for enabled policies."""
+        with self._lock:
+            self._sync_version()
+            if self._policies is None:
+                self._policies = self._load()
+            return self._policies
+
+    def get(self, election_id, action):
+        """Return (predicate, roll_built) for the election and action, or None."""
+        try:
+            election_id = int(election_id)
+        except (TypeError, ValueError):
+            return None
+        return self.policies().get((election_id, action))
+
+    def _bump(self):
+        _get_cache().set(self.VERSION_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._policies = None
+            self._version = None
+
+    def invalidate(self):
+        """Drop compiled policies in every process (now and again after commit)."""
+        self._bump()
+        transaction.on_commit(self._bump)
+
+
+policy_store = PolicyStore()
+
+
+def _apply_policy(decision, action, resource, profile):
+    """Narrow a base decision with the election's compiled rules, if any."""
+    if not decision or resource is None or profile.role == "admin":
+        return decision
+    entry = policy_store.get(resource, action)
+    return entry is None or bool(entry[0](profile))
 
 
 def _get_cache():
+    alias = 'abac' if 'abac' in settings.CACHES else 'default'
     try:
-        return caches['abac']
+        return caches[alias]
     except Exception:
-        try:
-            return caches['default']
-        except Exception:
-            return None
+        return None
 
 
 def _context_hash(context_tuple):
@@ -85,60 +172,190 @@ def _context_hash(context_tuple):
 
 
 def _cache_key(user_id, action, resource, context_tuple, profile_version=0):
-    ctx_hash = _context_hash(context_tuple)
     res = str(resource) if resource is not None else ""
-    return f"abac:decision:{user_id}:{action}:{res}:{profile_version}:{ctx_hash}"
+    key = f"abac:decision:{user_id}:{action}:{res}:{profile_version}"
+    # extra context is rare; only then is it hashed into the key
+    return f"{key}:{_context_hash(context_tuple)}" if context_tuple else key
+
+
+@contextmanager
+def request_scope():
+    """Memoize decisions for the duration of the block (one request)."""
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+def _version_key(user_id):
+    return f"abac:profile_version:{user_id}"
+
+
+def evaluate_versions(user_ids, cache=None):
+    """Return {user_id: profile_version} with one get_many; missing versions are initialised."""
+    cache = cache or _get_cache()
+    keys = {_version_key(uid): uid for uid in user_ids}
+    found = cache.get_many(list(keys))
+    versions = {keys[k]: v for k, v in found.items()}
+    for key, uid in keys.items():
+        if uid not in versions:
+            # never fall back to a shared default: an evicted version must not revive old decisions
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[uid] = cache.get(key)
+    return versions
+
+
+def _local_get(key):
+    """Return the locally cached decision for `key`, or None if missing or expired."""
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # a decision from a stale profile must not outlive the shared TTL
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return value
+
+
+def _local_put(key, value):
+    ttl = float(getattr(settings, 'ABAC_CACHE_TTL', DEFAULT_TTL))
+    with _local_lock:
+        _local[key] = (time.monotonic() + ttl, value)
+        _local.move_to_end(key)
+        while len(_local) > int(getattr(settings, 'ABAC_LOCAL_CACHE_SIZE', 10000)):
+            _local.popitem(last=False)
 
 
 def evaluate(user, action, resource=None, context=None):
-    ctx = context or {}
+    user_id = getattr(user, 'id', None)
+    context_tuple = tuple(sorted(context.items())) if context else ()
+    memo = _request_memo.get()
+    memo_key = (user_id, action, resource, context_tuple)
+    if memo is not None and memo_key in memo:
+        return memo[memo_key]
+
     profile = getattr(user, 'profile', None)
-    # build a stable, hashable profile key for caching (avoid mutable model instances)
-    if profile is not None:
-        profile_key = (getattr(profile, 'role', None), getattr(profile, 'status', None), tuple(sorted(getattr(profile, 'attributes', {}).items())))
+    cache = _get_cache()
+    profile_version = None
+    if cache is not None:
+        # include per-profile version to avoid key enumeration during invalidation
+        try:
+            profile_version = evaluate_versions([user_id], cache)[user_id]
+        except Exception:
+            logger.debug("ABAC version lookup failed", exc_info=True)
+    if profile_version is None:
+        decision = _decide(user_id, action, profile)
     else:
-        profile_key = None
-    logger.debug("ABAC evaluate called", extra={"user_id": getattr(user, 'id', None), "action": action, "profile": {"role": getattr(profile, 'role', None), "status": getattr(profile, 'status', None), "attributes": getattr(profile, 'attributes', None)}})
-    # include profile_key and any context items in a deterministic tuple for caching
-    context_items = tuple(sorted((k, v) for k, v in ctx.items()))
-    context_tuple = (('profile_key', profile_key),) + context_items
+        local_key = (user_id, action, resource, profile_version, context_tuple)
+        decision = _local_get(local_key)
+        if decision is None:
+            key = _cache_key(user_id, action, resource, context_tuple, profile_version=profile_version)
+            decision = cache.get(key)
+            if decision is None:
+                decision = _decide(user_id, action, profile)
+                try:
+                    cache.set(key, decision, DEFAULT_TTL)
+                except Exception:
+                    logger.debug("ABAC cache set failed", exc_info=True)
+            _local_put(local_key, decision)
+    decision = _apply_policy(decision, action, resource, profile)
+    if memo is not None:
+        memo[memo_key] = decision
+    return decision
 
+
+def evaluate_many(users, action, resource=None):
+    """Decide `action` on `resource` for many users; returns {user_id: bool}.
+
+    Profile versions come from one get_many and cached decisions from a second, so a
+    cohort costs two shared-cache round trips however many users it has.
+    """
+    users = [u for u in users if getattr(u, 'id', None) is not None]
     cache = _get_cache()
+    base = {}
     if cache is None:
-        # fallback to in-process LRU cache
-        return _evaluate_lru_cached(user.id, action, resource, context_tuple)
-
-    # include per-profile version to avoid key enumeration during invalidation
-    profile_version_key = f"abac:profile_version:{user.id}"
-    profile_version = cache.get(profile_version_key, 0)
-    key = _cache_key(user.id, action, resource, context_tuple, profile_version=profile_version)
-    cached = cache.get(key)
-    if cached is not None:
-        return cached
-    # compute and set
-    decision = _compute_decision(user.id, action, resource, context_tuple)
-    try:
-        cache.set(key, decision, DEFAULT_TTL)
-    except Exception:
-        logger.debug("ABAC cache set failed", exc_info=True)
-    return decision
+        base = {u.id: _decide(u.id, action, getattr(u, 'profile', None)) for u in users}
+    else:
+        versions = evaluate_versions([u.id for u in users], cache)
+        misses = {}
+        for user in users:
+            decision = _local_get((user.id, action, resource, versions[user.id], ()))
+            if decision is None:
+                misses[_cache_key(user.id, action, resource, (), versions[user.id])] = user
+            else:
+                base[user.id] = decision
+        if misses:
+            found = cache.get_many(list(misses))
+            computed = {}
+            for key, user in misses.items():
+                decision = found.get(key)
+                if decision is None:
+                    decision = computed[key] = _decide(user.id, action, getattr(user, 'profile', None))
+                base[user.id] = decision
+                _local_put((user.id, action, resource, versions[user.id], ()), decision)
+            if computed:
+                try:
+                    cache.set_many(computed, DEFAULT_TTL)
+                except Exception:
+                    logger.debug("ABAC cache set failed", exc_info=True)
+    return {
+        u.id: _apply_policy(base[u.id], action, resource, getattr(u, 'profile', None))
+        for u in users
+    }
+
+
+def is_eligible(user, election_id, action="cast_vote"):
+    """Whether `user` may perform `action` in the election, per its policy.
+
+    Elections without a policy allow everyone (callers apply the base rules). Once the
+    election's voter roll is built this is one indexed VoterRoll lookup; otherwise (or
+    for a user missing from the roll) the policy is evaluated directly.
+    """
+    entry = policy_store.get(election_id, action)
+    if entry is None:
+        return True
+    if entry[1]:
+        from .models import VoterRoll
+        eligible = VoterRoll.objects.filter(election_id=election_id, action=action, user_id=user.id).values_list("eligible", flat=True).first()
+        if eligible is not None:
+            return eligible
+    return evaluate(user, action, resource=election_id)
+
+
+def _forget_memo(user_ids):
+    memo = _request_memo.get()
+    if memo:
+        user_ids = set(user_ids)
+        for key in [k for k in memo if k[0] in user_ids]:
+            del memo[key]
 
 
 def invalidate_profile_cache(user_id):
-    """Bump profile version for user to invalidate related ABAC cache keys."""
+    """Replace the profile version for user to invalidate related ABAC cache keys."""
+    _forget_memo([user_id])
     cache = _get_cache()
     if cache is None:
         return
-    key = f"abac:profile_version:{user_id}"
     try:
-        # If cache backend supports incr, use it for an atomic increment
-        if hasattr(cache, 'incr'):
-            cache.incr(key)
-        else:
-            # otherwise set a new incremented value
-            v = cache.get(key, 0) or 0
-            cache.set(key, v + 1)
+        cache.set(_version_key(user_id), uuid.uuid4().hex, None)
     except Exception:
         # ignore caching errors for now
         logger.debug("Failed to invalidate profile cache", exc_info=True)
 
+
+def invalidate_profile_caches(user_ids):
+    """Invalidate ABAC decisions for many users with one set_many (pipelined on Redis)."""
+    user_ids = list(user_ids)
+    _forget_memo(user_ids)
+    cache = _get_cache()
+    if cache is None or not user_ids:
+        return
+    version = uuid.uuid4().hex
+    try:
+        cache.set_many({_version_key(uid): version for uid in user_ids}, None)
+    except Exception:
+        logger.debug("Failed to invalidate profile caches", exc_info=True)
@@ -0,0 +1,103 @@
+"""JSON eligibility rules compiled to Python predicates over a profile.
+
+A rule is either a combinator or a leaf:
+
+    {"all": [rule, ...]}      every rule holds (an empty list holds)
+    {"any": [rule, ...]}      at least one rule holds
+    {"not": rule}
+    {"attr": "faculty", "in": ["Science", "Arts"]}
+    {"attr": "campus", "eq": "Main"}
+    {"attr": "year", "gte": 2}
+
+Leaf operators: eq, ne, in, not_in, gt, gte, lt, lte, exists. `attr` names a profile
+field (role, status, campus, faculty, student_id) or a key of profile.attributes.
+Every operator compares coerced values (see `_coerce`): numbers and numeric strings as
+floats, "true"/"false" as booleans, anything else as a string, so `{"attr": "year",
+"eq": 2}` matches a CSV-imported "2". `compile_rules` validates the rule once and
+returns a closure, so evaluating it is plain attribute reads.
+"""
+import operator
+
+PROFILE_FIELDS = frozenset(("role", "status", "campus", "faculty", "student_id"))
+
+_COMPARE = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _getter(name):
+    if name in PROFILE_FIELDS:
+        return lambda profile: getattr(profile, name, None)
+    return lambda profile: (getattr(profile, "attributes", None) or {}).get(name)
+
+
+def _coerce(value):
+    """Normalize a rule or attribute value so that every operator compares alike."""
+    if value is None or isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    value = str(value)
+    return {"true": True, "false": False}.get(value.lower(), value)
+
+
+def _leaf(rule):
+    if not isinstance(rule.get("attr"), str):
+        raise ValueError(f"rule needs an 'attr': {rule!r}")
+    ops = [op for op in rule if op != "attr"]
+    if len(ops) != 1:
+        raise ValueError(f"rule needs exactly one operator: {rule!r}")
+    op, expected = ops[0], rule[ops[0]]
+    get = _getter(rule["attr"])
+    if op in ("in", "not_in"):
+        if not isinstance(expected, list):
+            raise ValueError(f"'{op}' expects a list: {rule!r}")
+        members = frozenset(_coerce(v) for v in expected)
+        if op == "in":
+            return lambda profile: get(profile) is not None and _coerce(get(profile)) in members
+        return lambda profile: get(profile) is None or _coerce(get(profile)) not in members
+    if op == "exists":
+        return (lambda profile: get(profile) is not None) if expected else (lambda profile: get(profile) is None)
+    if op in ("eq", "ne"):
+        compare, bound = _COMPARE[op], _coerce(expected)
+        return lambda profile: compare(_coerce(get(profile)), bound)
+    if op in _COMPARE:
+        compare, bound = _COMPARE[op], _coerce(expected)
+
+        def check(profile):
+            value = _coerce(get(profile))
+            try:
+                return value is not None and compare(value, bound)
+            except TypeError:
+                return False
+        return check
+    raise ValueError(f"unknown operator '{op}'")
+
+
+def compile_rules(rule):
+    """Compile a rule (see module docstring) to `predicate(profile) -> bool`; raises ValueError."""
+    if not isinstance(rule, dict):
+        raise ValueError(f"rule must be an object: {rule!r}")
+    if not rule:
+        return lambda profile: True
+    if "all" in rule or "any" in rule:
+        key = "all" if "all" in rule else "any"
+        if len(rule) != 1 or not isinstance(rule[key], list):
+            raise ValueError(f"'{key}' expects a list and nothing else: {rule!r}")
+        parts = tuple(compile_rules(r) for r in rule[key])
+        if key == "all":
+            return lambda profile: all(p(profile) for p in parts)
+        return lambda profile: any(p(profile) for p in parts)
+    if "not" in rule:
+        if len(rule) != 1:
+            raise ValueError(f"'not' takes a single rule: {rule!r}")
+        inner = compile_rules(rule["not"])
+        return lambda profile: not inner(profile)
+    return _leaf(rule)
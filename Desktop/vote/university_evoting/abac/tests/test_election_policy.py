@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from abac import policy
+from accounts.models import Profile
+from abac.models import ElectionPolicy, VoterRoll
+from abac.rules import compile_rules
+from abac.voter_roll import build_voter_roll
+from elections.models import Election, Position, Candidate
+from voting.services import cast_ballot, CastError
+
+
+class CompileRulesTests(TestCase):
+    def test_combinators_and_leaves(self):
+        rule = compile_rules({"all": [
+            {"attr": "faculty", "in": ["Science", "Arts"]},
+            {"any": [{"attr": "year", "gte": 2}, {"attr": "campus", "eq": "Main"}]},
+            {"not": {"attr": "exchange", "eq": True}},
+        ]})
+        profile = lambda **kw: SimpleNamespace(faculty=kw.get("faculty"), campus=kw.get("campus", ""), attributes=kw.get("attributes", {}))
+        self.assertTrue(rule(profile(faculty="Science", attributes={"year": "3"})))
+        self.assertTrue(rule(profile(faculty="Arts", campus="Main")))
+        self.assertFalse(rule(profile(faculty="Law", attributes={"year": 3})))
+        self.assertFalse(rule(profile(faculty="Arts", attributes={"year": 1})))
+        self.assertFalse(rule(profile(faculty="Arts", attributes={"year": 4, "exchange": True})))
+
+    def test_operators_share_one_coercion(self):
+        profile = lambda **attributes: SimpleNamespace(attributes=attributes)
+        # CSV imports store every attribute as a string
+        self.assertTrue(compile_rules({"attr": "year", "eq": 2})(profile(year="2")))
+        self.assertTrue(compile_rules({"attr": "year", "eq": "2"})(profile(year=2.0)))
+        self.assertFalse(compile_rules({"attr": "year", "ne": 2})(profile(year="2")))
+        self.assertTrue(compile_rules({"attr": "year", "in": [2, 3]})(profile(year="3")))
+        self.assertTrue(compile_rules({"attr": "year", "not_in": [2, 3]})(profile(year="4")))
+        self.assertTrue(compile_rules({"attr": "year", "gte": "2"})(profile(year="10")))
+        self.assertTrue(compile_rules({"attr": "exchange", "eq": True})(profile(exchange="true")))
+        self.assertFalse(compile_rules({"attr": "year", "gt": 1})(profile(year="first")))
+
+    def test_empty_rule_allows_and_bad_rules_raise(self):
+        self.assertTrue(compile_rules({})(SimpleNamespace()))
+        for bad in ({"attr": "faculty"}, {"attr": "faculty", "like": "S"}, {"all": {}}, {"attr": "x", "in": "a"}, []):
+            with self.assertRaises(ValueError):
+                compile_rules(bad)
+
+
+class ElectionPolicyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        now = timezone.now()
+        self.election = Election.objects.create(name='E', start_time=now - timedelta(hours=1), end_time=now + timedelta(days=1))
+        self.candidate = Candidate.objects.create(name='C', position=Position.objects.create(name='P', election=self.election))
+        self.science = User.objects.create_user(username='sci', password='pass')
+        self.arts = User.objects.create_user(username='arts', password='pass')
+        Profile.objects.create(user=self.science, faculty='Science')
+        Profile.objects.create(user=self.arts, faculty='Arts')
+        self.policy = ElectionPolicy.objects.create(election=self.election, rules={"attr": "faculty", "eq": "Science"})
+
+    def tearDown(self):
+        # the rollback sends no signals; drop this process's compiled snapshot
+        policy.policy_store.invalidate()
+
+    def test_evaluate_applies_election_rules(self):
+        self.assertTrue(policy.evaluate(self.science, 'cast_vote', resource=self.election.pk))
+        self.assertFalse(policy.evaluate(self.arts, 'cast_vote', resource=self.election.pk))
+        # other elections and the resource-less check are unaffected
+        self.assertTrue(policy.evaluate(self.arts, 'cast_vote'))
+
+    def test_evaluate_many_matches_evaluate(self):
+        decisions = policy.evaluate_many([self.science, self.arts], 'cast_vote', resource=self.election.pk)
+        self.assertEqual(decisions, {self.science.pk: True, self.arts.pk: False})
+
+    def test_policy_edit_recompiles(self):
+        self.policy.rules = {"attr": "faculty", "eq": "Arts"}
+        self.policy.save()
+        self.assertTrue(policy.evaluate(self.arts, 'cast_vote', resource=self.election.pk))
+
+    def test_clean_rejects_invalid_rules(self):
+        self.policy.rules = {"attr": "faculty", "bogus": 1}
+        with self.assertRaises(ValidationError):
+            self.policy.full_clean()
+
+    def test_cast_is_refused_for_ineligible_voter(self):
+        with self.assertRaises(CastError) as ctx:
+            cast_ballot(self.arts, self.candidate.pk)
+        self.assertEqual(ctx.exception.reason, 'not_eligible')
+        cast_ballot(self.science, self.candidate.pk)
+
+    def test_voter_roll_answers_cast_time_checks(self):
+        out = StringIO()
+        call_command('build_voter_roll', str(self.election.pk), stdout=out)
+        self.assertIn('1 of', out.getvalue())
+        self.assertEqual(dict(VoterRoll.objects.values_list('user__username', 'eligible')).get('sci'), True)
+        policy.policy_store.policies()  # compiled once per process
+        with self.assertNumQueries(1):
+            self.assertFalse(policy.is_eligible(self.arts, self.election.pk))
+
+    def test_rolls_are_kept_per_action(self):
+        ElectionPolicy.objects.create(election=self.election, action='view_results', rules={})
+        build_voter_roll(self.election.pk)
+        build_voter_roll(self.election.pk, action='view_results')
+        self.arts.profile.save()  # refreshes both built rolls
+        self.assertEqual(VoterRoll.objects.filter(election=self.election).count(), 4)
+        self.assertFalse(VoterRoll.objects.get(election=self.election, action='cast_vote', user=self.arts).eligible)
+        self.assertFalse(policy.is_eligible(self.arts, self.election.pk))
+
+    def test_profile_change_refreshes_voter_roll(self):
+        build_voter_roll(self.election.pk)
+        self.arts.profile.faculty = 'Science'
+        self.arts.profile.save()
+        self.assertTrue(VoterRoll.objects.get(election=self.election, action='cast_vote', user=self.arts).eligible)
+        self.assertTrue(policy.is_eligible(self.arts, self.election.pk))
+
+    def test_policy_edit_invalidates_voter_roll(self):
+        build_voter_roll(self.election.pk)
+        self.policy.rules = {}
+        self.policy.save()
+        self.policy.refresh_from_db()
+        self.assertIsNone(self.policy.roll_built_at)
+        self.assertTrue(policy.is_eligible(self.arts, self.election.pk))
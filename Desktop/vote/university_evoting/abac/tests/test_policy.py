@@ -34,4 +34,44 @@ class ABACPolicyTests(TestCase):
     def test_invalidate_profile_cache_bumps_version(self):
         # Ensure calling invalidate_profile_cache does not raise and cache key set/increment works
         # Use a fake cache by calling function; as long as it doesn't raise we're okay.
-        policy.invalidate_profile_cache(9999)
\ No newline at end of file
+        policy.invalidate_profile_cache(9999)
+
+
+class ABACCacheTierTests(TestCase):
+    def setUp(self):
+        self.user = SimpleNamespace(id=424242, profile=DummyProfile())
+        policy.invalidate_profile_cache(self.user.id)
+
+    def test_warm_decision_reads_only_the_profile_version(self):
+        from unittest import mock
+        cache = policy._get_cache()
+        self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+        with mock.patch.object(cache, 'get', wraps=cache.get) as get, mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+        self.assertEqual(get_many.call_count, 1)
+        self.assertFalse([c for c in get.call_args_list if str(c.args[0]).startswith('abac:decision:')])
+
+    def test_request_memo_skips_cache_and_sees_invalidation(self):
+        from unittest import mock
+        cache = policy._get_cache()
+        with policy.request_scope():
+            self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+            with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+                self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+            self.assertEqual(get_many.call_count, 0)
+            self.user.profile.attributes['allowed_to_vote'] = False
+            policy.invalidate_profile_cache(self.user.id)
+            self.assertFalse(policy.evaluate(self.user, 'cast_vote'))
+
+    def test_local_entry_expires_with_cache_ttl(self):
+        from unittest import mock
+        cache = policy._get_cache()
+        self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+        # the profile changes without a version bump and the shared entry has expired
+        self.user.profile.status = 'suspended'
+        version = policy.evaluate_versions([self.user.id], cache)[self.user.id]
+        cache.delete(policy._cache_key(self.user.id, 'cast_vote', None, (), profile_version=version))
+        self.assertTrue(policy.evaluate(self.user, 'cast_vote'))
+        later = policy.time.monotonic() + policy.DEFAULT_TTL + 1
+        with mock.patch.object(policy.time, 'monotonic', return_value=later):
+            self.assertFalse(policy.evaluate(self.user, 'cast_vote'))
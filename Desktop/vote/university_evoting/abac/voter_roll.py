@@ -0,0 +1,67 @@
+"""Precomputed voter rolls: one VoterRoll row per (election, action, user) with the policy outcome.
+
+`build_voter_roll` evaluates an election's policy for one action for every user once, in
+chunks, so casting needs only an indexed lookup (see policy.is_eligible). Rows are kept
+current by `refresh_voter_rolls`, which the Profile post_save receiver and the bulk user
+importer call for the users they changed; editing the policy clears `roll_built_at`
+until the roll is rebuilt.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .policy import _decide, _apply_policy, policy_store
+from .models import ElectionPolicy, VoterRoll
+
+
+def _eligible(user, action, election_id):
+    profile = getattr(user, "profile", None)
+    return _apply_policy(_decide(user.id, action, profile), action, election_id, profile)
+
+
+def _users(user_ids=None):
+    qs = get_user_model().objects.select_related("profile").order_by("pk")
+    return qs if user_ids is None else qs.filter(pk__in=user_ids)
+
+
+def build_voter_roll(election_id, action="cast_vote", chunk_size=2000, progress=None):
+    """Rebuild the roll for the election's `action` policy; returns (users, eligible)."""
+    policy = ElectionPolicy.objects.get(election_id=election_id, action=action, enabled=True)
+    # compile the current rules even if this process has an older snapshot
+    policy_store.invalidate()
+    total = eligible = 0
+    with transaction.atomic():
+        VoterRoll.objects.filter(election_id=election_id, action=action).delete()
+        last_pk = 0
+        while True:
+            chunk = list(_users().filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            rows = [VoterRoll(election_id=election_id, action=action, user_id=u.pk, eligible=_eligible(u, action, election_id)) for u in chunk]
+            VoterRoll.objects.bulk_create(rows, batch_size=chunk_size)
+            total += len(rows)
+            eligible += sum(r.eligible for r in rows)
+            last_pk = chunk[-1].pk
+            if progress:
+                progress(total, eligible)
+        ElectionPolicy.objects.filter(pk=policy.pk).update(roll_built_at=timezone.now())
+    policy_store.invalidate()
+    return total, eligible
+
+
+def refresh_voter_rolls(user_ids):
+    """Recompute the roll rows of `user_ids` in every election whose roll is built."""
+    built = [(election_id, action) for (election_id, action), (_, roll_built) in policy_store.policies().items() if roll_built]
+    user_ids = list(user_ids)
+    if not built or not user_ids:
+        return
+    users = list(_users(user_ids))
+    rows = [
+        VoterRoll(election_id=election_id, action=action, user_id=u.pk, eligible=_eligible(u, action, election_id))
+        for election_id, action in built
+        for u in users
+    ]
+    VoterRoll.objects.bulk_create(
+        rows, batch_size=1000,
+        update_conflicts=True, unique_fields=["election", "action", "user"], update_fields=["eligible", "computed_at"],
+    )
@@ -1,20 +1,28 @@
+import base64
 import hmac
 import hashlib
+import json
+import time
 import uuid
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from django.conf import settings
-from .models import RevokedAccessToken
+from .token_state import token_states
+from .revocation_filter import revocation_filter
 
 
 import logging
 logger = logging.getLogger(__name__)
 
-def _verify_signature(jti_str, signature):
+def _sign(message):
     secret = getattr(settings, "ACCESS_TOKEN_SECRET", None)
     if not secret:
         raise exceptions.AuthenticationFailed("access token signing key not configured")
-    mac = hmac.new(secret.encode("utf-8"), jti_str.encode("utf-8"), hashlib.sha256).hexdigest()
+    return hmac.new(secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _verify_signature(jti_str, signature):
+    mac = _sign(jti_str)
     # constant time compare
     if not hmac.compare_digest(mac, signature):
         logger.debug("Invalid access token signature for jti %s", jti_str)
@@ -22,19 +30,79 @@ def _verify_signature(jti_str, signature):
     return True
 
 
+V2_PREFIX = "v2."
+
+
+def make_access_token(jti, user_id, session_id):
+    """Build the bearer token for a new access jti in the `ACCESS_TOKEN_FORMAT` format.
+
+    v1: <jti>.<hmac(jti)>; the holder is looked up from the jti.
+    v2: v2.<base64url JSON {jti, uid, sid, iat, exp}>.<hmac("v2." + payload)>, self-contained.
+    """
+    if getattr(settings, "ACCESS_TOKEN_FORMAT", "v2") != "v2":
+        return f"{jti}.{_sign(str(jti))}"
+    now = int(time.time())
+    claims = {
+        "jti": str(jti), "uid": user_id, "sid": session_id,
+        "iat": now, "exp": now + int(getattr(settings, "ACCESS_TOKEN_TTL", 900)),
+    }
+    payload = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{V2_PREFIX}{payload}.{_sign(V2_PREFIX + payload)}"
+
+
+def decode_access_token_v2(token):
+    """Return the claims of a v2 token with a valid signature that has not expired, else None."""
+    if not token.startswith(V2_PREFIX):
+        return None
+    try:
+        payload, signature = token[len(V2_PREFIX):].split(".")
+    except ValueError:
+        return None
+    if not hmac.compare_digest(_sign(V2_PREFIX + payload), signature):
+        logger.debug("Invalid v2 access token signature")
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        if int(claims["exp"]) <= time.time():
+            return None
+        claims["jti"] = str(uuid.UUID(claims["jti"]))
+    except Exception:
+        return None
+    return claims
+
+
 class JTIAuthentication(BaseAuthentication):
-    """Authenticate using access token format: <jti>.<signature>
+    """Authenticate using access token format: <jti>.<signature> (v1) or v2.<payload>.<signature>
 
-    The signature is HMAC-SHA256 over the JTI using ACCESS_TOKEN_SECRET.
-    The token's JTI must not be in RevokedAccessToken.revoked == True.
-    On success, returns (user, token) where token is the jti string.
+    v1: the signature is HMAC-SHA256 over the JTI using ACCESS_TOKEN_SECRET, and the
+    token's JTI must be issued and not revoked (see accounts.token_state).
+    v2: the signed payload carries user id, session id and expiry; revocation is checked
+    against the in-memory revocation filter (see accounts.revocation_filter).
+    On success, returns (user, token) where token is the bearer token string.
     """
 
+    def _authenticate_v2(self, token):
+        claims = decode_access_token_v2(token)
+        if claims is None:
+            return None
+        try:
+            if revocation_filter.is_revoked(claims["jti"]):
+                return None
+            user = token_states.user(claims["uid"])
+        except Exception:
+            # cache/DB error -> fail closed (treat as unauthenticated)
+            return None
+        if user is None:
+            return None
+        return (user, token)
+
     def authenticate(self, request):
         auth = request.META.get("HTTP_AUTHORIZATION", "")
         if not auth or not auth.startswith("Bearer "):
             return None
         token = auth.split(" ", 1)[1]
+        if token.startswith(V2_PREFIX):
+            return self._authenticate_v2(token)
         parts = token.split(".")
         if len(parts) != 2:
             raise exceptions.AuthenticationFailed("invalid token format")
@@ -48,19 +116,14 @@ class JTIAuthentication(BaseAuthentication):
         if not _verify_signature(jti_str, signature):
             # invalid signature — treat as unauthenticated
             return None
-        # ensure not revoked
+        # resolve jti -> (user, session) through the shared token-state cache; revoked or
+        # unknown tokens are treated as unauthenticated
         try:
-            revoked = RevokedAccessToken.objects.filter(jti=jti, revoked=True).exists()
+            resolved = token_states.resolve(jti)
         except Exception:
-            # DB error -> fail closed (treat as unauthenticated)
-            return None
-        if revoked:
-            # revoked token — treat as unauthenticated
+            # cache/DB error -> fail closed (treat as unauthenticated)
             return None
-        # return associated user
-        token_obj = RevokedAccessToken.objects.filter(jti=jti).first()
-        if not token_obj:
-            # token not in DB — treat as unauthenticated
+        if resolved is None:
             return None
-        user = token_obj.session.user
+        _, user = resolved
         return (user, token)
@@ -1,12 +1,29 @@
 from django.conf import settings
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 
 _EPHEMERAL_KEY = None
 
+# Memoized key ring: Fernet instances for the configured keys, rebuilt only when the
+# configured keys change, plus the index of the key that last decrypted successfully
+# (during a rotation most secrets still use the same old key, so try it first).
+_ring_lock = threading.Lock()
+_ring_keys = None
+_ring = None
+_last_index = 0
+
+
+def _configured_keys():
+    if getattr(settings, 'MFA_SECRET_FERNET_KEYS', None):
+        return tuple(settings.MFA_SECRET_FERNET_KEYS)
+    if getattr(settings, 'MFA_SECRET_FERNET_KEY', None):
+        return (settings.MFA_SECRET_FERNET_KEY,)
+    return ()
+
 def _get_fernet_instances():
     """Return a list of Fernet instances, ordered with the current key first.
 
@@ -41,20 +58,60 @@ def _get_fernet_instances():
     return instances
 
 
+def key_ring():
+    """Return the memoized list of Fernet instances (current key first).
+
+    Rebuilt by `_get_fernet_instances` only when the configured keys differ from the ones
+    the ring was built from, so settings overrides and rotations take effect immediately.
+    """
+    global _ring_keys, _ring, _last_index
+    keys = _configured_keys()
+    ring = _ring
+    if ring is not None and _ring_keys == keys:
+        return ring
+    with _ring_lock:
+        if _ring is None or _ring_keys != keys:
+            _ring = _get_fernet_instances()
+            _ring_keys = keys
+            _last_index = 0
+        return _ring
+
+
+def _decrypt_with_index(token: str):
+    """Return (plaintext, index of the key that worked) or raise ValueError."""
+    global _last_index
+    ring = key_ring()
+    data = token.encode('utf-8')
+    first = _last_index if _last_index < len(ring) else 0
+    order = [first] + [i for i in range(len(ring)) if i != first]
+    for i in order:
+        try:
+            b = ring[i].decrypt(data)
+        except (InvalidToken, TypeError, ValueError):
+            continue
+        _last_index = i
+        return b.decode('utf-8'), i
+    raise ValueError('Unable to decrypt MFA secret with configured keys')
+
+
 def encrypt_secret(plaintext: str) -> str:
     """Encrypt plaintext using the current key (first key). Returns token str."""
-    f = _get_fernet_instances()[0]
+    f = key_ring()[0]
     token = f.encrypt(plaintext.encode('utf-8'))
     return token.decode('utf-8')
 
 
 def decrypt_secret(token: str) -> str:
     """Attempt to decrypt token using available keys; return plaintext or raise."""
-    instances = _get_fernet_instances()
-    for f in instances:
-        try:
-            b = f.decrypt(token.encode('utf-8'))
-            return b.decode('utf-8')
-        except Exception:
-            continue
-    raise ValueError('Unable to decrypt MFA secret with configured keys')
+    return _decrypt_with_index(token)[0]
+
+
+def reencrypt_secret(token: str):
+    """Return `token` re-encrypted with the current key, or None if it already uses it.
+
+    Raises ValueError if no configured key can decrypt it.
+    """
+    plaintext, index = _decrypt_with_index(token)
+    if index == 0:
+        return None
+    return encrypt_secret(plaintext)
@@ -0,0 +1,194 @@
+"""Memory-mapped IP-range -> country index for GeoBlockingMiddleware.
+
+`build_index` turns a CIDR list ("cidr,country" lines) into a compact binary file of
+sorted, non-overlapping integer ranges (see `build_geoip_index`). `GeoIPIndex` maps that
+file and answers lookups with a bisect over the range starts plus a small LRU of recent
+addresses, so a lookup does no file or network access. `geoip` reloads the index when
+the file's mtime changes, checking at most every `GEOIP_RELOAD_INTERVAL` seconds.
+
+File layout (native byte order, recorded in the magic): header, country codes (two
+ASCII bytes each), then for IPv4 and IPv6 the range starts, range ends and uint16 code
+indexes. IPv4 bounds are uint32; IPv6 bounds are 16-byte big-endian integers.
+"""
+import bisect
+import ipaddress
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GEOIDX1" + (b"L" if sys.byteorder == "little" else b"B")
+_HEADER = struct.Struct("=8sIII")  # magic, IPv4 ranges, IPv6 ranges, country codes
+
+
+def _pad(offset, align=8):
+    return (offset + align - 1) // align * align
+
+
+def parse_cidr_lines(lines):
+    """Yield (network, country) from "cidr,country" lines; blank lines, '#' comments and a header row are skipped."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        cidr, _, country = line.partition(",")
+        try:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+        except ValueError:
+            if number == 1:
+                continue  # header row
+            raise ValueError(f"line {number}: invalid network {cidr!r}")
+        country = country.strip().upper()
+        if len(country) != 2 or not country.isascii():
+            raise ValueError(f"line {number}: country must be a two-letter code, got {country!r}")
+        yield network, country
+
+
+def _ranges(networks):
+    """Sort, reject overlaps and merge adjacent ranges of the same country."""
+    ranges = sorted((int(n.network_address), int(n.broadcast_address), c, n) for n, c in networks)
+    merged = []
+    for start, end, country, network in ranges:
+        if merged and start <= merged[-1][1]:
+            raise ValueError(f"{network} overlaps a preceding range")
+        if merged and merged[-1][2] == country and merged[-1][1] + 1 == start:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end, country])
+    return merged
+
+
+def build_index(pairs, path):
+    """Write the index for (network, country) pairs to `path` atomically; returns (v4, v6) range counts."""
+    pairs = list(pairs)
+    v4 = _ranges((n, c) for n, c in pairs if n.version == 4)
+    v6 = _ranges((n, c) for n, c in pairs if n.version == 6)
+    codes = sorted({c for _, _, c in v4} | {c for _, _, c in v6})
+    code_index = {c: i for i, c in enumerate(codes)}
+
+    out = bytearray(_HEADER.pack(MAGIC, len(v4), len(v6), len(codes)))
+    out += "".join(codes).encode("ascii")
+    out += b"\0" * (_pad(len(out)) - len(out))
+    out += struct.pack(f"={len(v4)}I", *(s for s, _, _ in v4))
+    out += struct.pack(f"={len(v4)}I", *(e for _, e, _ in v4))
+    out += struct.pack(f"={len(v4)}H", *(code_index[c] for _, _, c in v4))
+    out += b"\0" * (_pad(len(out)) - len(out))
+    out += b"".join(s.to_bytes(16, "big") for s, _, _ in v6)
+    out += b"".join(e.to_bytes(16, "big") for _, e, _ in v6)
+    out += struct.pack(f"={len(v6)}H", *(code_index[c] for _, _, c in v6))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(out)
+    # readers either see the old file or the complete new one
+    os.replace(tmp, path)
+    return len(v4), len(v6)
+
+
+class _Wide:
+    """Sequence view of 16-byte big-endian integers, for bisect."""
+    __slots__ = ("_buf", "_n")
+
+    def __init__(self, buf, n):
+        self._buf, self._n = buf, n
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        return int.from_bytes(self._buf[i * 16:(i + 1) * 16], "big")
+
+
+class GeoIPIndex:
+    """Read-only lookups over a mapped index file."""
+
+    def __init__(self, path, lru_size=4096):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        magic, n4, n6, ncodes = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a GeoIP index for this platform")
+        offset = _HEADER.size
+        self._codes = [bytes(buf[offset + 2 * i:offset + 2 * i + 2]).decode("ascii") for i in range(ncodes)]
+        offset = _pad(offset + 2 * ncodes)
+        self._v4_starts = buf[offset:offset + 4 * n4].cast("I")
+        self._v4_ends = buf[offset + 4 * n4:offset + 8 * n4].cast("I")
+        self._v4_codes = buf[offset + 8 * n4:offset + 10 * n4].cast("H")
+        offset = _pad(offset + 10 * n4)
+        self._v6_starts = _Wide(buf[offset:offset + 16 * n6], n6)
+        self._v6_ends = _Wide(buf[offset + 16 * n6:offset + 32 * n6], n6)
+        self._v6_codes = buf[offset + 32 * n6:offset + 34 * n6].cast("H")
+        self.country = lru_cache(maxsize=lru_size)(self._country)
+
+    def _country(self, ip):
+        """Return the two-letter country for an address string, or None."""
+        # inet_pton is several times faster than ipaddress for the common IPv4 case
+        try:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+            v4 = True
+        except (OSError, TypeError):
+            try:
+                value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+            except (OSError, TypeError):
+                return None
+            v4 = value >> 32 == 0xFFFF  # IPv4-mapped
+            if v4:
+                value &= 0xFFFFFFFF
+        if v4:
+            starts, ends, codes = self._v4_starts, self._v4_ends, self._v4_codes
+        else:
+            starts, ends, codes = self._v6_starts, self._v6_ends, self._v6_codes
+        i = bisect.bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return self._codes[codes[i]]
+        return None
+
+
+class GeoIPDatabase:
+    """The index at settings.GEOIP_INDEX_PATH, reloaded when the file changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._key = None
+        self._checked_at = None
+
+    def _refresh(self):
+        interval = float(getattr(settings, "GEOIP_RELOAD_INTERVAL", 5.0))
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            path = getattr(settings, "GEOIP_INDEX_PATH", "")
+            try:
+                st = os.stat(path) if path else None
+            except OSError:
+                st = None
+            key = (path, st.st_mtime_ns, st.st_size) if st else None
+            if key != self._key:
+                self._key = key
+                try:
+                    self._index = GeoIPIndex(path, int(getattr(settings, "GEOIP_LRU_SIZE", 4096))) if key else None
+                except (OSError, ValueError, struct.error):
+                    # keep serving the previous index until the file changes again
+                    logger.exception("Failed to load GeoIP index %s", path)
+
+    def country(self, ip):
+        """Return the country code for `ip`, or None if unknown or no index is configured."""
+        self._refresh()
+        index = self._index
+        return index.country(ip) if index is not None else None
+
+
+geoip = GeoIPDatabase()
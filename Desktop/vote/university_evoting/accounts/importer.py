@@ -0,0 +1,245 @@
+"""Streaming bulk import of users and profiles, shared by import_users and sync_sso.
+
+Records are consumed in chunks. For each chunk the existing users are fetched with two
+`__in` queries (by student_id and by username), new users and profiles are written with
+bulk_create and changed ones with bulk_update, all in one transaction, and the ABAC
+profile versions of every touched user are bumped with a single set_many. A 40k-row
+roster therefore costs a handful of queries per chunk instead of ~6 per user.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from abac.policy import invalidate_profile_caches
+from abac.voter_roll import refresh_voter_rolls
+from .models import Profile
+
+PROFILE_FIELDS = ["student_id", "role", "campus", "faculty", "attributes"]
+
+
+def iter_csv(f):
+    """Yield rows of a CSV file as dicts, one at a time."""
+    yield from csv.DictReader(f)
+
+
+def iter_json_array(f, read_size=65536):
+    """Yield the objects of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buf = f.read(read_size).lstrip()
+    if not buf.startswith("["):
+        raise ValueError("JSON root must be an array of user objects")
+    buf = buf[1:]
+    while True:
+        buf = buf.lstrip().lstrip(",").lstrip()
+        if buf.startswith("]"):
+            return
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except ValueError:
+            more = f.read(read_size)
+            if not more:
+                raise ValueError("Truncated JSON array")
+            buf += more
+            continue
+        yield obj
+        buf = buf[end:]
+        if len(buf) < read_size:
+            buf += f.read(read_size)
+
+
+def _text(record, *names, default=""):
+    for name in names:
+        value = record.get(name)
+        if value:
+            return str(value).strip()
+    return default
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class UserImporter:
+    """Create or update User/Profile rows from user records in chunks.
+
+    `update_existing`: update users that already exist (otherwise they are skipped).
+    `match_student_id`: look existing users up by profile student_id before username.
+    `warn`: callable receiving warning messages; `progress`: callable receiving ImportStats
+    after every chunk.
+    """
+
+    def __init__(self, update_existing=False, dry_run=False, chunk_size=1000, match_student_id=True,
+                 warn=None, progress=None):
+        self.update_existing = update_existing
+        self.dry_run = dry_run
+        self.chunk_size = max(1, int(chunk_size))
+        self.match_student_id = match_student_id
+        self.warn = warn or (lambda message: None)
+        self.progress = progress
+        self.User = get_user_model()
+
+    def _parse(self, r):
+        username = _text(r, "username", "user", "email")
+        attributes_raw = r.get("attributes")
+        attributes = {}
+        if attributes_raw:
+            try:
+                if isinstance(attributes_raw, str):
+                    attributes = json.loads(attributes_raw)
+                elif isinstance(attributes_raw, dict):
+                    attributes = attributes_raw
+            except Exception:
+                self.warn(f"Invalid attributes JSON for {username}; ignoring")
+        return {
+            "username": username,
+            "email": _text(r, "email"),
+            "student_id": _text(r, "student_id") or None,
+            "role": _text(r, "role", default="student"),
+            "campus": _text(r, "campus"),
+            "faculty": _text(r, "faculty"),
+            "attributes": attributes,
+        }
+
+    def run(self, records):
+        """Import an iterable of record dicts; returns ImportStats."""
+        stats = ImportStats()
+        self._planned = ({}, {})
+        started = time.monotonic()
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, stats)
+                chunk = []
+                stats.seconds = time.monotonic() - started
+                if self.progress:
+                    self.progress(stats)
+        if chunk:
+            self._import_chunk(chunk, stats)
+        stats.seconds = time.monotonic() - started
+        return stats
+
+    def _import_chunk(self, records, stats):
+        User = self.User
+        rows = []
+        for r in records:
+            stats.rows += 1
+            row = self._parse(r)
+            if not row["username"]:
+                stats.skipped += 1
+                continue
+            rows.append(row)
+
+        by_student_id = {}
+        if self.match_student_id:
+            student_ids = {row["student_id"] for row in rows if row["student_id"]}
+            by_student_id = {
+                p.student_id: p.user
+                for p in Profile.objects.filter(student_id__in=student_ids).select_related("user__profile")
+            }
+        by_username = {
+            u.username: u
+            for u in User.objects.filter(username__in={row["username"] for row in rows}).select_related("profile")
+        }
+
+        # username / student_id -> (User, Profile) created in this chunk; a dry run writes
+        # nothing, so it keeps its planned users (as None) for the whole file instead
+        new_users, new_by_student_id = self._planned if self.dry_run else ({}, {})
+        changed_users = {}  # pk -> User whose email changed
+        changed_profiles = {}
+        created_profiles = []
+        touched = set()
+        for row in rows:
+            user = by_student_id.get(row["student_id"]) if row["student_id"] else None
+            user = user or by_username.get(row["username"])
+            pending = new_users.get(row["username"]) or new_by_student_id.get(row["student_id"])
+            seen = row["username"] in new_users or (row["student_id"] and row["student_id"] in new_by_student_id)
+            if user is None and not seen:
+                if self.dry_run:
+                    stats.created += 1
+                    new_users[row["username"]] = None
+                    if row["student_id"]:
+                        new_by_student_id[row["student_id"]] = None
+                    continue
+                user = User(username=row["username"], email=row["email"])
+                user.set_unusable_password()
+                profile = Profile(**{name: row[name] for name in PROFILE_FIELDS})
+                new_users[row["username"]] = (user, profile)
+                if row["student_id"]:
+                    new_by_student_id[row["student_id"]] = (user, profile)
+                stats.created += 1
+                continue
+            if not self.update_existing:
+                stats.skipped += 1
+                continue
+            stats.updated += 1
+            if self.dry_run:
+                continue
+            if user is None:
+                # repeated username or student_id within the chunk: fold into the pending new row
+                user, profile = pending
+                self._merge(profile, row)
+                if row["email"]:
+                    user.email = row["email"]
+                continue
+            touched.add(user.pk)
+            profile = getattr(user, "profile", None)
+            if profile is None:
+                profile = Profile(user=user, **{name: row[name] for name in PROFILE_FIELDS})
+                created_profiles.append(profile)
+            elif profile.pk is not None:
+                self._merge(profile, row)
+                changed_profiles[profile.pk] = profile
+            else:
+                self._merge(profile, row)
+            if row["email"] and user.email != row["email"]:
+                user.email = row["email"]
+                changed_users[user.pk] = user
+
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            pairs = [pair for pair in new_users.values() if pair is not None]
+            if pairs:
+                users = [user for user, _ in pairs]
+                User.objects.bulk_create(users, batch_size=500)
+                if any(user.pk is None for user in users):
+                    # backends that do not return primary keys from bulk inserts
+                    ids = dict(User.objects.filter(username__in=[u.username for u in users]).values_list("username", "id"))
+                    for user in users:
+                        user.pk = ids[user.username]
+                for user, profile in pairs:
+                    profile.user = user
+                    created_profiles.append(profile)
+                    touched.add(user.pk)
+            if created_profiles:
+                Profile.objects.bulk_create(created_profiles, batch_size=500)
+            if changed_profiles:
+                Profile.objects.bulk_update(list(changed_profiles.values()), PROFILE_FIELDS, batch_size=500)
+            if changed_users:
+                User.objects.bulk_update(list(changed_users.values()), ["email"], batch_size=500)
+            # likewise keep built voter rolls in step with the changed profiles
+            refresh_voter_rolls(touched)
+            # bulk writes do not send post_save, so invalidate ABAC versions here
+            transaction.on_commit(lambda: invalidate_profile_caches(touched))
+
+    @staticmethod
+    def _merge(profile, row):
+        profile.student_id = row["student_id"] or profile.student_id
+        profile.role = row["role"] or profile.role
+        profile.campus = row["campus"] or profile.campus
+        profile.faculty = row["faculty"] or profile.faculty
+        if row["attributes"]:
+            profile.attributes = dict(profile.attributes or {}, **row["attributes"])
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts.geoip import build_index, parse_cidr_lines
+
+
+class Command(BaseCommand):
+    help = "Build the GeoIP range index used by GeoBlockingMiddleware from a 'cidr,country' list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="CIDR list, one 'cidr,country' per line")
+        parser.add_argument("--output", help="Index file to write (default: GEOIP_INDEX_PATH)")
+
+    def handle(self, *args, **options):
+        output = options.get("output") or getattr(settings, "GEOIP_INDEX_PATH", "")
+        if not output:
+            raise CommandError("No output path; pass --output or set GEOIP_INDEX_PATH")
+        try:
+            with open(options["source"], encoding="utf-8") as f:
+                v4, v6 = build_index(parse_cidr_lines(f), output)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        # running processes pick the new file up within GEOIP_RELOAD_INTERVAL seconds
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}: {v4} IPv4 and {v6} IPv6 ranges"))
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand
 from accounts.models import MFATOTPDevice
 from accounts import crypto
@@ -6,29 +7,55 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _reencrypt(row):
+    """Return (id, new token or None if already current, error flag) for one (id, secret) row."""
+    device_id, secret = row
+    try:
+        return device_id, crypto.reencrypt_secret(secret), False
+    except ValueError:
+        return device_id, None, True
+
+
 class Command(BaseCommand):
     help = 'Re-encrypt stored MFA (TOTP) secrets using the current MFA_SECRET_FERNET_KEY'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Devices re-encrypted and written per bulk_update')
+        parser.add_argument('--workers', type=int, default=1, help='Threads used to decrypt/encrypt each chunk')
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this device id (printed in the progress output)')
+
     def handle(self, *args, **options):
-        devices = MFATOTPDevice.objects.all()
-        total = devices.count()
-        reencrypted = 0
-        skipped = 0
-        for d in devices:
-            try:
-                plaintext = None
-                try:
-                    plaintext = crypto.decrypt_secret(d.secret)
-                except Exception:
-                    # if we can't decrypt with existing keys, log and skip
-                    logger.warning(f"Unable to decrypt secret for device {d.id}; skipping")
-                    skipped += 1
-                    continue
-                new_token = crypto.encrypt_secret(plaintext)
-                if new_token != d.secret:
-                    d.secret = new_token
-                    d.save()
-                    reencrypted += 1
-            except Exception:
-                logger.exception(f"Error re-encrypting device {d.id}")
-        self.stdout.write(self.style.SUCCESS(f"Processed {total} devices, re-encrypted {reencrypted}, skipped {skipped}"))
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        last_id = options['start_after']
+        total = MFATOTPDevice.objects.filter(id__gt=last_id).count()
+        processed = reencrypted = skipped = 0
+        # secrets already under the current key are left alone, so an interrupted run can
+        # simply be started again (or resumed with --start-after)
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            while True:
+                rows = list(
+                    MFATOTPDevice.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'secret')[:chunk_size]
+                )
+                if not rows:
+                    break
+                results = list(pool.map(_reencrypt, rows)) if pool else [_reencrypt(r) for r in rows]
+                changed = []
+                for device_id, new_token, failed in results:
+                    if failed:
+                        logger.warning(f"Unable to decrypt secret for device {device_id}; skipping")
+                        skipped += 1
+                    elif new_token is not None:
+                        changed.append(MFATOTPDevice(id=device_id, secret=new_token))
+                if changed:
+                    # bulk_update bypasses MFATOTPDevice.save(), which is fine: the values are ciphertext
+                    MFATOTPDevice.objects.bulk_update(changed, ['secret'])
+                reencrypted += len(changed)
+                processed += len(rows)
+                last_id = rows[-1][0]
+                self.stdout.write(f"{processed}/{total} devices processed (last id {last_id}), re-encrypted {reencrypted}, skipped {skipped}")
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} devices, re-encrypted {reencrypted}, skipped {skipped}"))
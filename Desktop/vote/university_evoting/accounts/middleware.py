@@ -1,6 +1,9 @@
 import uuid
 from django.http import JsonResponse
-from .models import RevokedAccessToken
+from .token_state import token_states
+from .authentication import V2_PREFIX, decode_access_token_v2
+from .revocation_filter import revocation_filter
+from .geoip import geoip
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +12,9 @@ class RevokedAccessTokenMiddleware:
     """Middleware to reject requests with revoked JTI access tokens.
 
     Expects Authorization header in form: "Bearer <jti>.<random>" where <jti> is the UUID JTI.
-    If the JTI exists in RevokedAccessToken and is revoked, respond with 401.
+    If the JTI exists in RevokedAccessToken and is revoked, respond with 401. The lookup goes
+    through accounts.token_state, so JTIAuthentication reuses it without another query.
+    Stateless v2 tokens are checked against the in-memory revocation filter instead.
     """
 
     def __init__(self, get_response):
@@ -19,13 +24,24 @@ class RevokedAccessTokenMiddleware:
         auth = request.META.get("HTTP_AUTHORIZATION", "")
         if auth.startswith("Bearer "):
             token = auth.split(" ", 1)[1]
+            if token.startswith(V2_PREFIX):
+                claims = decode_access_token_v2(token)
+                try:
+                    revoked = claims is not None and revocation_filter.is_revoked(claims["jti"])
+                except Exception:
+                    # leave it to JTIAuthentication, which fails closed
+                    revoked = False
+                if revoked:
+                    logger.warning("Request with revoked access token", extra={"jti": claims["jti"]})
+                    return JsonResponse({"detail": "token revoked"}, status=401)
+                return self.get_response(request)
             parts = token.split(".")
             if parts:
                 jti_str = parts[0]
                 try:
                     jti = uuid.UUID(jti_str)
-                    revoked = RevokedAccessToken.objects.filter(jti=jti, revoked=True).exists()
-                    if revoked:
+                    state = token_states.get(jti)
+                    if state is not None and state.revoked:
                         logger.warning("Request with revoked access token", extra={"jti": str(jti)})
                         return JsonResponse({"detail": "token revoked"}, status=401)
                 except Exception:
@@ -37,7 +53,9 @@ class RevokedAccessTokenMiddleware:
 class SessionIdleTimeoutMiddleware:
     """Middleware to enforce server-side session idle timeout.
 
-    Stores last activity timestamp in the session under `last_activity`.
+    Stores last activity timestamp in the session under `last_activity`, refreshed only
+    when it is at least `SESSION_ACTIVITY_GRANULARITY` seconds old. The stored value can
+    lag real activity by that much, so a session may expire up to one granularity early.
     If idle time exceeds `SESSION_IDLE_TIMEOUT` (seconds) the user is logged out.
     For AJAX/JSON requests returns 401 JSON; for regular requests redirects to `LOGIN_URL`.
     """
@@ -78,10 +96,47 @@ class SessionIdleTimeoutMiddleware:
                         login_url = getattr(settings, 'LOGIN_URL', '/accounts/login/')
                         return redirect(login_url)
 
-                # update last activity
-                request.session['last_activity'] = now_ts
+                # update last activity only when it moved by the granularity, so most
+                # requests leave the session unmodified and nothing is written
+                granularity = int(getattr(settings, 'SESSION_ACTIVITY_GRANULARITY', 60))
+                if last is None or now_ts - last >= granularity:
+                    request.session['last_activity'] = now_ts
         except Exception:
             # don't break requests on middleware errors
             logger.exception('SessionIdleTimeoutMiddleware error')
 
         return self.get_response(request)
+
+
+class GeoBlockingMiddleware:
+    """Block requests by client country, looked up in the GeoIP index (accounts.geoip).
+
+    Countries in `IP_BLOCKING_BLOCKED_COUNTRIES` are refused; when
+    `IP_BLOCKING_ALLOWED_COUNTRIES` is set, only those countries are let through.
+    Addresses missing from the index (private ranges, or no index configured) are never
+    blocked. Whitelisted addresses and `IP_BLOCKING_EXCLUDED_PATHS` skip the check.
+    """
+
+    def __init__(self, get_response):
+        from django.conf import settings
+        from django.core.exceptions import MiddlewareNotUsed
+        self.blocked = frozenset(c.upper() for c in getattr(settings, 'IP_BLOCKING_BLOCKED_COUNTRIES', ()))
+        self.allowed = frozenset(c.upper() for c in getattr(settings, 'IP_BLOCKING_ALLOWED_COUNTRIES', ()))
+        if not getattr(settings, 'IP_BLOCKING_ENABLED', False) or not (self.blocked or self.allowed):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.whitelist = frozenset(getattr(settings, 'IP_BLOCKING_WHITELIST', ()))
+        self.excluded_paths = tuple(getattr(settings, 'IP_BLOCKING_EXCLUDED_PATHS', ()))
+
+    def __call__(self, request):
+        ip = request.META.get('REMOTE_ADDR', '')
+        if ip not in self.whitelist and not request.path.startswith(self.excluded_paths):
+            country = geoip.country(ip)
+            if country is not None and (country in self.blocked or (self.allowed and country not in self.allowed)):
+                logger.warning('Request blocked by IP geolocation', extra={'ip': ip, 'country': country})
+                accept = request.META.get('HTTP_ACCEPT', '')
+                if request.path.startswith('/api/') or 'application/json' in accept:
+                    return JsonResponse({'detail': 'access from your location is not permitted'}, status=403)
+                from django.http import HttpResponseForbidden
+                return HttpResponseForbidden('Access from your location is not permitted')
+        return self.get_response(request)
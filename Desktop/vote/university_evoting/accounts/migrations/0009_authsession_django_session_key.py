@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0008_trusteddevice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authsession',
+            name='django_session_key',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='authsession',
+            index=models.Index(fields=['user', 'django_session_key'], name='accounts_authsess_user_key_idx'),
+        ),
+    ]
@@ -41,6 +41,11 @@ class AuthSession(models.Model):
     device = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     revoked = models.BooleanField(default=False)
+    # Django session key of a browser login; indexes user -> sessions for single-session enforcement
+    django_session_key = models.CharField(max_length=40, null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "django_session_key"], name="accounts_authsess_user_key_idx")]
 
     def __str__(self):
         return f"Session {self.session_id} for {self.user} ({'revoked' if self.revoked else 'active'})"
@@ -96,11 +101,18 @@ class MFATOTPDevice(models.Model):
         except Exception:
             return None
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored ciphertext so an unchanged secret skips the trial decrypt in save()
+        instance._stored_secret = instance.__dict__.get('secret')
+        return instance
+
     def save(self, *args, **kwargs):
         # Ensure the secret is stored encrypted. If it already decrypts with configured keys,
         # leave it as-is. Otherwise assume it's plaintext and encrypt with the current key.
         from .crypto import encrypt_secret, decrypt_secret
-        if self.secret:
+        if self.secret and self.secret != getattr(self, '_stored_secret', None):
             needs_encrypt = False
             try:
                 # If decrypt succeeds, it is already encrypted with a known key
@@ -114,6 +126,7 @@ class MFATOTPDevice(models.Model):
                     # If encryption fails, raise to avoid saving plaintext silently
                     raise
         super().save(*args, **kwargs)
+        self._stored_secret = self.secret
 
 
 class WebAuthnCredential(models.Model):
@@ -0,0 +1,51 @@
+"""Hashing of refresh-token secrets.
+
+Refresh secrets are 32 random bytes, so a slow password hash (PBKDF2) buys nothing over a
+keyed hash and costs hundreds of milliseconds of CPU per login and refresh. Secrets are
+stored as `rth$<pepper id>$<hex HMAC-SHA256(pepper, secret)>`; the pepper lives in
+settings, never in the database. The pepper id lets the pepper be rotated: hashes made
+with a retired pepper listed in `REFRESH_TOKEN_OLD_PEPPERS` still verify and are reported
+as needing an upgrade, as are legacy hashes made with `make_password`.
+"""
+import hashlib
+import hmac
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+
+PREFIX = "rth"
+
+
+def _peppers():
+    """Return ({pepper id: pepper}, current id)."""
+    current = str(getattr(settings, "REFRESH_TOKEN_PEPPER_ID", "1"))
+    peppers = dict(getattr(settings, "REFRESH_TOKEN_OLD_PEPPERS", {}) or {})
+    peppers[current] = getattr(settings, "REFRESH_TOKEN_PEPPER", None) or settings.SECRET_KEY
+    return {str(k): v for k, v in peppers.items()}, current
+
+
+def _digest(pepper, secret):
+    return hmac.new(pepper.encode("utf-8"), secret.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def hash_refresh_secret(secret):
+    """Return the stored form of a refresh-token secret, keyed with the current pepper."""
+    peppers, current = _peppers()
+    return f"{PREFIX}${current}${_digest(peppers[current], secret)}"
+
+
+def verify_refresh_secret(secret, encoded):
+    """Check `secret` against a stored hash; returns (matches, needs_upgrade)."""
+    if not encoded.startswith(PREFIX + "$"):
+        # legacy make_password (PBKDF2) hash
+        matches = check_password(secret, encoded)
+        return matches, matches
+    try:
+        _, pepper_id, digest = encoded.split("$", 2)
+    except ValueError:
+        return False, False
+    peppers, current = _peppers()
+    pepper = peppers.get(pepper_id)
+    if pepper is None:
+        return False, False
+    matches = hmac.compare_digest(_digest(pepper, secret), digest)
+    return matches, matches and pepper_id != current
@@ -0,0 +1,101 @@
+"""In-memory Bloom filter of revoked access-token jtis for stateless (v2) tokens.
+
+v2 tokens expire after `ACCESS_TOKEN_TTL`, so the filter only has to hold jtis revoked
+within that window. It is built from RevokedAccessToken once per revocation version
+(accounts.token_state) and shared through the cache, so one gunicorn worker builds it
+and the others load the bits. A negative answer is definitive; a positive answer is
+confirmed against the token-state cache, so false positives cost a lookup, never a
+wrongly rejected token.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .token_state import token_states
+
+FILTER_PREFIX = "auth:revoked_bloom:"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one blake2b digest."""
+
+    def __init__(self, capacity, fp_rate=0.0001, bits=None, hashes=None, data=None):
+        capacity = max(1, int(capacity))
+        self.bits = bits or max(64, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.data = bytearray(data) if data is not None else bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def dumps(self):
+        return (self.bits, self.hashes, bytes(self.data))
+
+    @classmethod
+    def loads(cls, raw):
+        bits, hashes, data = raw
+        return cls(1, bits=bits, hashes=hashes, data=data)
+
+
+class RevocationFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._version = None
+        self._built_at = 0.0
+
+    def _build(self):
+        from .models import RevokedAccessToken
+        ttl = int(getattr(settings, "ACCESS_TOKEN_TTL", 900))
+        jtis = list(
+            RevokedAccessToken.objects.filter(revoked=True, issued_at__gte=timezone.now() - timedelta(seconds=ttl))
+            .values_list("jti", flat=True)
+        )
+        bloom = BloomFilter(len(jtis) * 2 + 1000, float(getattr(settings, "REVOCATION_BLOOM_FP_RATE", 0.0001)))
+        for jti in jtis:
+            bloom.add(str(jti))
+        return bloom
+
+    def _current(self):
+        """Return the filter for the current revocation version, loading or building it if needed."""
+        version = token_states.version()
+        ttl = int(getattr(settings, "ACCESS_TOKEN_TTL", 900))
+        with self._lock:
+            if self._filter is not None and self._version == version and time.monotonic() - self._built_at < ttl:
+                return self._filter
+        key = FILTER_PREFIX + str(version)
+        raw = cache.get(key)
+        if raw is not None and raw[0] > time.time() - ttl:
+            bloom = BloomFilter.loads(raw[1])
+        else:
+            bloom = self._build()
+            cache.set(key, (time.time(), bloom.dumps()), ttl)
+        with self._lock:
+            self._filter, self._version, self._built_at = bloom, version, time.monotonic()
+        return bloom
+
+    def is_revoked(self, jti):
+        jti = str(jti)
+        if jti not in self._current():
+            return False
+        # possible false positive: confirm with the token-state cache
+        state = token_states.get(jti)
+        return state is None or state.revoked
+
+
+revocation_filter = RevocationFilter()
@@ -0,0 +1,86 @@
+"""Token issuance shared by the login, refresh, magic-link and QR login views.
+
+`issue_tokens` writes the AuthSession (unless one is passed in), the RefreshToken and the
+access-token row in one transaction and returns the bearer tokens. `issue_tokens_bulk`
+does the same for many users with one bulk insert per table, for provisioning kiosk
+sessions ahead of time.
+"""
+import base64
+import os
+import time
+import uuid
+from collections import namedtuple
+from django.db import transaction
+
+from monitoring.metrics import observe
+from .authentication import make_access_token
+from .models import AuthSession, RefreshToken, RevokedAccessToken
+from .refresh_hash import hash_refresh_secret
+from .token_state import token_states
+
+IssuedTokens = namedtuple("IssuedTokens", ["session", "access_token", "refresh_token"])
+
+
+class TokenAlreadyRotated(Exception):
+    """The refresh token passed as `rotate` was rotated by a concurrent request."""
+
+
+def generate_refresh_token_value():
+    token_id = uuid.uuid4().hex
+    secret = base64.urlsafe_b64encode(os.urandom(32)).decode("utf-8").rstrip("=")
+    return f"{token_id}.{secret}", token_id, secret
+
+
+def issue_tokens(user, session=None, device=None, rotate=None):
+    """Issue a refresh/access token pair for `user`; returns IssuedTokens.
+
+    A new AuthSession (with `device`) is created unless `session` is given. `rotate` is the
+    RefreshToken being replaced on refresh; it is marked rotated in the same transaction,
+    only if no concurrent refresh rotated it first (TokenAlreadyRotated is raised then and
+    nothing is issued).
+    """
+    started = time.monotonic()
+    token_value, token_id, secret = generate_refresh_token_value()
+    token_hash = hash_refresh_secret(secret)
+    access_jti = uuid.uuid4()
+    with transaction.atomic():
+        if rotate is not None:
+            if not RefreshToken.objects.filter(pk=rotate.pk, rotated=False).update(rotated=True, token_hash=rotate.token_hash):
+                raise TokenAlreadyRotated(rotate.token_id)
+            rotate.rotated = True
+        if session is None:
+            session = AuthSession.objects.create(user=user, device=device)
+        RefreshToken.objects.create(session=session, token_id=token_id, token_hash=token_hash)
+        RevokedAccessToken.objects.create(jti=access_jti, session=session)
+    token_states.remember(access_jti, session.user_id, session.id)
+    access_token = make_access_token(access_jti, session.user_id, session.id)
+    observe("token_issue_seconds", time.monotonic() - started)
+    return IssuedTokens(session, access_token, token_value)
+
+
+def issue_tokens_bulk(users, device=None):
+    """Create one session and token pair per user with bulk inserts; returns IssuedTokens in `users` order."""
+    started = time.monotonic()
+    users = list(users)
+    sessions = [AuthSession(user=user, device=device) for user in users]
+    with transaction.atomic():
+        AuthSession.objects.bulk_create(sessions, batch_size=500)
+        if any(s.pk is None for s in sessions):
+            # backends that do not return primary keys from bulk inserts
+            ids = dict(AuthSession.objects.filter(session_id__in=[s.session_id for s in sessions]).values_list("session_id", "id"))
+            for s in sessions:
+                s.pk = ids[s.session_id]
+        refresh_rows, access_rows, values = [], [], []
+        for s in sessions:
+            token_value, token_id, secret = generate_refresh_token_value()
+            refresh_rows.append(RefreshToken(session=s, token_id=token_id, token_hash=hash_refresh_secret(secret)))
+            access_rows.append(RevokedAccessToken(jti=uuid.uuid4(), session=s))
+            values.append(token_value)
+        RefreshToken.objects.bulk_create(refresh_rows, batch_size=500)
+        RevokedAccessToken.objects.bulk_create(access_rows, batch_size=500)
+    issued = []
+    for s, access, token_value in zip(sessions, access_rows, values):
+        token_states.remember(access.jti, s.user_id, s.id)
+        issued.append(IssuedTokens(s, make_access_token(access.jti, s.user_id, s.id), token_value))
+    observe("token_issue_bulk_seconds", time.monotonic() - started)
+    return issued
@@ -0,0 +1,80 @@
+"""Hybrid session engine: cache-first reads with write-behind to the database.
+
+Sessions are read from the cache (Redis in production) and fall back to the database
+row when the cache entry is missing. Saves always update the cache; the database row is
+only rewritten when durable data changed (login, logout, anything other than the
+`SESSION_WRITE_BEHIND_KEYS`, by default `last_activity`) or when it is more than
+`SESSION_DB_WRITE_INTERVAL` seconds behind. Activity bookkeeping therefore reaches the
+database at most once per interval per session, while the database stays the
+recovery copy if the cache is flushed: in that case a session resumes with a
+`last_activity` that is at most one interval old, which can only shorten the idle
+window, never extend it.
+
+Enable with SESSION_ENGINE = "accounts.session_backend".
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = "accounts.session_backend"
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._synced_at = None
+        self._durable_digest = None
+
+    @staticmethod
+    def _digest(data):
+        volatile = getattr(settings, "SESSION_WRITE_BEHIND_KEYS", ("last_activity",))
+        durable = {k: v for k, v in data.items() if k not in volatile}
+        return hashlib.blake2b(json.dumps(durable, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    def _cache_entry(self, data, synced_at, expiry=None):
+        self._synced_at, self._durable_digest = synced_at, self._digest(data)
+        # while loading, `expiry` must come from the row: get_expiry_age() without it reads
+        # the session and would call load() again
+        timeout = self.get_expiry_age(expiry=expiry) if expiry is not None else self.get_expiry_age()
+        try:
+            self._cache.set(self.cache_key, {"data": data, "synced_at": synced_at, "durable": self._durable_digest}, timeout)
+        except Exception:
+            # the database copy is authoritative when the cache is unavailable
+            self._synced_at = None
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+        if entry is not None:
+            self._synced_at, self._durable_digest = entry["synced_at"], entry["durable"]
+            return entry["data"]
+        s = self._get_session_from_db()
+        if s is None:
+            self._session_key = None
+            return {}
+        data = self.decode(s.session_data)
+        self._cache_entry(data, time.time(), expiry=s.expire_date)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        now = time.time()
+        interval = float(getattr(settings, "SESSION_DB_WRITE_INTERVAL", 300))
+        if (
+            not must_create
+            and self.session_key is not None
+            and self._synced_at is not None
+            and now - self._synced_at < interval
+            and self._digest(data) == self._durable_digest
+        ):
+            # only write-behind keys changed: the database row catches up later
+            self._cache_entry(data, self._synced_at)
+            return
+        DBStore.save(self, must_create=must_create)
+        self._cache_entry(data, now)
@@ -1,5 +1,9 @@
+from importlib import import_module
+
+from django.conf import settings
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.contrib.sessions.models import Session
+from django.core.cache import caches
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -11,15 +15,20 @@ def on_user_logged_in(sender, request, user, **kwargs):
         request.session.save()
 
     current_key = request.session.session_key
-    # Remove other sessions for this user (enforce single active session)
+    # Remove other sessions for this user (enforce single active session). Browser logins
+    # record their session key on AuthSession, so this is one indexed lookup on the user
+    # rather than a scan and decode of every row in the session table.
     try:
-        for s in Session.objects.exclude(session_key=current_key):
-            try:
-                data = s.get_decoded()
-                if str(data.get('_auth_user_id')) == str(user.pk):
-                    s.delete()
-            except Exception:
-                continue
+        from .models import AuthSession
+        others = AuthSession.objects.filter(user=user, django_session_key__isnull=False).exclude(django_session_key=current_key)
+        keys = list(others.values_list('django_session_key', flat=True))
+        if keys:
+            Session.objects.filter(session_key__in=keys).delete()
+            # cache-backed engines would otherwise keep serving the deleted sessions
+            prefix = getattr(import_module(settings.SESSION_ENGINE).SessionStore, 'cache_key_prefix', None)
+            if prefix:
+                caches[settings.SESSION_CACHE_ALIAS].delete_many([prefix + key for key in keys])
+            others.update(revoked=True, django_session_key=None)
     except Exception:
         pass
 
@@ -27,7 +36,7 @@ def on_user_logged_in(sender, request, user, **kwargs):
     try:
         from .models import AuthSession
         device = {'ua': request.META.get('HTTP_USER_AGENT', '')}
-        auth = AuthSession.objects.create(user=user, device=device)
+        auth = AuthSession.objects.create(user=user, device=device, django_session_key=current_key)
         request.session['auth_session_id'] = str(auth.session_id)
         request.session['last_activity'] = int(timezone.now().timestamp())
     except Exception:
@@ -41,6 +50,6 @@ def on_user_logged_out(sender, request, user, **kwargs):
         from .models import AuthSession
         sid = request.session.get('auth_session_id')
         if sid:
-            AuthSession.objects.filter(session_id=sid).update(revoked=True)
+            AuthSession.objects.filter(session_id=sid).update(revoked=True, django_session_key=None)
     except Exception:
         pass
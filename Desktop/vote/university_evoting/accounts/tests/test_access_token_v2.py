@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from accounts.authentication import JTIAuthentication, make_access_token, decode_access_token_v2
+from accounts.middleware import RevokedAccessTokenMiddleware
+from accounts.models import AuthSession, RevokedAccessToken
+from accounts.revocation_filter import BloomFilter
+from accounts.token_state import token_states, revoke_access_tokens
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_roundtrip(self):
+        bloom = BloomFilter(500, 0.001)
+        items = [f'jti-{i}' for i in range(500)]
+        for item in items:
+            bloom.add(item)
+        copy = BloomFilter.loads(bloom.dumps())
+        self.assertTrue(all(item in copy for item in items))
+        false_hits = sum(f'other-{i}' in copy for i in range(5000))
+        self.assertLess(false_hits, 50)
+
+
+class AccessTokenV2Tests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='dora', password='pass')
+        self.session = AuthSession.objects.create(user=self.user)
+        self.access = RevokedAccessToken.objects.create(session=self.session)
+        token_states.remember(self.access.jti, self.user.id, self.session.id)
+        with self.settings(ACCESS_TOKEN_FORMAT='v2'):
+            self.token = make_access_token(self.access.jti, self.user.id, self.session.id)
+        self.request = SimpleNamespace(META={'HTTP_AUTHORIZATION': f'Bearer {self.token}'})
+
+    def test_claims_are_signed(self):
+        claims = decode_access_token_v2(self.token)
+        self.assertEqual((claims['jti'], claims['uid'], claims['sid']), (str(self.access.jti), self.user.id, self.session.id))
+        payload = self.token.split('.')[1]
+        tampered = self.token.replace(payload, payload[:-2] + ('AA' if payload[-2:] != 'AA' else 'BB'))
+        self.assertIsNone(decode_access_token_v2(tampered))
+
+    def test_expired_token_is_rejected(self):
+        with mock.patch('accounts.authentication.time.time', return_value=0):
+            token = make_access_token(self.access.jti, self.user.id, self.session.id)
+        self.assertIsNone(decode_access_token_v2(token))
+
+    def test_repeat_requests_only_load_the_user(self):
+        auth = JTIAuthentication()
+        self.assertEqual(auth.authenticate(self.request)[0], self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(auth.authenticate(self.request)[0], self.user)
+
+    def test_requests_see_profile_changes(self):
+        from accounts.models import Profile
+        from abac.policy import evaluate, invalidate_profile_cache
+        profile = Profile.objects.create(user=self.user)
+        # user ids are reused after rollback; don't leave decisions for the next test
+        self.addCleanup(invalidate_profile_cache, self.user.id)
+        auth = JTIAuthentication()
+        first = auth.authenticate(self.request)[0]
+        self.assertTrue(evaluate(first, 'cast_vote'))
+        profile.attributes = {'allowed_to_vote': False}
+        profile.save()
+        second = auth.authenticate(self.request)[0]
+        self.assertIsNot(first, second)
+        self.assertFalse(evaluate(second, 'cast_vote'))
+
+    def test_revocation_rejects_token(self):
+        JTIAuthentication().authenticate(self.request)
+        revoke_access_tokens(session=self.session)
+        self.assertIsNone(JTIAuthentication().authenticate(self.request))
+        mw = RevokedAccessTokenMiddleware(lambda request: SimpleNamespace(status_code=200))
+        self.assertEqual(mw(self.request).status_code, 401)
+
+    def test_v1_tokens_still_accepted(self):
+        with self.settings(ACCESS_TOKEN_FORMAT='v1'):
+            token = make_access_token(self.access.jti, self.user.id, self.session.id)
+        self.assertFalse(token.startswith('v2.'))
+        request = SimpleNamespace(META={'HTTP_AUTHORIZATION': f'Bearer {token}'})
+        self.assertEqual(JTIAuthentication().authenticate(request)[0], self.user)
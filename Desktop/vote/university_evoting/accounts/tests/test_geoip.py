@@ -0,0 +1,63 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+
+from accounts.geoip import GeoIPIndex, build_index, parse_cidr_lines, geoip
+
+CIDRS = """network,country
+# sample ranges
+10.1.0.0/16,AA
+10.2.0.0/16,BB
+10.3.0.0/16,BB
+2001:db8::/32,CC
+"""
+
+
+class GeoIPIndexTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "geo.idx")
+        build_index(parse_cidr_lines(CIDRS.splitlines()), self.path)
+
+    def tearDown(self):
+        geoip._checked_at = None
+        self.dir.cleanup()
+
+    def test_lookup_ranges(self):
+        index = GeoIPIndex(self.path)
+        self.assertEqual(index.country("10.1.0.0"), "AA")
+        self.assertEqual(index.country("10.1.255.255"), "AA")
+        self.assertEqual(index.country("10.3.4.5"), "BB")
+        self.assertEqual(index.country("2001:db8::1"), "CC")
+        self.assertEqual(index.country("::ffff:10.2.0.1"), "BB")
+        self.assertIsNone(index.country("10.0.255.255"))
+        self.assertIsNone(index.country("10.4.0.0"))
+        self.assertIsNone(index.country("not-an-ip"))
+
+    def test_adjacent_ranges_are_merged_and_overlaps_rejected(self):
+        self.assertEqual(build_index(parse_cidr_lines(CIDRS.splitlines()), self.path), (2, 1))
+        with self.assertRaises(ValueError):
+            build_index(parse_cidr_lines(["10.0.0.0/8,AA", "10.1.0.0/16,BB"]), self.path)
+
+    def test_rebuilt_file_is_picked_up(self):
+        with override_settings(GEOIP_INDEX_PATH=self.path, GEOIP_RELOAD_INTERVAL=0):
+            self.assertEqual(geoip.country("10.1.0.1"), "AA")
+            source = os.path.join(self.dir.name, "cidrs.csv")
+            with open(source, "w") as f:
+                f.write("10.1.0.0/16,DD\n")
+            call_command("build_geoip_index", source, output=self.path, stdout=StringIO())
+            self.assertEqual(geoip.country("10.1.0.1"), "DD")
+
+    def test_middleware_blocks_listed_countries(self):
+        middleware = ["accounts.middleware.GeoBlockingMiddleware"]
+        with override_settings(MIDDLEWARE=middleware, GEOIP_INDEX_PATH=self.path, GEOIP_RELOAD_INTERVAL=0,
+                               IP_BLOCKING_ENABLED=True, IP_BLOCKING_BLOCKED_COUNTRIES=["bb"]):
+            client = Client()
+            self.assertEqual(client.get("/api/voting/qr/success/", REMOTE_ADDR="10.2.0.1").status_code, 403)
+            self.assertEqual(client.get("/api/voting/qr/success/", REMOTE_ADDR="10.1.0.1").status_code, 200)
+            # unknown addresses are never blocked
+            self.assertEqual(client.get("/api/voting/qr/success/", REMOTE_ADDR="192.168.0.1").status_code, 200)
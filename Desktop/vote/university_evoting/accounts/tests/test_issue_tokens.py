@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.authentication import JTIAuthentication
+from accounts.models import AuthSession, RefreshToken, RevokedAccessToken
+from accounts.refresh_hash import verify_refresh_secret
+from accounts.services import issue_tokens, issue_tokens_bulk
+
+
+def _authenticate(access_token):
+    request = SimpleNamespace(META={'HTTP_AUTHORIZATION': f'Bearer {access_token}'})
+    return JTIAuthentication().authenticate(request)
+
+
+class IssueTokensTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='fay', password='pass')
+        self.others = [User.objects.create_user(username=f'kiosk{i}', password='pass') for i in range(5)]
+
+    def test_issue_tokens_creates_session_and_usable_tokens(self):
+        issued = issue_tokens(self.user)
+        self.assertEqual(issued.session.user, self.user)
+        self.assertEqual(_authenticate(issued.access_token)[0], self.user)
+        token_id, secret = issued.refresh_token.split('.')
+        row = RefreshToken.objects.get(token_id=token_id)
+        self.assertEqual(row.session, issued.session)
+        self.assertTrue(verify_refresh_secret(secret, row.token_hash)[0])
+
+    def test_rotate_reuses_session(self):
+        first = issue_tokens(self.user)
+        old = RefreshToken.objects.get(session=first.session)
+        second = issue_tokens(self.user, session=first.session, rotate=old)
+        self.assertEqual(second.session, first.session)
+        old.refresh_from_db()
+        self.assertTrue(old.rotated)
+        self.assertEqual(RefreshToken.objects.filter(session=first.session).count(), 2)
+
+    def test_concurrent_rotation_issues_only_one_pair(self):
+        from accounts.services import TokenAlreadyRotated
+        first = issue_tokens(self.user)
+        # two refreshes loaded the same unrotated row
+        old = RefreshToken.objects.get(session=first.session)
+        stale = RefreshToken.objects.get(pk=old.pk)
+        issue_tokens(self.user, session=first.session, rotate=old)
+        with self.assertRaises(TokenAlreadyRotated):
+            issue_tokens(self.user, session=first.session, rotate=stale)
+        self.assertEqual(RefreshToken.objects.filter(session=first.session).count(), 2)
+
+    def test_bulk_issue_uses_one_insert_per_table(self):
+        # one INSERT per table, plus the savepoint pair of the atomic block
+        with self.assertNumQueries(5):
+            issued = issue_tokens_bulk(self.others)
+        self.assertEqual([t.session.user_id for t in issued], [u.id for u in self.others])
+        self.assertEqual(RevokedAccessToken.objects.filter(session__user__in=self.others).count(), 5)
+        for user, tokens in zip(self.others, issued):
+            self.assertEqual(_authenticate(tokens.access_token)[0], user)
+
+    def test_kiosk_endpoint_requires_admin_and_issues_sessions(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post('/api/accounts/kiosk/sessions/', {'user_ids': [self.others[0].id]}, format='json').status_code, 403)
+        admin = get_user_model().objects.create_user(username='admin', password='pass', is_staff=True)
+        client.force_authenticate(admin)
+        ids = [u.id for u in self.others]
+        resp = client.post('/api/accounts/kiosk/sessions/', {'user_ids': ids}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual([s['user_id'] for s in resp.data['sessions']], ids)
+        self.assertEqual(AuthSession.objects.filter(user__in=self.others).count(), 5)
+        resp = client.post('/api/accounts/kiosk/sessions/', {'user_ids': [999999]}, format='json')
+        self.assertEqual(resp.status_code, 404)
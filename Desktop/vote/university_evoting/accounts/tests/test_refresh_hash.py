@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import AuthSession, Profile, RefreshToken
+from accounts.refresh_hash import hash_refresh_secret, verify_refresh_secret
+
+
+class RefreshHashTests(TestCase):
+    def test_hash_format_and_verify(self):
+        encoded = hash_refresh_secret('s3cret')
+        self.assertTrue(encoded.startswith('rth$1$'))
+        self.assertEqual(verify_refresh_secret('s3cret', encoded), (True, False))
+        self.assertEqual(verify_refresh_secret('other', encoded), (False, False))
+
+    def test_unset_pepper_falls_back_to_secret_key(self):
+        with self.settings(REFRESH_TOKEN_PEPPER=''):
+            encoded = hash_refresh_secret('s3cret')
+        with self.settings(REFRESH_TOKEN_PEPPER=settings.SECRET_KEY):
+            self.assertEqual(hash_refresh_secret('s3cret'), encoded)
+
+    def test_retired_pepper_verifies_and_needs_upgrade(self):
+        with self.settings(REFRESH_TOKEN_PEPPER='old-pepper'):
+            encoded = hash_refresh_secret('s3cret')
+        with self.settings(REFRESH_TOKEN_PEPPER='new-pepper', REFRESH_TOKEN_PEPPER_ID='2',
+                           REFRESH_TOKEN_OLD_PEPPERS={'1': 'old-pepper'}):
+            self.assertEqual(verify_refresh_secret('s3cret', encoded), (True, True))
+        with self.settings(REFRESH_TOKEN_PEPPER='new-pepper', REFRESH_TOKEN_PEPPER_ID='2', REFRESH_TOKEN_OLD_PEPPERS={}):
+            self.assertEqual(verify_refresh_secret('s3cret', encoded), (False, False))
+
+    def test_legacy_pbkdf2_hash_is_upgraded_on_refresh(self):
+        user = get_user_model().objects.create_user(username='erin', password='pass')
+        Profile.objects.create(user=user, role='student', status=Profile.STATUS_ACTIVE)
+        session = AuthSession.objects.create(user=user)
+        token_id = 'a' * 32
+        RefreshToken.objects.create(session=session, token_id=token_id, token_hash=make_password('legacy'))
+        resp = APIClient().post('/api/auth/refresh/', {'refresh_token': f'{token_id}.legacy'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        old = RefreshToken.objects.get(token_id=token_id)
+        self.assertTrue(old.rotated)
+        self.assertTrue(old.token_hash.startswith('rth$'))
+        new = RefreshToken.objects.exclude(token_id=token_id).get(session=session)
+        self.assertTrue(new.token_hash.startswith('rth$'))
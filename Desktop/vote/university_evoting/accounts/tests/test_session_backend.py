@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+
+from accounts.session_backend import SessionStore
+
+
+class HybridSessionStoreTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        store = SessionStore()
+        store['user'] = 'u1'
+        store['last_activity'] = 100
+        store.create()
+        store.save()
+        self.key = store.session_key
+
+    def _db_activity(self):
+        return SessionStore().decode(Session.objects.get(session_key=self.key).session_data).get('last_activity')
+
+    def test_activity_only_change_skips_the_database(self):
+        store = SessionStore(self.key)
+        self.assertEqual(store['user'], 'u1')
+        store['last_activity'] = 200
+        with self.assertNumQueries(0):
+            store.save()
+        self.assertEqual(SessionStore(self.key)['last_activity'], 200)
+        self.assertEqual(self._db_activity(), 100)
+
+    def test_durable_change_is_written_through(self):
+        store = SessionStore(self.key)
+        store['user'] = 'u2'
+        store['last_activity'] = 200
+        store.save()
+        self.assertEqual(self._db_activity(), 200)
+
+    @override_settings(SESSION_DB_WRITE_INTERVAL=60)
+    def test_database_catches_up_after_the_interval(self):
+        store = SessionStore(self.key)
+        store['last_activity'] = 200
+        synced_at = store._synced_at
+        with mock.patch('accounts.session_backend.time.time', return_value=synced_at + 61):
+            store.save()
+        self.assertEqual(self._db_activity(), 200)
+
+    def test_falls_back_to_database_when_cache_is_empty(self):
+        cache.clear()
+        store = SessionStore(self.key)
+        self.assertEqual(store['user'], 'u1')
+        self.assertTrue(cache.get(store.cache_key))
+
+    def test_cache_miss_load_is_one_query(self):
+        cache.clear()
+        store = SessionStore(self.key)
+        with self.assertNumQueries(1):
+            self.assertEqual(store['user'], 'u1')
+        entry = cache.get(store.cache_key)
+        self.assertEqual(entry['data']['user'], 'u1')
+
+
+class ActivityCoalescingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(username='active', password='pass')
+        self.client = Client()
+        self.assertTrue(self.client.login(username='active', password='pass'))
+
+    def test_last_activity_moves_only_by_granularity(self):
+        self.client.get('/api/voting/qr/success/')
+        first = self.client.session['last_activity']
+        with mock.patch('accounts.session_backend.SessionStore.save') as save:
+            self.client.get('/api/voting/qr/success/')
+        save.assert_not_called()
+        self.assertEqual(self.client.session['last_activity'], first)
+
+    @override_settings(SESSION_ACTIVITY_GRANULARITY=0)
+    def test_zero_granularity_records_every_request(self):
+        s = self.client.session
+        s['last_activity'] = s['last_activity'] - 5
+        s.save()
+        self.client.get('/api/voting/qr/success/')
+        self.assertGreater(self.client.session['last_activity'], s['last_activity'])
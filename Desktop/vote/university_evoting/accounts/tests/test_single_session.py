@@ -29,3 +29,21 @@ class SingleSessionTests(TestCase):
         # check that accessing a login-required view results in non-authenticated state
         # We assert that the session no longer contains the auth key
         self.assertNotIn('_auth_user_id', c1.session)
+
+    def test_other_users_sessions_are_kept(self):
+        other = get_user_model().objects.create_user(username='other', password='pass')
+        c_other = Client()
+        self.assertTrue(c_other.login(username='other', password='pass'))
+        c1 = Client()
+        c2 = Client()
+        self.assertTrue(c1.login(username='single', password='pass'))
+        self.assertTrue(c2.login(username='single', password='pass'))
+
+        self.assertIn('_auth_user_id', c_other.session)
+        self.assertNotIn('_auth_user_id', c1.session)
+        from accounts.models import AuthSession
+        self.assertEqual(
+            list(AuthSession.objects.filter(user=self.user, django_session_key__isnull=False).values_list('django_session_key', flat=True)),
+            [c2.session.session_key],
+        )
+        self.assertTrue(AuthSession.objects.filter(user=other, django_session_key=c_other.session.session_key).exists())
@@ -0,0 +1,64 @@
+import hmac
+import hashlib
+from types import SimpleNamespace
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from accounts.authentication import JTIAuthentication
+from accounts.middleware import RevokedAccessTokenMiddleware
+from accounts.models import AuthSession, RevokedAccessToken
+from accounts.token_state import token_states, revoke_access_tokens, VERSION_KEY
+
+
+class TokenStateCacheTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='carol', password='pass')
+        self.session = AuthSession.objects.create(user=self.user)
+        self.access = RevokedAccessToken.objects.create(session=self.session)
+        token_states.remember(self.access.jti, self.user.id, self.session.id)
+        jti = str(self.access.jti)
+        sig = hmac.new(settings.ACCESS_TOKEN_SECRET.encode('utf-8'), jti.encode('utf-8'), hashlib.sha256).hexdigest()
+        self.request = SimpleNamespace(META={'HTTP_AUTHORIZATION': f'Bearer {jti}.{sig}'})
+
+    def _middleware_status(self):
+        mw = RevokedAccessTokenMiddleware(lambda request: SimpleNamespace(status_code=200))
+        return mw(self.request).status_code
+
+    def test_repeat_requests_only_load_the_user(self):
+        auth = JTIAuthentication()
+        self.assertEqual(auth.authenticate(self.request)[0], self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._middleware_status(), 200)
+            self.assertEqual(auth.authenticate(self.request)[0], self.user)
+
+    def test_requests_never_share_a_user_instance(self):
+        from accounts.models import Profile
+        from abac.policy import evaluate, invalidate_profile_cache
+        profile = Profile.objects.create(user=self.user)
+        # user ids are reused after rollback; don't leave decisions for the next test
+        self.addCleanup(invalidate_profile_cache, self.user.id)
+        auth = JTIAuthentication()
+        first = auth.authenticate(self.request)[0]
+        self.assertTrue(evaluate(first, 'cast_vote'))
+        profile.attributes = {'allowed_to_vote': False}
+        profile.save()
+        second = auth.authenticate(self.request)[0]
+        self.assertIsNot(first, second)
+        self.assertFalse(evaluate(second, 'cast_vote'))
+
+    def test_revocation_is_seen_by_both_layers(self):
+        JTIAuthentication().authenticate(self.request)
+        self.assertEqual(revoke_access_tokens(session=self.session), 1)
+        self.assertEqual(self._middleware_status(), 401)
+        self.assertIsNone(JTIAuthentication().authenticate(self.request))
+
+    def test_revocation_version_from_another_process(self):
+        JTIAuthentication().authenticate(self.request)
+        # another process revoked the token: DB row updated, shared entry dropped, version bumped
+        RevokedAccessToken.objects.filter(pk=self.access.pk).update(revoked=True)
+        cache.delete(f'auth:jti:{self.access.jti}')
+        cache.set(VERSION_KEY, 'bumped-elsewhere')
+        with self.settings(TOKEN_STATE_VERSION_INTERVAL=0):
+            self.assertIsNone(JTIAuthentication().authenticate(self.request))
@@ -45,3 +45,43 @@ class ImportUsersTests(TestCase):
             u.refresh_from_db()
             self.assertEqual(u.email, "carol2@example.com")
             self.assertEqual(u.profile.faculty, "Science")
+
+    def test_chunked_import_uses_constant_queries_per_chunk(self):
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "users.json"
+            data = [{"username": f"u{i}", "email": f"u{i}@example.com", "student_id": f"B{i:03d}", "campus": "Main"} for i in range(50)]
+            # a repeated row inside the chunk is folded into the pending user
+            data.append({"username": "u0", "email": "u0-new@example.com", "faculty": "Law"})
+            p.write_text(json.dumps(data, indent=2), encoding='utf-8')
+            from django.db import connection
+            from django.test.utils import CaptureQueriesContext
+            with CaptureQueriesContext(connection) as ctx:
+                call_command("import_users", str(p), "--update-existing", "--chunk-size", "100")
+            self.assertLess(len(ctx.captured_queries), 10)
+            User = get_user_model()
+            self.assertEqual(User.objects.filter(username__startswith="u").count(), 50)
+            u0 = User.objects.get(username="u0")
+            self.assertEqual((u0.email, u0.profile.faculty, u0.profile.student_id), ("u0-new@example.com", "Law", "B000"))
+
+    def test_streaming_json_reader(self):
+        import io
+        from accounts.importer import iter_json_array
+        items = [{"username": f"x{i}", "attributes": {"note": "a, ] b"}} for i in range(20)]
+        parsed = list(iter_json_array(io.StringIO(json.dumps(items)), read_size=16))
+        self.assertEqual(parsed, items)
+
+    def test_dry_run_counts_repeated_users_once(self):
+        from accounts.importer import UserImporter
+        records = [{"username": "dup", "student_id": "D1"}, {"username": "other"}, {"username": "dup"}, {"username": "dup2", "student_id": "D1"}]
+        for chunk_size in (10, 1):
+            stats = UserImporter(dry_run=True, update_existing=True, chunk_size=chunk_size).run(records)
+            self.assertEqual((stats.created, stats.updated), (2, 2))
+        self.assertFalse(get_user_model().objects.filter(username="dup").exists())
+
+    def test_profile_caches_invalidated_once_per_chunk(self):
+        from unittest import mock
+        from accounts.importer import UserImporter
+        with mock.patch("accounts.importer.invalidate_profile_caches") as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                UserImporter(chunk_size=2).run([{"username": f"c{i}"} for i in range(3)])
+        self.assertEqual(invalidate.call_count, 2)
@@ -9,3 +9,54 @@ class SSOSyncTests(TestCase):
         User = get_user_model()
         self.assertTrue(User.objects.filter(username="sso_alice").exists())
         self.assertTrue(User.objects.filter(username="sso_bob").exists())
+
+
+class SSODeltaSyncTests(TestCase):
+    def _write(self, path, users):
+        import json
+        path.write_text("\n".join(json.dumps(u) for u in users), encoding="utf-8")
+
+    def test_file_adapter_delta_sync_uses_watermark(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+        from integrations.models import ExternalIntegration
+        from accounts.importer import UserImporter
+
+        users = [
+            {"username": f"dir{i}", "email": f"dir{i}@example.com", "faculty": "Science", "updated_at": f"2026-01-0{i + 1}T00:00:00+00:00"}
+            for i in range(5)
+        ]
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "roster.jsonl"
+            self._write(path, users)
+            call_command("sync_sso", "--adapter", "file", "--path", str(path), "--page-size", "2", "--workers", "3")
+            self.assertEqual(get_user_model().objects.filter(username__startswith="dir").count(), 5)
+            config = ExternalIntegration.objects.get(name="sso").config
+            self.assertEqual(config["sso_watermark"], "2026-01-05T00:00:00+00:00")
+
+            # only one identity changed since the watermark; dir4, stamped exactly at it, is re-applied
+            users[1] = dict(users[1], faculty="Law", updated_at="2026-02-01T00:00:00+00:00")
+            self._write(path, users)
+            with mock.patch.object(UserImporter, "_import_chunk", autospec=True, side_effect=UserImporter._import_chunk) as chunk:
+                call_command("sync_sso", "--adapter", "file", "--path", str(path))
+            synced = [row["username"] for call in chunk.call_args_list for row in call.args[1]]
+            self.assertEqual(synced, ["dir4", "dir1"])
+            self.assertEqual(get_user_model().objects.get(username="dir1").profile.faculty, "Law")
+            self.assertEqual(ExternalIntegration.objects.get(name="sso").config["sso_watermark"], "2026-02-01T00:00:00+00:00")
+
+    def test_default_paging_fetches_roster_once_per_sync(self):
+        from unittest import mock
+        from integrations.sso import DummySSOAdapter
+        adapter = DummySSOAdapter()
+        with mock.patch.object(DummySSOAdapter, "fetch_users", autospec=True, side_effect=DummySSOAdapter.fetch_users) as fetch:
+            self.assertEqual(len(list(adapter.iter_pages(page_size=1))), 2)
+            self.assertEqual(fetch.call_count, 1)
+            list(adapter.iter_pages(page_size=1))
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_pages_cover_roster_in_order(self):
+        from integrations.sso import DummySSOAdapter
+        pages = list(DummySSOAdapter().iter_pages(page_size=1))
+        self.assertEqual([p.users[0]["username"] for p in pages], ["sso_alice", "sso_bob"])
+        self.assertIsNone(pages[-1].next_cursor)
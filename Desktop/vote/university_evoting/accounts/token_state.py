@@ -0,0 +1,153 @@
+"""Access-token state cache shared by RevokedAccessTokenMiddleware and JTIAuthentication.
+
+Maps an access token's jti to TokenState(user_id, session_id, revoked) in two layers: a
+per-process TTL map and the shared cache
+(Redis in production), falling back to RevokedAccessToken on a miss. Issuing views call
+`remember`; revocations go through `revoke_access_tokens`, which drops the shared entries
+and bumps a revocation version. Each process compares that version at most every
+`TOKEN_STATE_VERSION_INTERVAL` seconds and empties its local map when it moved, so a
+revoked token stops working everywhere within that interval while a repeat request
+resolves its token state without a DB query or cache round trip.
+
+Only token state is kept per process. Users are loaded fresh (with their profile) for
+every request, so no model instance, and no stale profile or is_active flag, is ever
+shared between requests.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+TokenState = namedtuple("TokenState", ["user_id", "session_id", "revoked"])
+
+STATE_PREFIX = "auth:jti:"
+VERSION_KEY = "auth:revocation_version"
+
+
+class TokenStateCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _setting(name, default):
+        return getattr(settings, name, default)
+
+    def _sync_version(self):
+        """Empty the local map if the shared revocation version moved (throttled). Lock held."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < float(self._setting("TOKEN_STATE_VERSION_INTERVAL", 1.0)):
+            return
+        self._checked_at = now
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        if version != self._version:
+            self._local.clear()
+            self._version = version
+
+    def _local_get(self, jti):
+        entry = self._local.get(jti)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._local[jti]
+            return None
+        self._local.move_to_end(jti)
+        return entry[0]
+
+    def _local_put(self, jti, state):
+        self._local[jti] = (state, time.monotonic() + int(self._setting("TOKEN_STATE_LOCAL_TTL", 60)))
+        self._local.move_to_end(jti)
+        while len(self._local) > int(self._setting("TOKEN_STATE_LOCAL_MAX", 10000)):
+            self._local.popitem(last=False)
+
+    def version(self):
+        """Return the current shared revocation version (checked at most every interval)."""
+        with self._lock:
+            self._sync_version()
+            return self._version
+
+    def user(self, user_id):
+        """Return a fresh instance of the user with `user_id` (profile included), or None."""
+        from django.contrib.auth import get_user_model
+        return get_user_model().objects.select_related("profile").filter(pk=user_id).first()
+
+    def remember(self, jti, user_id, session_id):
+        """Record a freshly issued, unrevoked access token."""
+        state = TokenState(user_id, session_id, False)
+        cache.set(STATE_PREFIX + str(jti), tuple(state), int(self._setting("TOKEN_STATE_TTL", 3600)))
+        with self._lock:
+            self._local_put(str(jti), state)
+
+    def get(self, jti):
+        """Return the TokenState for `jti`, or None if no such token was issued."""
+        from .models import RevokedAccessToken
+        jti = str(jti)
+        with self._lock:
+            self._sync_version()
+            state = self._local_get(jti)
+        if state is not None:
+            return state
+        raw = cache.get(STATE_PREFIX + jti)
+        if raw is not None:
+            state = TokenState(*raw)
+        else:
+            row = RevokedAccessToken.objects.filter(jti=jti).values_list("session__user_id", "session_id", "revoked").first()
+            if row is None:
+                return None
+            state = TokenState(*row)
+            cache.set(STATE_PREFIX + jti, tuple(state), int(self._setting("TOKEN_STATE_TTL", 3600)))
+        with self._lock:
+            self._local_put(jti, state)
+        return state
+
+    def resolve(self, jti):
+        """Return (TokenState, user) for an unrevoked token, or None.
+
+        The user is a fresh instance loaded for this call, never one shared with another request.
+        """
+        state = self.get(jti)
+        if state is None or state.revoked:
+            return None
+        user = self.user(state.user_id)
+        if user is None:
+            return None
+        return state, user
+
+    def _forget_now(self, jtis):
+        cache.delete_many([STATE_PREFIX + str(j) for j in jtis])
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._local.clear()
+            self._version = None
+
+    def forget(self, jtis):
+        """Drop cached state for `jtis` in every process.
+
+        Done now and again after commit, so a lookup that reads the row before the
+        revocation commits cannot leave a stale "not revoked" entry behind.
+        """
+        jtis = [str(j) for j in jtis]
+        self._forget_now(jtis)
+        transaction.on_commit(lambda: self._forget_now(jtis))
+
+
+token_states = TokenStateCache()
+
+
+def revoke_access_tokens(**filters):
+    """Revoke the unrevoked access tokens matching `filters` and invalidate their cached state."""
+    from .models import RevokedAccessToken
+    now = timezone.now()
+    count = RevokedAccessToken.objects.filter(revoked=False, **filters).update(revoked=True, revoked_at=now)
+    if count:
+        token_states.forget(RevokedAccessToken.objects.filter(revoked_at=now, **filters).values_list("jti", flat=True))
+    return count
@@ -14,6 +14,7 @@ from .views import (
     LogoutView,
     QRIssueLoginView,
     QRLoginVerifyView,
+    KioskSessionIssueView,
     TrustedDeviceListCreateView,
     TrustedDeviceDeleteView,
 )
@@ -38,6 +39,8 @@ urlpatterns = [
     # QR login (admin issue + verify)
     path("qr/login/issue/", QRIssueLoginView.as_view(), name='qr-login-issue'),
     path("qr/login/verify/", QRLoginVerifyView.as_view(), name='qr-login-verify'),
+    # Kiosk provisioning (admin bulk session issue)
+    path("kiosk/sessions/", KioskSessionIssueView.as_view(), name='kiosk-sessions-issue'),
     # Trusted device registry
     path("devices/", TrustedDeviceListCreateView.as_view(), name='trusted-devices-list'),
     path("devices/<uuid:device_id>/", TrustedDeviceDeleteView.as_view(), name='trusted-devices-delete'),
@@ -16,13 +16,14 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 
 # Added simple auth endpoints for refresh-token rotation proof-of-concept
-import base64
-import os
 import uuid
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import make_password, check_password
+from django.db import transaction
 from .models import AuthSession, RefreshToken, Profile
-from audit.models import AuditLog
+from audit.writer import log_event
+from .refresh_hash import hash_refresh_secret, verify_refresh_secret
+from .services import issue_tokens, issue_tokens_bulk, TokenAlreadyRotated
+from .token_state import revoke_access_tokens
 import logging
 from django.utils import timezone
 from monitoring import metrics
@@ -41,13 +42,9 @@ class MeView(APIView):
         return Response(serializer.data)
 
 
-def generate_refresh_token_value():
-    token_id = uuid.uuid4().hex
-    secret = base64.urlsafe_b64encode(os.urandom(32)).decode("utf-8").rstrip("=")
-    return f"{token_id}.{secret}", token_id, secret
-
-
 class LoginView(APIView):
+    throttle_scope = "login"
+
     def post(self, request):
         identifier = request.data.get("identifier")
         password = request.data.get("password")
@@ -67,26 +64,14 @@ class LoginView(APIView):
             from .models import MFATOTPDevice
             if not MFATOTPDevice.objects.filter(user=user, confirmed=True).exists():
                 return Response({"detail": "Admin accounts require confirmed MFA device"}, status=403)
-        # create session
-        session = AuthSession.objects.create(user=user)
-        token_value, token_id, secret = generate_refresh_token_value()
-        token_hash = make_password(secret)
-        RefreshToken.objects.create(session=session, token_id=token_id, token_hash=token_hash)
+        # create session, refresh token and access token
+        issued = issue_tokens(user)
         # record metric: refresh token issued
         try:
             metrics.increment("refresh_token_issued")
         except Exception:
             logger.debug("metrics increment failed for refresh_token_issued")
-        # issue an access token (simple JTI-based token for POC)
-        access_jti = uuid.uuid4()
-        from .models import RevokedAccessToken
-        RevokedAccessToken.objects.create(jti=access_jti, session=session)
-        # sign access token with HMAC-SHA256
-        secret = getattr(__import__('django.conf').conf.settings, 'ACCESS_TOKEN_SECRET')
-        import hmac, hashlib
-        sig = hmac.new(secret.encode('utf-8'), str(access_jti).encode('utf-8'), hashlib.sha256).hexdigest()
-        access_token = f"{access_jti}.{sig}"
-        return Response({"access_token": access_token, "refresh_token": token_value})
+        return Response({"access_token": issued.access_token, "refresh_token": issued.refresh_token})
 
 
 class RefreshView(APIView):
@@ -109,55 +94,53 @@ class RefreshView(APIView):
         token = candidates.first()
         # If token already rotated, this may be reuse -> revoke session(s)
         if token.rotated:
-            # token reuse detected
-            # revoke all sessions for this user
-            sess = token.session
-            user = sess.user
-            AuthSession.objects.filter(user=user, revoked=False).update(revoked=True)
-            # revoke issued access tokens for the user
-            from .models import RevokedAccessToken
-            RevokedAccessToken.objects.filter(session__user=user, revoked=False).update(revoked=True, revoked_at=timezone.now())
-            # audit
-            ip = request.META.get('REMOTE_ADDR')
-            AuditLog.objects.create(user=user, action="refresh_token_reuse_detected", ip_address=ip, meta=f"token_id={token.token_id}")
-            try:
-                metrics.increment("refresh_token_reuse")
-            except Exception:
-                logger.debug("metrics increment failed for refresh_token_reuse")
-            logger.warning("Refresh token reuse detected", extra={"user_id": user.id, "token_id": str(token.token_id)})
-            return Response({"detail": "token reuse detected; sessions revoked"}, status=401)
+            return self._reuse_detected(request, token)
         # Ensure session not revoked already
         if token.session.revoked:
             return Response({"detail": "session revoked"}, status=401)
-        if not check_password(secret, token.token_hash):
+        matches, needs_upgrade = verify_refresh_secret(secret, token.token_hash)
+        if not matches:
             # possible token misuse: revoke session
             AuthSession.objects.filter(id=token.session.id, revoked=False).update(revoked=True)
             # revoke issued access tokens for the session
-            from .models import RevokedAccessToken
-            RevokedAccessToken.objects.filter(session=token.session, revoked=False).update(revoked=True, revoked_at=timezone.now())
+            revoke_access_tokens(session=token.session)
             ip = request.META.get('REMOTE_ADDR')
-            AuditLog.objects.create(user=token.session.user, action="invalid_refresh_token", ip_address=ip, meta=f"token_id={token.token_id}")
+            log_event("invalid_refresh_token", user=token.session.user, ip_address=ip, meta={"token_id": str(token.token_id)})
             try:
                 metrics.increment("invalid_refresh_token")
             except Exception:
                 logger.debug("metrics increment failed for invalid_refresh_token")
             logger.warning("Invalid refresh token used", extra={"user_id": token.session.user.id, "token_id": str(token.token_id)})
             return Response({"detail": "invalid token"}, status=401)
-        # rotate token: mark old as rotated and create a new token for same session
-        token.rotated = True
-        token.save()
-        new_token_value, new_token_id, new_secret = generate_refresh_token_value()
-        new_token_hash = make_password(new_secret)
-        RefreshToken.objects.create(session=token.session, token_id=new_token_id, token_hash=new_token_hash)
-        # issue signed access token
-        access_jti = uuid.uuid4()
-        from .models import RevokedAccessToken
-        RevokedAccessToken.objects.create(jti=access_jti, session=token.session)
-        secret = getattr(__import__('django.conf').conf.settings, 'ACCESS_TOKEN_SECRET')
-        import hmac, hashlib
-        sig = hmac.new(secret.encode('utf-8'), str(access_jti).encode('utf-8'), hashlib.sha256).hexdigest()
-        access_token = f"{access_jti}.{sig}"
-        return Response({"access_token": access_token, "refresh_token": new_token_value})
+        # rotate token: mark old as rotated and issue a new pair for the same session
+        if needs_upgrade:
+            # legacy PBKDF2 or retired-pepper hash: store it in the current format
+            token.token_hash = hash_refresh_secret(secret)
+        try:
+            issued = issue_tokens(token.session.user, session=token.session, rotate=token)
+        except TokenAlreadyRotated:
+            # a concurrent refresh with the same token won the rotation
+            return self._reuse_detected(request, token)
+        return Response({"access_token": issued.access_token, "refresh_token": issued.refresh_token})
+
+    @staticmethod
+    def _reuse_detected(request, token):
+        # token reuse detected
+        # revoke all sessions for this user
+        sess = token.session
+        user = sess.user
+        AuthSession.objects.filter(user=user, revoked=False).update(revoked=True)
+        # revoke issued access tokens for the user
+        revoke_access_tokens(session__user=user)
+        # audit
+        ip = request.META.get('REMOTE_ADDR')
+        log_event("refresh_token_reuse_detected", user=user, ip_address=ip, meta={"token_id": str(token.token_id)})
+        try:
+            metrics.increment("refresh_token_reuse")
+        except Exception:
+            logger.debug("metrics increment failed for refresh_token_reuse")
+        logger.warning("Refresh token reuse detected", extra={"user_id": user.id, "token_id": str(token.token_id)})
+        return Response({"detail": "token reuse detected; sessions revoked"}, status=401)
 
 
 class LogoutView(APIView):
@@ -181,6 +164,8 @@ class MagicLinkRequestView(APIView):
     For tests this returns the token in the response. In production, send email instead.
     """
 
+    throttle_scope = 'magic_link'
+
     def post(self, request):
         username = request.data.get('username')
         if not username:
@@ -225,20 +210,9 @@ class MagicLinkVerifyView(APIView):
         except User.DoesNotExist:
             return Response({'detail': 'user not found'}, status=404)
 
-        # create session and refresh token like LoginView
-        session = AuthSession.objects.create(user=user)
-        token_value, token_id, secret = generate_refresh_token_value()
-        token_hash = make_password(secret)
-        RefreshToken.objects.create(session=session, token_id=token_id, token_hash=token_hash)
-        # issue an access token
-        access_jti = uuid.uuid4()
-        from .models import RevokedAccessToken
-        RevokedAccessToken.objects.create(jti=access_jti, session=session)
-        secret_setting = getattr(__import__('django.conf').conf.settings, 'ACCESS_TOKEN_SECRET')
-        import hmac, hashlib
-        sig = hmac.new(secret_setting.encode('utf-8'), str(access_jti).encode('utf-8'), hashlib.sha256).hexdigest()
-        access_token = f"{access_jti}.{sig}"
-        return Response({"access_token": access_token, "refresh_token": token_value})
+        # create session and tokens like LoginView
+        issued = issue_tokens(user)
+        return Response({"access_token": issued.access_token, "refresh_token": issued.refresh_token})
 
 
 # Password reset endpoints
@@ -363,29 +337,54 @@ class QRLoginVerifyView(APIView):
         if qobj.expires_at and timezone.now() > qobj.expires_at:
             return Response({'detail': 'token expired'}, status=400)
 
-        # create session for user and mark token used
-        session = AuthSession.objects.create(user=qobj.user)
-        token_value, token_id, secret = generate_refresh_token_value()
-        token_hash = make_password(secret)
-        RefreshToken.objects.create(session=session, token_id=token_id, token_hash=token_hash)
-        access_jti = uuid.uuid4()
-        from .models import RevokedAccessToken
-        RevokedAccessToken.objects.create(jti=access_jti, session=session)
-        secret_setting = getattr(__import__('django.conf').conf.settings, 'ACCESS_TOKEN_SECRET')
-        import hmac, hashlib
-        sig = hmac.new(secret_setting.encode('utf-8'), str(access_jti).encode('utf-8'), hashlib.sha256).hexdigest()
-        access_token = f"{access_jti}.{sig}"
-
-        qobj.used = True
-        qobj.save()
+        # mark token used (conditionally, so two concurrent scans cannot both log in) and
+        # create the session in the same transaction
+        with transaction.atomic():
+            if not QRLoginToken.objects.filter(pk=qobj.pk, used=False).update(used=True):
+                return Response({'detail': 'token already used'}, status=400)
+            issued = issue_tokens(qobj.user)
 
         # audit
         try:
-            AuditLog.objects.create(user=qobj.user, action='qr.login_success', meta=str({'issued_by': qobj.issued_by_id}))
+            log_event('qr.login_success', user=qobj.user, meta={'issued_by': qobj.issued_by_id})
         except Exception:
             pass
 
-        return Response({'access_token': access_token, 'refresh_token': token_value})
+        return Response({'access_token': issued.access_token, 'refresh_token': issued.refresh_token})
+
+
+class KioskSessionIssueView(APIView):
+    """Admin endpoint to pre-issue login sessions for kiosk provisioning.
+
+    POST body: {"user_ids": [int, ...]}
+    Returns one access/refresh token pair per user, created with bulk inserts.
+    """
+    permission_classes = (IsAdminUser,)
+    MAX_USERS = 1000
+
+    def post(self, request):
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response({'detail': 'user_ids required'}, status=400)
+        if len(user_ids) > self.MAX_USERS:
+            return Response({'detail': f'at most {self.MAX_USERS} users per request'}, status=400)
+
+        from django.contrib.auth import get_user_model
+        try:
+            users = get_user_model().objects.in_bulk([int(u) for u in user_ids])
+        except (TypeError, ValueError):
+            return Response({'detail': 'invalid user_ids'}, status=400)
+        missing = sorted({int(u) for u in user_ids} - set(users))
+        if missing:
+            return Response({'detail': 'user not found', 'user_ids': missing}, status=404)
+
+        ordered = [users[uid] for uid in dict.fromkeys(int(u) for u in user_ids)]
+        issued = issue_tokens_bulk(ordered, device={'kiosk': True})
+        log_event('kiosk.sessions_issued', user=request.user, meta={'count': len(issued)})
+        return Response({'sessions': [
+            {'user_id': t.session.user_id, 'access_token': t.access_token, 'refresh_token': t.refresh_token}
+            for t in issued
+        ]}, status=201)
 
 
 class TrustedDeviceListCreateView(generics.ListCreateAPIView):
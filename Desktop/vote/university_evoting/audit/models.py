@@ -1,13 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class AuditLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     action = models.CharField(max_length=255)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    # JSON text written by audit.writer (older rows may hold a Python repr)
     meta = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # set when the event happens, not when a buffered batch is inserted
+    timestamp = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.timestamp} - {self.user}: {self.action}"
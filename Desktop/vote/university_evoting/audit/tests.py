@@ -15,3 +15,51 @@ class AuditAPITest(TestCase):
         resp = self.client.get("/api/audit/")
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(len(resp.data) >= 1)
+
+
+class AuditWriterTest(TestCase):
+    def setUp(self):
+        from unittest.mock import patch
+        from .writer import AuditWriter
+        self.writer = AuditWriter()
+        # flush explicitly instead of from the background thread
+        patcher = patch.object(AuditWriter, "_ensure_flusher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(username="aud", password="pass")
+
+    def test_sync_mode_writes_json_meta(self):
+        import json
+        self.writer.log("qr.scan", meta={"candidate": 3, "ip": "10.0.0.1"})
+        row = AuditLog.objects.get(action="qr.scan")
+        self.assertEqual(json.loads(row.meta), {"candidate": 3, "ip": "10.0.0.1"})
+
+    def test_buffered_events_are_bulk_inserted_with_event_time(self):
+        with self.settings(AUDIT_WRITER_MODE="buffered"):
+            first = self.writer.log("qr.scan", user=self.user, meta={"n": 1})
+            self.writer.log("qr.scan", meta={"n": 2})
+            self.assertEqual(self.writer.pending(), 2)
+            self.assertFalse(AuditLog.objects.filter(action="qr.scan").exists())
+            self.assertEqual(self.writer.flush(), 2)
+        rows = AuditLog.objects.filter(action="qr.scan").order_by("id")
+        self.assertEqual(rows.count(), 2)
+        self.assertEqual(rows[0].user, self.user)
+        self.assertEqual(rows[0].timestamp, first.timestamp)
+        self.assertEqual(self.writer.pending(), 0)
+
+    def test_durable_actions_bypass_the_buffer(self):
+        with self.settings(AUDIT_WRITER_MODE="buffered", AUDIT_DURABLE_ACTIONS=["invalid_refresh_token"]):
+            self.writer.log("invalid_refresh_token", user=self.user)
+            self.writer.log("poster.approved", user=self.user, durable=True)
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(AuditLog.objects.filter(user=self.user).count(), 2)
+
+    def test_failed_bulk_insert_falls_back_to_single_rows(self):
+        from unittest.mock import patch
+        with self.settings(AUDIT_WRITER_MODE="buffered"):
+            self.writer.log("ok.one")
+            self.writer.log("ok.two")
+            with patch.object(AuditLog.objects, "bulk_create", side_effect=RuntimeError("boom")):
+                written = self.writer.flush()
+        self.assertEqual(written, 2)
+        self.assertEqual(AuditLog.objects.filter(action__startswith="ok.").count(), 2)
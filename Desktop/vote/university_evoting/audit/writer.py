@@ -0,0 +1,149 @@
+"""Audit event writer.
+
+`log_event` is the entry point for audit records; `meta` is stored as JSON.
+
+With `AUDIT_WRITER_MODE = "buffered"` events are queued in process memory and a
+background thread bulk-inserts them every `AUDIT_FLUSH_INTERVAL_MS` or as soon as
+`AUDIT_FLUSH_BATCH_SIZE` events are waiting, taking the insert off the request path.
+Actions listed in `AUDIT_DURABLE_ACTIONS` (or calls with `durable=True`) are always
+written synchronously, inside the caller's transaction. In the default "sync" mode every
+event is written immediately.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from monitoring.metrics import increment, observe, set_gauge
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_meta(meta) -> str:
+    """Render audit metadata as JSON text (strings are stored unchanged)."""
+    if meta is None:
+        return ""
+    if isinstance(meta, str):
+        return meta
+    return json.dumps(meta, default=str, sort_keys=True)
+
+
+class AuditWriter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._atexit = False
+
+    @staticmethod
+    def _setting(name, default):
+        return getattr(settings, name, default)
+
+    def is_durable(self, action):
+        return action in self._setting("AUDIT_DURABLE_ACTIONS", ())
+
+    def log(self, action, user=None, meta=None, ip_address=None, durable=None):
+        """Record an audit event; returns the AuditLog (unsaved until flushed when buffered)."""
+        entry = AuditLog(
+            user_id=getattr(user, "pk", user),
+            action=action,
+            ip_address=ip_address,
+            meta=serialize_meta(meta),
+            timestamp=timezone.now(),
+        )
+        if durable is None:
+            durable = self.is_durable(action)
+        if durable or self._setting("AUDIT_WRITER_MODE", "sync") != "buffered":
+            entry.save()
+            return entry
+
+        with self._lock:
+            overflow = len(self._buffer) >= int(self._setting("AUDIT_MAX_QUEUE", 10000))
+            if not overflow:
+                self._buffer.append(entry)
+                depth = len(self._buffer)
+        if overflow:
+            # back-pressure: the flusher is behind, write this one inline rather than drop it
+            increment("audit_queue_overflow")
+            entry.save()
+            return entry
+        set_gauge("audit_queue_depth", depth)
+        self._ensure_flusher()
+        if depth >= int(self._setting("AUDIT_FLUSH_BATCH_SIZE", 200)):
+            self._wakeup.set()
+        return entry
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Bulk-insert everything queued so far; returns the number of events written."""
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        if not batch:
+            return 0
+        started = time.monotonic()
+        try:
+            AuditLog.objects.bulk_create(batch, batch_size=500)
+            written = len(batch)
+        except Exception:
+            # one bad row (e.g. a user deleted since enqueue) must not lose the whole batch
+            logger.exception("audit bulk insert failed; retrying %d events one by one", len(batch))
+            written = 0
+            for entry in batch:
+                try:
+                    entry.save()
+                    written += 1
+                except Exception:
+                    increment("audit_write_errors")
+                    logger.exception("audit event %s could not be written", entry.action)
+        observe("audit_flush_seconds", time.monotonic() - started)
+        set_gauge("audit_queue_depth", self.pending())
+        increment("audit_events_flushed", written)
+        return written
+
+    def _run(self):
+        interval = int(self._setting("AUDIT_FLUSH_INTERVAL_MS", 250)) / 1000.0
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("audit flush failed")
+            finally:
+                close_old_connections()
+
+    def _ensure_flusher(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            # (re)start after fork: the parent's thread does not exist in the child
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit:
+                atexit.register(self.flush)
+                self._atexit = True
+
+
+audit_writer = AuditWriter()
+
+
+def log_event(action, user=None, meta=None, ip_address=None, durable=None):
+    """Record an audit event through the process-wide AuditWriter."""
+    return audit_writer.log(action, user=user, meta=meta, ip_address=ip_address, durable=durable)
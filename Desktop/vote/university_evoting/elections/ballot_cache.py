@@ -0,0 +1,179 @@
+"""Versioned in-process cache of ballot definitions (election -> positions -> candidates).
+
+Each process keeps immutable snapshots of the elections it has served, indexed by
+election id, candidate id and candidate qr_slug, so resolving a candidate on the cast
+and QR-scan paths is a dict lookup. A shared version key in the cache (Redis in
+production) is bumped by the model signals on any admin edit; processes compare their
+snapshot version with it at most every `BALLOT_CACHE_CHECK_INTERVAL` seconds and drop
+everything when it changed.
+"""
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "elections:ballot_version"
+
+
+class _Snapshot:
+    """Read-only record; attributes are fixed once the snapshot is built."""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}: {self.name}>"
+
+
+class ElectionDef(_Snapshot):
+    __slots__ = ("id", "name", "description", "start_time", "end_time", "is_published", "positions")
+
+
+class PositionDef(_Snapshot):
+    __slots__ = ("id", "election_id", "name", "election", "candidates")
+
+
+class CandidateDef(_Snapshot):
+    __slots__ = ("id", "position_id", "election_id", "user_id", "name", "manifesto", "approved", "qr_slug", "position")
+
+
+def _build(election, positions, candidates):
+    """Build linked snapshots from model instances; returns the ElectionDef."""
+    edef = ElectionDef(
+        id=election.id, name=election.name, description=election.description,
+        start_time=election.start_time, end_time=election.end_time,
+        is_published=election.is_published, positions=(),
+    )
+    by_position = {}
+    for candidate in candidates:
+        by_position.setdefault(candidate.position_id, []).append(candidate)
+    pdefs = []
+    for position in positions:
+        pdef = PositionDef(id=position.id, election_id=election.id, name=position.name, election=edef, candidates=())
+        object.__setattr__(pdef, "candidates", tuple(
+            CandidateDef(
+                id=c.id, position_id=position.id, election_id=election.id, user_id=c.user_id,
+                name=c.name, manifesto=c.manifesto, approved=c.approved, qr_slug=c.qr_slug, position=pdef,
+            )
+            for c in by_position.get(position.id, ())
+        ))
+        pdefs.append(pdef)
+    object.__setattr__(edef, "positions", tuple(pdefs))
+    return edef
+
+
+class BallotCache:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._checked_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self._elections = {}
+        self._candidates = {}
+        self._slugs = {}
+        self._published = None
+
+    def _sync_version(self):
+        """Drop local snapshots if the shared version moved (throttled). Call with the lock held."""
+        interval = float(getattr(settings, "BALLOT_CACHE_CHECK_INTERVAL", 1.0))
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        if version != self._version:
+            self._reset()
+            self._version = version
+
+    def _load(self, election_id):
+        from .models import Election, Position, Candidate
+        election = Election.objects.filter(pk=election_id).first()
+        if election is None:
+            return None
+        positions = Position.objects.filter(election_id=election_id).order_by("id")
+        candidates = Candidate.objects.filter(position__election_id=election_id).order_by("id")
+        edef = _build(election, positions, candidates)
+        self._elections[edef.id] = edef
+        for pdef in edef.positions:
+            for cdef in pdef.candidates:
+                self._candidates[cdef.id] = cdef
+                self._slugs[str(cdef.qr_slug)] = cdef
+        return edef
+
+    def election(self, election_id):
+        """Return the ElectionDef for `election_id`, or None if it does not exist."""
+        with self._lock:
+            self._sync_version()
+            edef = self._elections.get(int(election_id))
+            return edef if edef is not None else self._load(int(election_id))
+
+    def candidate(self, candidate_id):
+        """Return the CandidateDef for `candidate_id`, or None if it does not exist."""
+        from .models import Candidate
+        with self._lock:
+            self._sync_version()
+            cdef = self._candidates.get(int(candidate_id))
+            if cdef is None:
+                election_id = Candidate.objects.filter(pk=candidate_id).values_list("position__election_id", flat=True).first()
+                if election_id is not None and self._load(election_id):
+                    cdef = self._candidates.get(int(candidate_id))
+            return cdef
+
+    def candidate_by_slug(self, qr_slug):
+        """Return the CandidateDef whose qr_slug is `qr_slug`, or None."""
+        from .models import Candidate
+        key = str(qr_slug)
+        with self._lock:
+            self._sync_version()
+            cdef = self._slugs.get(key)
+            if cdef is None:
+                try:
+                    election_id = Candidate.objects.filter(qr_slug=key).values_list("position__election_id", flat=True).first()
+                except Exception:
+                    election_id = None  # not a valid UUID
+                if election_id is not None and self._load(election_id):
+                    cdef = self._slugs.get(key)
+            return cdef
+
+    def published_elections(self):
+        """Return ElectionDefs of all published elections, ordered by id."""
+        from .models import Election
+        with self._lock:
+            self._sync_version()
+            if self._published is None:
+                self._published = tuple(Election.objects.filter(is_published=True).order_by("id").values_list("id", flat=True))
+            return [edef for edef in (self.election(eid) for eid in self._published) if edef is not None]
+
+    def _bump(self):
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._reset()
+            self._version = None
+
+    def invalidate(self):
+        """Invalidate snapshots in every process.
+
+        The version is bumped now and again after commit, so a process that reloads
+        between the two cannot keep data from before the edit.
+        """
+        self._bump()
+        transaction.on_commit(self._bump)
+
+
+ballot_cache = BallotCache()
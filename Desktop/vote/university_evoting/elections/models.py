@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 
 class Election(models.Model):
@@ -44,3 +46,15 @@ class Candidate(models.Model):
     def get_absolute_qr_url(self, site_root: str):
         """Return an absolute URL for the QR which voters can scan."""
         return site_root.rstrip("/") + self.get_qr_endpoint()
+
+
+# Any edit to the ballot structure invalidates the ballot-definition cache in all processes
+@receiver(post_save, sender=Election)
+@receiver(post_delete, sender=Election)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+def _invalidate_ballot_cache(sender, instance, **kwargs):
+    from .ballot_cache import ballot_cache
+    ballot_cache.invalidate()
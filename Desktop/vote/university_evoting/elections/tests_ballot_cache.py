@@ -0,0 +1,51 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from elections.ballot_cache import ballot_cache, VERSION_KEY
+from elections.models import Election, Position, Candidate
+
+
+class BallotCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.election = Election.objects.create(name="Cached", start_time=now, end_time=now + timedelta(days=1), is_published=True)
+        self.position = Position.objects.create(election=self.election, name="President")
+        self.alice = Candidate.objects.create(position=self.position, name="Alice", approved=True)
+        self.bob = Candidate.objects.create(position=self.position, name="Bob", approved=True)
+
+    def test_lookups_are_served_from_memory(self):
+        cdef = ballot_cache.candidate_by_slug(self.alice.qr_slug)
+        self.assertEqual(cdef.name, "Alice")
+        self.assertEqual(cdef.position.election.name, "Cached")
+        with self.assertNumQueries(0):
+            self.assertEqual(ballot_cache.candidate(self.bob.id).pk, self.bob.id)
+            self.assertEqual(ballot_cache.candidate_by_slug(str(self.bob.qr_slug)).name, "Bob")
+            self.assertEqual([p.name for p in ballot_cache.election(self.election.id).positions], ["President"])
+
+    def test_admin_edit_invalidates_snapshot(self):
+        self.assertEqual(ballot_cache.candidate(self.alice.id).name, "Alice")
+        self.alice.name = "Alice B."
+        self.alice.save()
+        self.assertEqual(ballot_cache.candidate(self.alice.id).name, "Alice B.")
+        bob_id = self.bob.id
+        self.bob.delete()
+        self.assertIsNone(ballot_cache.candidate(bob_id))
+
+    def test_version_change_from_other_process_is_picked_up(self):
+        ballot_cache.election(self.election.id)
+        Election.objects.filter(pk=self.election.pk).update(name="Renamed")  # no signal
+        cache.set(VERSION_KEY, "other-process-bump")
+        with self.settings(BALLOT_CACHE_CHECK_INTERVAL=0):
+            self.assertEqual(ballot_cache.election(self.election.id).name, "Renamed")
+
+    def test_snapshots_are_read_only(self):
+        cdef = ballot_cache.candidate(self.alice.id)
+        with self.assertRaises(AttributeError):
+            cdef.name = "Mallory"
+
+    def test_unknown_candidate(self):
+        self.assertIsNone(ballot_cache.candidate(999999))
+        self.assertIsNone(ballot_cache.candidate_by_slug("00000000-0000-0000-0000-000000000000"))
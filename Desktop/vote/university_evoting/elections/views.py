@@ -1,4 +1,6 @@
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from .ballot_cache import ballot_cache
 from .models import Election, Position
 from .serializers import ElectionSerializer, PositionSerializer
 
@@ -8,6 +10,11 @@ class ElectionListView(generics.ListAPIView):
     queryset = Election.objects.filter(is_published=True)
     serializer_class = ElectionSerializer
 
+    def list(self, request, *args, **kwargs):
+        # served from the ballot-definition cache rather than re-querying the nested structure
+        serializer = self.get_serializer(ballot_cache.published_elections(), many=True)
+        return Response(serializer.data)
+
 
 class PositionListView(generics.ListCreateAPIView):
     serializer_class = PositionSerializer
@@ -26,6 +33,11 @@ class PositionListView(generics.ListCreateAPIView):
         election_id = self.kwargs.get("election_id")
         return Position.objects.filter(election_id=election_id)
 
+    def list(self, request, *args, **kwargs):
+        election = ballot_cache.election(self.kwargs.get("election_id"))
+        serializer = self.get_serializer(election.positions if election else [], many=True)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         election_id = self.kwargs.get("election_id")
         election = generics.get_object_or_404(Election, id=election_id)
@@ -0,0 +1,201 @@
+"""GCRA rate limiting for the API (login, cast, QR verify, magic links, and defaults).
+
+Each limited key keeps a single number, its theoretical arrival time (TAT), instead of
+the request-history list DRF's SimpleRateThrottle reads and rewrites on every request.
+With Redis configured (`RATE_LIMIT_REDIS_URL`) the check-and-update is one atomic Lua
+script using the Redis clock, so every process shares the same limits. Without Redis,
+or while it is unreachable, an in-process limiter applies the same algorithm per process.
+
+Policies are "count/period" strings (period: s, m/min, h, d) keyed by scope in
+`RATE_LIMIT_POLICIES`; a policy allows `count` requests in a burst and then one every
+period/count. Views opt in with `throttle_scope`; other views fall back to the "user" and
+"anon" rates. `RateLimitHeadersMiddleware` reports the outcome as RateLimit-Limit,
+RateLimit-Remaining and RateLimit-Reset headers.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# limit: burst size; remaining: requests left now; retry_after / reset: seconds until the
+# next request is allowed / until the full burst is available again
+Decision = namedtuple("Decision", ["allowed", "limit", "remaining", "retry_after", "reset"])
+
+_PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+# KEYS[1] = key; ARGV = emission interval (ms), burst. Returns {allowed, remaining, retry_after_ms, reset_ms}.
+GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2]) * interval
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local used = tat + interval - now
+if used > capacity then
+  return {0, 0, used - capacity, tat - now}
+end
+redis.call('SET', KEYS[1], tat + interval, 'PX', used)
+return {1, math.floor((capacity - used) / interval), 0, used}
+"""
+
+
+def parse_rate(rate):
+    """Parse "count/period" into (count, period_seconds); None disables limiting."""
+    if not rate:
+        return None
+    count, _, period = str(rate).partition("/")
+    digits = "".join(ch for ch in period if ch.isdigit())
+    unit = period[len(digits):].strip().lower()
+    if unit not in _PERIODS:
+        raise ValueError(f"invalid rate {rate!r}")
+    return int(count), _PERIODS[unit] * int(digits or 1)
+
+
+def _gcra(tat, now, interval, burst):
+    """Pure GCRA step in ms: returns (new_tat or None when denied, allowed, remaining, retry_ms, reset_ms)."""
+    capacity = burst * interval
+    tat = max(tat if tat is not None else now, now)
+    used = tat + interval - now
+    if used > capacity:
+        return None, False, 0, used - capacity, tat - now
+    return tat + interval, True, int((capacity - used) // interval), 0, used
+
+
+class LocalLimiter:
+    """In-process GCRA state: one TAT per key in a bounded LRU."""
+
+    def __init__(self, max_keys=100000):
+        self._lock = threading.Lock()
+        self._tats = OrderedDict()
+        self.max_keys = max_keys
+
+    def hit(self, key, interval, burst):
+        now = time.time() * 1000
+        with self._lock:
+            new_tat, allowed, remaining, retry, reset = _gcra(self._tats.get(key), now, interval, burst)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+                while len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)
+        return allowed, remaining, retry, reset
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class RedisLimiter:
+    """Shared GCRA state in Redis, updated atomically by GCRA_LUA."""
+
+    def __init__(self, url):
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.25)
+        self._script = self._client.register_script(GCRA_LUA)
+
+    def hit(self, key, interval, burst):
+        allowed, remaining, retry, reset = self._script(keys=[key], args=[interval, burst])
+        return bool(allowed), int(remaining), int(retry), int(reset)
+
+
+class RateLimiter:
+    """Apply named policies, preferring Redis and falling back to the local limiter."""
+
+    def __init__(self):
+        self.local = LocalLimiter()
+        self._remote = None
+        self._remote_url = None
+        self._remote_down_until = 0.0
+
+    def _remote_limiter(self):
+        url = getattr(settings, "RATE_LIMIT_REDIS_URL", "")
+        if not url or redis is None or time.monotonic() < self._remote_down_until:
+            return None
+        if self._remote is None or self._remote_url != url:
+            self._remote, self._remote_url = RedisLimiter(url), url
+        return self._remote
+
+    def policy(self, scope):
+        """Return (count, period) for `scope`, or None when it is not limited."""
+        rate = getattr(settings, "RATE_LIMIT_POLICIES", {}).get(scope)
+        if rate is None:
+            rate = settings.REST_FRAMEWORK.get("DEFAULT_THROTTLE_RATES", {}).get(scope)
+        return parse_rate(rate)
+
+    def hit(self, scope, ident):
+        """Count one request by `ident` against `scope`; returns a Decision (None if unlimited)."""
+        policy = self.policy(scope)
+        if policy is None or not getattr(settings, "RATE_LIMIT_ENABLED", True):
+            return None
+        burst, period = policy
+        # whole milliseconds, as the Lua script works on the Redis clock in ms
+        interval = math.ceil(period * 1000 / burst)
+        key = f"rl:{scope}:{ident}"
+        remote = self._remote_limiter()
+        result = None
+        if remote is not None:
+            try:
+                result = remote.hit(key, interval, burst)
+            except Exception:
+                # limit locally for a while rather than paying a timeout per request
+                self._remote_down_until = time.monotonic() + float(getattr(settings, "RATE_LIMIT_REDIS_RETRY", 30))
+                logger.warning("rate limiter falling back to in-process state", exc_info=True)
+        if result is None:
+            result = self.local.hit(key, interval, burst)
+        allowed, remaining, retry_ms, reset_ms = result
+        return Decision(allowed, burst, remaining, retry_ms / 1000, reset_ms / 1000)
+
+
+limiter = RateLimiter()
+
+
+class GCRAThrottle(BaseThrottle):
+    """DRF throttle backed by `limiter`.
+
+    The scope is the view's `throttle_scope`, else "user" or "anon". Authenticated
+    requests are keyed by user id, others by client address (see BaseThrottle.get_ident).
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        user = getattr(request, "user", None)
+        authenticated = bool(user and user.is_authenticated)
+        if scope is None:
+            scope = "user" if authenticated else "anon"
+        ident = f"u{user.pk}" if authenticated else self.get_ident(request)
+        self.decision = limiter.hit(scope, ident)
+        if self.decision is None:
+            return True
+        # exposed as headers by RateLimitHeadersMiddleware
+        request._request.ratelimit = self.decision
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.retry_after if self.decision else None
+
+
+class RateLimitHeadersMiddleware:
+    """Add RateLimit-* headers for requests that went through GCRAThrottle."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        decision = getattr(request, "ratelimit", None)
+        if decision is not None:
+            response["RateLimit-Limit"] = str(decision.limit)
+            response["RateLimit-Remaining"] = str(decision.remaining)
+            response["RateLimit-Reset"] = str(math.ceil(decision.reset))
+        return response
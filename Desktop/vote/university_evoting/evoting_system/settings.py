@@ -86,6 +86,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # custom middleware for revocation checks
     "accounts.middleware.RevokedAccessTokenMiddleware",
+    # per-request memo of ABAC decisions
+    "abac.middleware.ABACRequestMemoMiddleware",
+    # RateLimit-* headers for throttled API views
+    "evoting_system.ratelimit.RateLimitHeadersMiddleware",
 ]
 
 # Session idle timeout (seconds). Default 30 minutes for MVP.
@@ -104,6 +108,12 @@ MIDDLEWARE.insert(2, "accounts.middleware.ContentSecurityPolicyMiddleware")
 # Add IP geolocation blocking middleware (runs early to catch blocked IPs)
 MIDDLEWARE.insert(1, "accounts.middleware.GeoBlockingMiddleware")
 
+# Opt-in per-middleware latency/query/cache histograms (monitoring.middleware_profiler); keep last
+MIDDLEWARE_PROFILING = os.environ.get("MIDDLEWARE_PROFILING", "False").lower() in ("1", "true", "yes")
+if MIDDLEWARE_PROFILING:
+    from monitoring.middleware_profiler import instrument
+    MIDDLEWARE = instrument(MIDDLEWARE)
+
 ROOT_URLCONF = "evoting_system.urls"
 
 TEMPLATES = [
@@ -152,8 +162,10 @@ CACHES = {
         "TIMEOUT": K_CACHE_TIMEOUT,
     }
 }
-# Use database sessions for better reliability (cache sessions can have timing issues)
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Sessions are read from the cache and written behind to the database (accounts.session_backend)
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "accounts.session_backend")
+# Seconds a session's database row may lag its cached copy when only last_activity changed
+SESSION_DB_WRITE_INTERVAL = int(os.environ.get("SESSION_DB_WRITE_INTERVAL", "300"))
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = []
@@ -224,6 +236,46 @@ VOTE_PUBLIC_KEY_FILE = "public_key.pem"
 # Tally signing key settings (used to sign encrypted payloads and verify signatures at tally time)
 TALLY_PRIVATE_KEY_FILE = "tally_sign_private.pem"
 TALLY_PUBLIC_KEY_FILE = "tally_sign_public.pem"
+# Seconds between stat() checks of a cached key file, so a rotated key is picked up without re-reading PEMs per cast
+VOTE_KEY_CACHE_STAT_INTERVAL = float(os.environ.get("VOTE_KEY_CACHE_STAT_INTERVAL", "1.0"))
+# Ballot encryption mode: "envelope" (AES-GCM under an RSA-wrapped data key) or "rsa" (legacy RSA-OAEP per ballot)
+VOTE_ENCRYPTION_MODE = os.environ.get("VOTE_ENCRYPTION_MODE", "envelope")
+# Ballots sealed under one data key before a casting process wraps a fresh one
+VOTE_DATA_KEY_MAX_BALLOTS = int(os.environ.get("VOTE_DATA_KEY_MAX_BALLOTS", "10000"))
+# Ballot signing: "ballot" (RSA-PSS per cast) or "batch" (unsigned at cast, sealed in Merkle batches by voting.tasks)
+VOTE_SIGNING_MODE = os.environ.get("VOTE_SIGNING_MODE", "ballot")
+VOTE_SIGNING_BATCH_SIZE = int(os.environ.get("VOTE_SIGNING_BATCH_SIZE", "500"))
+# Seconds a ballot must be old before it is sealed, so in-flight casts with lower ids are not skipped
+VOTE_SIGNING_LAG = int(os.environ.get("VOTE_SIGNING_LAG", "5"))
+# Audit pipeline (audit.writer): "sync" writes each event inline, "buffered" queues events
+# in process and bulk-inserts them from a background thread
+AUDIT_WRITER_MODE = os.environ.get("AUDIT_WRITER_MODE", "sync")
+AUDIT_FLUSH_INTERVAL_MS = int(os.environ.get("AUDIT_FLUSH_INTERVAL_MS", "250"))
+AUDIT_FLUSH_BATCH_SIZE = int(os.environ.get("AUDIT_FLUSH_BATCH_SIZE", "200"))
+AUDIT_MAX_QUEUE = int(os.environ.get("AUDIT_MAX_QUEUE", "10000"))
+# Security-critical actions that are always written synchronously, even when buffered
+AUDIT_DURABLE_ACTIONS = [
+    "qr.cast_success",
+    "qr.login_success",
+    "refresh_token_reuse_detected",
+    "invalid_refresh_token",
+]
+# Ledger checkpoints (ledger.services): ballots per LedgerEntry and how old (seconds) a
+# ballot must be before it is sealed, so in-flight casts with lower ids are not skipped
+LEDGER_CHECKPOINT_MAX_VOTES = int(os.environ.get("LEDGER_CHECKPOINT_MAX_VOTES", "5000"))
+LEDGER_CHECKPOINT_LAG = int(os.environ.get("LEDGER_CHECKPOINT_LAG", "5"))
+# Seconds between checks of the shared ballot-definition cache version (elections.ballot_cache)
+BALLOT_CACHE_CHECK_INTERVAL = float(os.environ.get("BALLOT_CACHE_CHECK_INTERVAL", "1.0"))
+# Seconds between checks of the shared compiled ABAC election-policy version (abac.policy.policy_store)
+ABAC_POLICY_CHECK_INTERVAL = float(os.environ.get("ABAC_POLICY_CHECK_INTERVAL", "1.0"))
+# Live turnout: casts increment sharded cache counters, flushed to TurnoutCount by beat
+VOTE_TURNOUT_CACHE = os.environ.get("VOTE_TURNOUT_CACHE", "default")
+VOTE_TURNOUT_SHARDS = int(os.environ.get("VOTE_TURNOUT_SHARDS", "8"))
+# Spike alert when the last WINDOW seconds run RATIO times faster than the BASELINE seconds before
+VOTE_TURNOUT_SPIKE_WINDOW = int(os.environ.get("VOTE_TURNOUT_SPIKE_WINDOW", "60"))
+VOTE_TURNOUT_SPIKE_BASELINE = int(os.environ.get("VOTE_TURNOUT_SPIKE_BASELINE", "900"))
+VOTE_TURNOUT_SPIKE_RATIO = float(os.environ.get("VOTE_TURNOUT_SPIKE_RATIO", "3.0"))
+VOTE_TURNOUT_SPIKE_MIN_VOTES = int(os.environ.get("VOTE_TURNOUT_SPIKE_MIN_VOTES", "50"))
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
@@ -235,6 +287,25 @@ LOGIN_URL = '/accounts/login/'
 
 # Access token signing secret (use a secure value in prod, e.g., from KMS)
 ACCESS_TOKEN_SECRET = os.environ.get("ACCESS_TOKEN_SECRET", "dev-access-secret")
+# Access token format: "v2" (stateless, signed claims) or "v1" (<jti>.<hmac>); both are accepted
+ACCESS_TOKEN_FORMAT = os.environ.get("ACCESS_TOKEN_FORMAT", "v2")
+# Lifetime (seconds) of v2 access tokens; also the window of the revocation Bloom filter
+ACCESS_TOKEN_TTL = int(os.environ.get("ACCESS_TOKEN_TTL", "900"))
+# Target false-positive rate of the revocation Bloom filter (hits are confirmed in token_state)
+REVOCATION_BLOOM_FP_RATE = float(os.environ.get("REVOCATION_BLOOM_FP_RATE", "0.0001"))
+# Refresh-token hashing (accounts.refresh_hash): HMAC pepper and its id; retired peppers
+# stay verifiable via REFRESH_TOKEN_OLD_PEPPERS="id:pepper,id:pepper". Unset, SECRET_KEY is the pepper
+REFRESH_TOKEN_PEPPER = os.environ.get("REFRESH_TOKEN_PEPPER", "")
+REFRESH_TOKEN_PEPPER_ID = os.environ.get("REFRESH_TOKEN_PEPPER_ID", "1")
+REFRESH_TOKEN_OLD_PEPPERS = dict(
+    item.split(":", 1) for item in os.environ.get("REFRESH_TOKEN_OLD_PEPPERS", "").split(",") if ":" in item
+)
+# Access-token state cache (accounts.token_state): shared-cache TTL, per-process TTL/size,
+# and how often (seconds) each process checks the shared revocation version
+TOKEN_STATE_TTL = int(os.environ.get("TOKEN_STATE_TTL", "3600"))
+TOKEN_STATE_LOCAL_TTL = int(os.environ.get("TOKEN_STATE_LOCAL_TTL", "60"))
+TOKEN_STATE_LOCAL_MAX = int(os.environ.get("TOKEN_STATE_LOCAL_MAX", "10000"))
+TOKEN_STATE_VERSION_INTERVAL = float(os.environ.get("TOKEN_STATE_VERSION_INTERVAL", "1.0"))
 
 # REST framework: add our JTI authentication backend
 REST_FRAMEWORK = {
@@ -243,19 +314,33 @@ REST_FRAMEWORK = {
         "accounts.authentication.JTIAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
+        "evoting_system.ratelimit.GCRAThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "user": os.environ.get("THROTTLE_USER_RATE", "200/min"),
         "anon": os.environ.get("THROTTLE_ANON_RATE", "50/min"),
     },
 }
+# Per-endpoint GCRA policies ("count/period") for views with a throttle_scope (evoting_system.ratelimit)
+RATE_LIMIT_POLICIES = {
+    "login": os.environ.get("RATE_LIMIT_LOGIN", "10/min"),
+    "magic_link": os.environ.get("RATE_LIMIT_MAGIC_LINK", "5/min"),
+    "cast": os.environ.get("RATE_LIMIT_CAST", "30/min"),
+    "qr_verify": os.environ.get("RATE_LIMIT_QR_VERIFY", "60/min"),
+}
+# Redis holding shared limiter state; empty limits per process only
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", REDIS_URL)
+# Seconds to limit in-process after Redis errors before trying it again
+RATE_LIMIT_REDIS_RETRY = float(os.environ.get("RATE_LIMIT_REDIS_RETRY", "30"))
+# Master switch, e.g. for bulk verification scripts run against a staging copy
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "True").lower() in ("1", "true", "yes")
 
 # Celery configuration
 CELERY_BROKER_URL = CELERY_BROKER_URL
 CELERY_RESULT_BACKEND = CELERY_RESULT_BACKEND
 CELERY_TASK_DEFAULT_QUEUE = "default"
+# project-level tasks live outside INSTALLED_APPS, so autodiscovery does not find them
+CELERY_IMPORTS = ("evoting_system.tasks",)
 CELERY_TASK_ROUTES = {
     "evoting_system.tasks.send_otp_email": {"queue": "otp"},
     "evoting_system.tasks.send_otp_sms": {"queue": "otp"},
@@ -285,7 +370,20 @@ CELERY_BEAT_SCHEDULE = {
         "task": "evoting_system.tasks.run_security_monitor_task",
         "schedule": 600.0,
     },
+    "ledger-checkpoints": {
+        "task": "ledger.tasks.checkpoint_ledgers",
+        "schedule": 60.0,
+    },
+    "flush-turnout-counters": {
+        "task": "evoting_system.tasks.update_turnout_counter",
+        "schedule": 10.0,
+    },
 }
+if VOTE_SIGNING_MODE == "batch":
+    CELERY_BEAT_SCHEDULE["seal-ballot-batches"] = {
+        "task": "voting.tasks.seal_ballot_batches",
+        "schedule": 60.0,
+    }
 
 # Sentry (optional)
 SENTRY_DSN = os.environ.get("SENTRY_DSN")
@@ -319,6 +417,8 @@ else:
 
 # Site URL for QR generation and absolute links
 SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+# zlib level for generated poster PNGs (posters.services); 3 encodes faster than PIL's default 6 at some cost in file size
+POSTER_PNG_COMPRESS_LEVEL = int(os.environ.get('POSTER_PNG_COMPRESS_LEVEL', '3'))
 
 # Optional Sentry integration (legacy block kept for safety)
 if SENTRY_DSN and sentry_sdk and DjangoIntegration:
@@ -355,6 +455,8 @@ if DEBUG:
 
 # Session security
 SESSION_IDLE_TIMEOUT = int(os.environ.get('SESSION_IDLE_TIMEOUT', '1800'))  # 30 minutes default
+# Seconds last_activity must move before the session is rewritten (idle expiry may be this much early)
+SESSION_ACTIVITY_GRANULARITY = int(os.environ.get('SESSION_ACTIVITY_GRANULARITY', '60'))
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'True' if DJANGO_SECURE else 'False').lower() in ('1','true','yes')
 CSRF_COOKIE_SECURE = os.environ.get('CSRF_COOKIE_SECURE', 'True' if DJANGO_SECURE else 'False').lower() in ('1','true','yes')
@@ -421,4 +523,15 @@ IP_BLOCKING_EXCLUDED_PATHS = [
     '/api/password/reset/',  # Password reset APIs
     '/accounts/password-reset/',  # Password reset pages
     '/__debug__/',  # Django debug toolbar
-]
\ No newline at end of file
+]
+
+# Country codes to refuse, and (if set) the only countries allowed, e.g. "KP,IR"
+IP_BLOCKING_BLOCKED_COUNTRIES = [c.strip() for c in os.environ.get('IP_BLOCKING_BLOCKED_COUNTRIES', '').split(',') if c.strip()]
+IP_BLOCKING_ALLOWED_COUNTRIES = [c.strip() for c in os.environ.get('IP_BLOCKING_ALLOWED_COUNTRIES', '').split(',') if c.strip()]
+
+# IP-range index built by `manage.py build_geoip_index` (accounts.geoip); empty disables lookups
+GEOIP_INDEX_PATH = os.environ.get('GEOIP_INDEX_PATH', '')
+# Seconds between checks of the index file for a rebuilt version
+GEOIP_RELOAD_INTERVAL = float(os.environ.get('GEOIP_RELOAD_INTERVAL', '5'))
+# Recently looked-up addresses kept per process
+GEOIP_LRU_SIZE = int(os.environ.get('GEOIP_LRU_SIZE', '4096'))
\ No newline at end of file
@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.utils import timezone
+from evoting_system.celery import app
+
+
+@app.task
+def update_turnout_counter():
+    """Flush sharded live turnout counters into TurnoutCount rows for open (or just closed) elections."""
+    from elections.models import Election
+    from voting.turnout import flush
+
+    now = timezone.now()
+    moved = 0
+    for election in Election.objects.filter(start_time__lte=now, end_time__gte=now - timedelta(hours=1)):
+        moved += flush(election)
+    return {'flushed_votes': moved}
+
+
+@app.task
+def notify_voting_spike(election_id, rate, baseline_rate):
+    """Record a cast-rate spike detected by voting.turnout.SpikeDetector."""
+    from audit.writer import log_event
+    from monitoring.metrics import increment, capture_message
+
+    meta = {'election': election_id, 'rate_per_sec': round(rate, 2), 'baseline_per_sec': round(baseline_rate, 2)}
+    log_event('turnout.spike', meta=meta, durable=True)
+    increment('voting_spike')
+    capture_message(f"Voting spike in election {election_id}: {meta['rate_per_sec']}/s vs {meta['baseline_per_sec']}/s baseline")
+    return meta
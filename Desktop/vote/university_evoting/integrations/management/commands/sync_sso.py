@@ -1,64 +1,66 @@
 from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from integrations.sso import DummySSOAdapter
-from accounts.models import Profile
-import json
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from integrations.models import ExternalIntegration
+from integrations.sso import get_adapter, user_updated_at
+from accounts.importer import UserImporter
+
+WATERMARK_KEY = "sso_watermark"
 
 
 class Command(BaseCommand):
     help = "Sync users from the configured SSO adapter into local User/Profile models"
 
     def add_arguments(self, parser):
-        parser.add_argument("--adapter", default="dummy", help="Adapter name to use (dummy)")
+        parser.add_argument("--adapter", default="dummy", help="Adapter name to use (dummy, file)")
+        parser.add_argument("--path", help="Roster file for the file adapter")
+        parser.add_argument("--integration", default="sso", help="ExternalIntegration whose config holds the sync watermark")
+        parser.add_argument("--full", action="store_true", help="Ignore the watermark and sync every identity")
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=1, help="Pages fetched concurrently (adapters with known page cursors)")
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Users written per batch")
 
     def handle(self, *args, **options):
         adapter_name = options.get("adapter")
         dry = options.get("dry_run")
-        if adapter_name == "dummy":
-            adapter = DummySSOAdapter()
-        else:
-            raise ValueError("Unknown adapter")
+        adapter_options = {"path": options["path"]} if adapter_name == "file" else {}
+        adapter = get_adapter(adapter_name, **adapter_options)
+
+        integration = ExternalIntegration.objects.filter(name=options["integration"]).first()
+        config = dict(integration.config or {}) if integration else {}
+        since = None if options["full"] else parse_datetime(config.get(WATERMARK_KEY) or "")
+        newest = [since]
+
+        def users():
+            for page in adapter.iter_pages(since=since, page_size=options["page_size"], workers=options["workers"]):
+                for user in page.users:
+                    changed = user_updated_at(user)
+                    if changed is not None and (newest[0] is None or changed > newest[0]):
+                        newest[0] = changed
+                    yield user
 
-        User = get_user_model()
-        created = 0
-        updated = 0
-        for u in adapter.fetch_users():
-            username = u.get("username")
-            email = u.get("email")
-            student_id = u.get("student_id")
-            role = u.get("role", "student")
-            campus = u.get("campus", "")
-            faculty = u.get("faculty", "")
-            attributes = u.get("attributes", {}) or {}
+        # SSO is the source of truth: existing users (matched by username) are always updated
+        importer = UserImporter(
+            update_existing=True,
+            dry_run=dry,
+            chunk_size=options["chunk_size"],
+            match_student_id=False,
+            progress=lambda stats: self.stdout.write(f"{stats.rows} users ({stats.rows_per_second:.0f} users/s)"),
+        )
+        stats = importer.run(users())
 
-            existing = User.objects.filter(username=username).first()
-            if existing and not dry:
-                p = getattr(existing, 'profile', None)
-                if not p:
-                    p = Profile.objects.create(user=existing, student_id=student_id, role=role, campus=campus, faculty=faculty, attributes=attributes)
-                else:
-                    p.student_id = student_id or p.student_id
-                    p.role = role or p.role
-                    p.campus = campus or p.campus
-                    p.faculty = faculty or p.faculty
-                    p.attributes.update(attributes)
-                    p.save()
-                # invalidate ABAC cache for this profile
-                try:
-                    from abac.policy import invalidate_profile_cache
-                    invalidate_profile_cache(existing.id)
-                except Exception:
-                    pass
-                updated += 1
-            elif not existing and not dry:
-                user = User.objects.create_user(username=username, email=email)
-                user.set_unusable_password()
-                user.save()
-                Profile.objects.create(user=user, student_id=student_id, role=role, campus=campus, faculty=faculty, attributes=attributes)
-                # invalidate ABAC cache for this profile
-                try:
-                    from abac.policy import invalidate_profile_cache
-                    invalidate_profile_cache(user.id)
-                except Exception:
-                    pass
+        # advance the watermark only after every page was applied
+        if not dry and newest[0] is not None and newest[0] != since:
+            config[WATERMARK_KEY] = newest[0].isoformat()
+            config["sso_last_sync"] = timezone.now().isoformat()
+            if integration is None:
+                ExternalIntegration.objects.create(name=options["integration"], config=config)
+            else:
+                integration.config = config
+                integration.save(update_fields=["config"])
+        self.stdout.write(self.style.SUCCESS(
+            f"SSO sync complete{' (changes since ' + since.isoformat() + ')' if since else ''}: "
+            f"created={stats.created} updated={stats.updated} "
+            f"({stats.rows} users in {stats.seconds:.1f}s, {stats.rows_per_second:.0f} users/s)"
+        ))
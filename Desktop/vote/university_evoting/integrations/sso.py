@@ -3,17 +3,93 @@
 Provide an adapter interface for integrating with University SSO (SAML/LDAP/OIDC).
 This is a lightweight POC adapter that can be extended to call real SSO endpoints or
 plug into cloud identity providers.
+
+Adapters return users in pages: `fetch_page(cursor, since, page_size)` returns a Page of
+user dicts plus the cursor of the next page (None on the last one). `since` is a
+"changed since" watermark; adapters that can filter on it return only identities whose
+`updated_at` is at or after it, so a nightly sync touches only what changed (identities
+stamped exactly at the watermark are applied again, which is harmless, rather than
+missed). Adapters that can compute every page cursor up front (`page_cursors`) can have
+their pages fetched concurrently. Adapters that only implement `fetch_users` get
+offset-based pages over the roster, which is fetched and filtered once per sync.
 """
-from typing import Iterable, Dict
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Dict, Optional
+
+from django.utils.dateparse import parse_datetime
+
+Page = namedtuple("Page", ["users", "next_cursor"])
+
+
+def user_updated_at(user) -> Optional[datetime]:
+    """Return the record's updated_at as a datetime, or None if it has none."""
+    value = user.get("updated_at")
+    if isinstance(value, datetime):
+        return value
+    return parse_datetime(value) if value else None
+
+
+def changed_since(users, since: Optional[datetime]):
+    """Filter users to those updated at or after `since`; users without updated_at always pass."""
+    if since is None:
+        return list(users)
+    return [u for u in users if user_updated_at(u) is None or user_updated_at(u) >= since]
 
 
 class BaseSSOAdapter:
     """Base class to implement for specific SSO providers."""
 
     def fetch_users(self) -> Iterable[Dict]:
-        """Yield user dicts with fields: username, email, student_id, role, campus, faculty, attributes"""
+        """Yield user dicts with fields: username, email, student_id, role, campus, faculty, attributes
+        and optionally updated_at (ISO 8601)."""
         raise NotImplementedError
 
+    def changed_users(self, since: Optional[datetime] = None):
+        """Return `fetch_users()` filtered by `since`, fetched once per sync (see iter_pages)."""
+        roster = getattr(self, "_roster", None)
+        if roster is None or roster[0] != since:
+            roster = self._roster = (since, changed_since(self.fetch_users(), since))
+        return roster[1]
+
+    def fetch_page(self, cursor=None, since: Optional[datetime] = None, page_size: int = 500) -> Page:
+        """Return one page of users changed at or after `since` (all users when None).
+
+        The default pages over `changed_users(since)` with an integer offset cursor.
+        """
+        offset = int(cursor or 0)
+        users = self.changed_users(since)
+        page = users[offset:offset + page_size]
+        return Page(page, offset + page_size if offset + page_size < len(users) else None)
+
+    def page_cursors(self, since: Optional[datetime] = None, page_size: int = 500):
+        """Return the cursors of all pages if they can be known up front, else None."""
+        return None
+
+    def iter_pages(self, since: Optional[datetime] = None, page_size: int = 500, workers: int = 1):
+        """Yield Pages in order, fetching up to `workers` pages concurrently when possible."""
+        # every sync starts from a fresh roster
+        self._roster = None
+        cursors = self.page_cursors(since, page_size) if workers > 1 else None
+        if cursors is None:
+            cursor = None
+            while True:
+                page = self.fetch_page(cursor, since, page_size)
+                yield page
+                if page.next_cursor is None:
+                    return
+                cursor = page.next_cursor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            cursors = iter(cursors)
+            pending = [pool.submit(self.fetch_page, c, since, page_size) for c in islice(cursors, workers * 2)]
+            while pending:
+                page = pending.pop(0).result()
+                pending.extend(pool.submit(self.fetch_page, c, since, page_size) for c in islice(cursors, 1))
+                yield page
+
 
 class DummySSOAdapter(BaseSSOAdapter):
     """A dummy adapter for testing/dev that yields sample users."""
@@ -23,6 +99,48 @@ class DummySSOAdapter(BaseSSOAdapter):
         yield {"username": "sso_bob", "email": "sso_bob@example.com", "student_id": "SSO02", "role": "student", "campus": "East", "faculty": "Arts"}
 
 
+class FileSSOAdapter(BaseSSOAdapter):
+    """Local stand-in for a directory API: a JSON array (or JSON Lines) file of user dicts.
+
+    Records should carry `updated_at` so delta syncs can be exercised; pages are offsets
+    into the filtered roster, so all page cursors are known up front.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._users = None
+
+    def fetch_users(self):
+        if self._users is None:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+            if text.lstrip().startswith("["):
+                users = json.loads(text)
+            else:
+                users = [json.loads(line) for line in text.splitlines() if line.strip()]
+            # stable order so offset cursors address the same records on every call
+            self._users = sorted(users, key=lambda u: (str(u.get("updated_at") or ""), str(u.get("username") or "")))
+        return iter(self._users)
+
+    def page_cursors(self, since=None, page_size=500):
+        return list(range(0, len(self.changed_users(since)), page_size)) or [0]
+
+
+ADAPTERS = {
+    "dummy": DummySSOAdapter,
+    "file": FileSSOAdapter,
+}
+
+
+def get_adapter(name, **options):
+    """Instantiate the adapter registered as `name` with `options`."""
+    try:
+        adapter_class = ADAPTERS[name]
+    except KeyError:
+        raise ValueError("Unknown adapter")
+    return adapter_class(**options)
+
+
 # small helper to support SSO login stub
 class DummySSOAdapterClient:
     def __init__(self, adapter: BaseSSOAdapter | None = None):
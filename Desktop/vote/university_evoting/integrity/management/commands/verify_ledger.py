@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import get_object_or_404
+from elections.models import Election
+from integrity.verifier import verify_ledger
+
+
+class Command(BaseCommand):
+    help = "Verify an election's ledger incrementally from the last successful check"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument("--full", action="store_true", help="Re-verify the whole chain from genesis")
+
+    def handle(self, *args, **options):
+        election = get_object_or_404(Election, id=options["election_id"])
+        record, problems = verify_ledger(election, full=options.get("full"))
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(f"  entry {problem['sequence']}: {problem['problem']}"))
+        if problems:
+            raise CommandError(f"Ledger verification failed for election {election.id} (record {record.id})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Ledger verified through entry {record.last_sequence} for election {election.id} ({record.votes_checked} new ballots checked)"
+        ))
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationrecord',
+            name='last_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='verificationrecord',
+            name='last_entry_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='verificationrecord',
+            name='votes_checked',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
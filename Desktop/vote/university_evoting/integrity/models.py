@@ -6,6 +6,10 @@ class VerificationRecord(models.Model):
     election = models.ForeignKey(Election, on_delete=models.CASCADE)
     verified = models.BooleanField(default=False)
     report_hash = models.CharField(max_length=256, blank=True)
+    # ledger position this check reached; the next incremental check resumes after it
+    last_sequence = models.PositiveIntegerField(default=0)
+    last_entry_hash = models.CharField(max_length=64, blank=True)
+    votes_checked = models.PositiveIntegerField(default=0)
     checked_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from elections.models import Election, Position, Candidate
+from integrity.models import VerificationRecord
+from integrity.verifier import verify_ledger
+from ledger.models import LedgerEntry
+from ledger.services import append_checkpoints, GENESIS_HASH
+from voting.models import EncryptedVote
+
+
+@override_settings(LEDGER_CHECKPOINT_LAG=0, LEDGER_CHECKPOINT_MAX_VOTES=3)
+class LedgerTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(name="Ledger", start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1))
+        self.position = Position.objects.create(election=self.election, name="P")
+        self.candidate = Candidate.objects.create(position=self.position, name="C")
+
+    def _cast(self, n):
+        return [
+            EncryptedVote.objects.create(election=self.election, position=self.position, candidate=self.candidate, encrypted_payload=f"ct-{i}")
+            for i in range(n)
+        ]
+
+    def test_checkpoints_form_a_chain(self):
+        self._cast(7)
+        entries = append_checkpoints(self.election)
+        self.assertEqual([e.vote_count for e in entries], [3, 3, 1])
+        self.assertEqual(entries[0].prev_hash, GENESIS_HASH)
+        self.assertEqual(entries[1].prev_hash, entries[0].entry_hash)
+        self.assertEqual(append_checkpoints(self.election), [])
+        record, problems = verify_ledger(self.election)
+        self.assertEqual(problems, [])
+        self.assertEqual((record.last_sequence, record.votes_checked), (3, 7))
+
+    def test_verification_is_incremental(self):
+        self._cast(3)
+        append_checkpoints(self.election)
+        verify_ledger(self.election)
+        self._cast(2)
+        append_checkpoints(self.election)
+        record, problems = verify_ledger(self.election)
+        self.assertEqual(problems, [])
+        self.assertEqual((record.last_sequence, record.votes_checked), (2, 2))
+
+    def test_tampered_ballot_is_detected(self):
+        votes = self._cast(5)
+        append_checkpoints(self.election)
+        EncryptedVote.objects.filter(pk=votes[4].pk).update(encrypted_payload="forged")
+        record, problems = verify_ledger(self.election, full=True)
+        self.assertFalse(record.verified)
+        self.assertEqual(problems, [{"sequence": 2, "problem": "ballots differ from sealed root"}])
+        self.assertEqual(record.last_sequence, 1)
+
+    def test_rewritten_entry_after_verification_is_detected(self):
+        self._cast(3)
+        append_checkpoints(self.election)
+        verify_ledger(self.election)
+        LedgerEntry.objects.filter(election=self.election, sequence=1).update(entry_hash="f" * 64)
+        record, problems = verify_ledger(self.election)
+        self.assertEqual(problems[0]["problem"], "previously verified entry changed")
+        self.assertEqual(VerificationRecord.objects.filter(election=self.election, verified=False).count(), 1)
+
+    def test_recent_ballots_wait_for_lag(self):
+        self._cast(2)
+        with self.settings(LEDGER_CHECKPOINT_LAG=60):
+            self.assertEqual(append_checkpoints(self.election), [])
@@ -0,0 +1,70 @@
+"""Incremental verification of the ballot ledger (ledger.services).
+
+Each run resumes from the last successful VerificationRecord: it checks that the entry
+it ended on is unchanged, then re-derives only the entries sealed since — the chain
+link, the entry hash and the Merkle root recomputed from the ballots in the entry's
+range. Cost is proportional to the ballots sealed since the previous run; pass
+`full=True` to re-derive the whole chain from genesis.
+"""
+import hashlib
+import json
+
+from ledger.models import LedgerEntry
+from ledger.services import GENESIS_HASH, entry_hash, range_root
+from .models import VerificationRecord
+
+
+def verify_ledger(election, full=False):
+    """Verify `election`'s ledger; returns (VerificationRecord, problems)."""
+    start = None
+    if not full:
+        start = (
+            VerificationRecord.objects.filter(election=election, verified=True)
+            .order_by("-last_sequence", "-id")
+            .first()
+        )
+    sequence = start.last_sequence if start else 0
+    prev_hash = start.last_entry_hash if start and sequence else GENESIS_HASH
+    after_vote_id = 0
+    problems = []
+    if sequence:
+        anchor = LedgerEntry.objects.filter(election=election, sequence=sequence).first()
+        if anchor is None or anchor.entry_hash != prev_hash:
+            problems.append({"sequence": sequence, "problem": "previously verified entry changed"})
+        else:
+            after_vote_id = anchor.last_vote_id
+
+    votes = 0
+    if not problems:
+        for entry in LedgerEntry.objects.filter(election=election, sequence__gt=sequence).order_by("sequence").iterator():
+            sequence += 1
+            issues = []
+            if entry.sequence != sequence:
+                issues.append("sequence gap")
+            if entry.prev_hash != prev_hash:
+                issues.append("chain link broken")
+            # every ballot after the previous entry up to this one must be exactly the sealed set
+            root_hex, count, first_id = range_root(election.pk, after_vote_id, entry.last_vote_id)
+            if root_hex != entry.merkle_root or count != entry.vote_count or first_id != entry.first_vote_id:
+                issues.append("ballots differ from sealed root")
+            expected = entry_hash(election.pk, entry.sequence, entry.first_vote_id, entry.last_vote_id, entry.vote_count, entry.merkle_root, entry.prev_hash)
+            if expected != entry.entry_hash:
+                issues.append("entry hash mismatch")
+            if issues:
+                problems.extend({"sequence": entry.sequence, "problem": issue} for issue in issues)
+                break
+            prev_hash, after_vote_id = entry.entry_hash, entry.last_vote_id
+            votes += count
+        if problems:
+            sequence -= 1
+
+    report = {"election": election.pk, "through_sequence": sequence, "votes_checked": votes, "problems": problems}
+    record = VerificationRecord.objects.create(
+        election=election,
+        verified=not problems,
+        report_hash=hashlib.sha256(json.dumps(report, sort_keys=True).encode("utf-8")).hexdigest(),
+        last_sequence=sequence,
+        last_entry_hash=prev_hash if sequence else "",
+        votes_checked=votes,
+    )
+    return record, problems
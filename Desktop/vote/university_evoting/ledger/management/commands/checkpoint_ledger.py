@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.shortcuts import get_object_or_404
+from elections.models import Election
+from ledger.services import append_checkpoints
+
+
+class Command(BaseCommand):
+    help = "Append hash-chained Merkle checkpoints for an election's unsealed ballots"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument("--max-votes", type=int, default=None, help="Ballots per checkpoint (default LEDGER_CHECKPOINT_MAX_VOTES)")
+
+    def handle(self, *args, **options):
+        election = get_object_or_404(Election, id=options["election_id"])
+        entries = append_checkpoints(election, max_votes=options.get("max_votes"))
+        sealed = sum(e.vote_count for e in entries)
+        self.stdout.write(self.style.SUCCESS(f"Appended {len(entries)} ledger entries ({sealed} ballots) for election {election.id}"))
@@ -3,9 +3,24 @@ from elections.models import Election
 
 
 class LedgerEntry(models.Model):
+    """One checkpoint in an election's append-only hash chain.
+
+    Covers the ballots with ids in [first_vote_id, last_vote_id]: `merkle_root` is the root
+    over their leaf digests and `entry_hash` commits to it and to the previous entry's
+    hash, so rewriting any sealed ballot or entry breaks every later link.
+    """
     election = models.ForeignKey(Election, on_delete=models.CASCADE)
+    sequence = models.PositiveIntegerField(default=0)
+    first_vote_id = models.BigIntegerField(default=0)
+    last_vote_id = models.BigIntegerField(default=0)
+    vote_count = models.PositiveIntegerField(default=0)
+    merkle_root = models.CharField(max_length=64, blank=True)
+    prev_hash = models.CharField(max_length=64, blank=True)
     entry_hash = models.CharField(max_length=256)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        unique_together = ("election", "sequence")
+
     def __str__(self):
-        return f"LedgerEntry {self.election} @ {self.timestamp}"
+        return f"LedgerEntry {self.election} #{self.sequence} @ {self.timestamp}"
@@ -0,0 +1,92 @@
+"""Append-only ballot ledger.
+
+`append_checkpoints` seals ballots not yet covered by the ledger into LedgerEntry rows.
+Each entry carries the Merkle root over its ballots' leaf digests (the same leaves as
+voting.batch_signing) and an entry_hash chained to the previous entry, so sealing costs
+one pass over new ballots and rewriting any sealed ballot or entry breaks the chain.
+
+Ballots younger than `LEDGER_CHECKPOINT_LAG` seconds are left for the next run, so a
+cast still committing with a lower id is never stepped over.
+"""
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from voting.batch_signing import leaf_digest, merkle_root
+from .models import LedgerEntry
+
+GENESIS_HASH = "0" * 64
+
+
+def entry_hash(election_id, sequence, first_vote_id, last_vote_id, vote_count, root_hex, prev_hash) -> str:
+    message = f"{prev_hash}:{election_id}:{sequence}:{first_vote_id}:{last_vote_id}:{vote_count}:{root_hex}"
+    return hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+
+def range_root(election_id, after_vote_id, last_vote_id):
+    """Merkle root (hex), ballot count and first id of an election's ballots with after < id <= last."""
+    from voting.models import EncryptedVote
+    rows = (
+        EncryptedVote.objects.filter(election_id=election_id, id__gt=after_vote_id, id__lte=last_vote_id)
+        .order_by("id")
+        .values_list("id", "encrypted_payload")
+    )
+    leaves = []
+    first_id = None
+    for vote_id, payload in rows.iterator():
+        if first_id is None:
+            first_id = vote_id
+        leaves.append(leaf_digest(vote_id, payload))
+    return merkle_root(leaves).hex(), len(leaves), first_id
+
+
+def append_checkpoints(election, max_votes=None):
+    """Seal all settled, unsealed ballots of `election`; returns the created LedgerEntry rows."""
+    from elections.models import Election
+    from voting.models import EncryptedVote
+
+    max_votes = max_votes or int(getattr(settings, "LEDGER_CHECKPOINT_MAX_VOTES", 5000))
+    cutoff = timezone.now() - timedelta(seconds=int(getattr(settings, "LEDGER_CHECKPOINT_LAG", 5)))
+    created = []
+    with transaction.atomic():
+        # one sealer per election at a time so sequences and links never fork
+        Election.objects.select_for_update().filter(pk=election.pk).first()
+        last = LedgerEntry.objects.filter(election=election).order_by("-sequence").first()
+        prev_hash = last.entry_hash if last else GENESIS_HASH
+        sequence = last.sequence if last else 0
+        after = last.last_vote_id if last else 0
+        while True:
+            rows = list(
+                EncryptedVote.objects.filter(election=election, id__gt=after)
+                .order_by("id")
+                .values_list("id", "encrypted_payload", "timestamp")[:max_votes]
+            )
+            settled = []
+            for row in rows:
+                if row[2] > cutoff:
+                    break
+                settled.append(row)
+            if not settled:
+                break
+            root_hex = merkle_root([leaf_digest(vid, payload) for vid, payload, _ in settled]).hex()
+            sequence += 1
+            first_id, last_id = settled[0][0], settled[-1][0]
+            digest = entry_hash(election.pk, sequence, first_id, last_id, len(settled), root_hex, prev_hash)
+            created.append(
+                LedgerEntry.objects.create(
+                    election=election,
+                    sequence=sequence,
+                    first_vote_id=first_id,
+                    last_vote_id=last_id,
+                    vote_count=len(settled),
+                    merkle_root=root_hex,
+                    prev_hash=prev_hash,
+                    entry_hash=digest,
+                )
+            )
+            prev_hash, after = digest, last_id
+            if len(settled) < len(rows) or len(rows) < max_votes:
+                break
+    return created
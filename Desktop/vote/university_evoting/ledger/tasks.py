@@ -0,0 +1,15 @@
+from datetime import timedelta
+from django.utils import timezone
+from evoting_system.celery import app
+from elections.models import Election
+from .services import append_checkpoints
+
+
+@app.task
+def checkpoint_ledgers():
+    """Append ledger checkpoints for elections that are open (or just closed)."""
+    now = timezone.now()
+    entries = 0
+    for election in Election.objects.filter(start_time__lte=now, end_time__gte=now - timedelta(hours=1)):
+        entries += len(append_checkpoints(election))
+    return {'ledger_entries': entries}
@@ -0,0 +1,56 @@
+"""Micro-benchmark of abac.policy.evaluate (per-decision cost).
+
+Run from the project root:
+    DJANGO_SETTINGS_MODULE=evoting_system.settings python load_tests/bench_abac.py [iterations]
+
+Profiles are in-memory objects, so only the decision path and the configured cache are
+measured. "cold" evaluates each user once after their profile version was bumped; "warm"
+repeats decisions that are already cached; "memo" repeats them inside one request scope.
+Keep the user count below the cache's MAX_ENTRIES when benchmarking against LocMemCache.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "evoting_system.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from abac import policy  # noqa: E402
+
+
+def _users(n):
+    return [
+        SimpleNamespace(id=1_000_000 + i, profile=SimpleNamespace(
+            role="student", status="active",
+            attributes={"allowed_to_vote": True, "faculty": "Science", "year": i % 5},
+        ))
+        for i in range(n)
+    ]
+
+
+def _run(label, users, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        policy.evaluate(users[i % len(users)], "cast_vote")
+    elapsed = time.perf_counter() - started
+    print(f"{label:>5}: {elapsed / iterations * 1e6:8.2f} us/decision ({iterations} decisions)")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    users = _users(100)
+    for user in users:
+        policy.invalidate_profile_cache(user.id)
+    _run("cold", users, len(users))
+    _run("warm", users, iterations)
+    with policy.request_scope():
+        _run("memo", users, iterations)
+
+
+if __name__ == "__main__":
+    main()
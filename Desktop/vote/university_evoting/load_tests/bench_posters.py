@@ -0,0 +1,70 @@
+"""Benchmark of poster generation throughput (posters/sec), without S3 uploads.
+
+Run from the project root:
+    DJANGO_SETTINGS_MODULE=evoting_system.settings python load_tests/bench_posters.py [posters] [--font PATH]
+
+Posters are rendered into a temporary MEDIA_ROOT from a generated candidate photo and
+template background, with a slogan long enough to wrap over several lines. The first
+poster is reported separately: it pays for decoding the background and loading fonts,
+which later posters in the same worker reuse.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "evoting_system.settings")
+
+import django  # noqa: E402
+
+SLOGAN = ("Better libraries, longer opening hours, cheaper meals and a student union that "
+          "listens to every faculty on every campus, every week of the academic year.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("posters", nargs="?", type=int, default=20)
+    parser.add_argument("--font", help="TrueType font to render with (default: PIL's built-in font)")
+    args = parser.parse_args()
+
+    django.setup()
+    from django.conf import settings
+    from PIL import Image
+
+    media = tempfile.mkdtemp(prefix="bench_posters_")
+    settings.MEDIA_ROOT = media
+    settings.AWS_STORAGE_BUCKET_NAME = None
+    if args.font:
+        settings.POSTER_FONT_PATH = args.font
+    from posters import services
+
+    photo_path = os.path.join(media, "photo.jpg")
+    Image.new("RGB", (1200, 1600), "steelblue").save(photo_path, quality=90)
+    background_path = os.path.join(media, "background.png")
+    Image.new("RGB", (2480, 3508), "ivory").save(background_path)
+    template = SimpleNamespace(background_image=SimpleNamespace(path=background_path))
+
+    def submission(i):
+        return SimpleNamespace(
+            submission_id=uuid.uuid4(), candidate_name=f"Candidate {i}", candidate_position="President",
+            slogan=SLOGAN, photo=SimpleNamespace(path=photo_path), generated_files=None,
+        )
+
+    started = time.perf_counter()
+    services.generate_poster_files(submission(0), template=template)
+    first = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(1, args.posters + 1):
+        services.generate_poster_files(submission(i), template=template)
+    elapsed = time.perf_counter() - started
+    print(f"first poster: {first * 1000:.0f} ms")
+    print(f"steady state: {args.posters / elapsed:.2f} posters/sec ({elapsed / args.posters * 1000:.0f} ms/poster, {args.posters} posters)")
+
+
+if __name__ == "__main__":
+    main()
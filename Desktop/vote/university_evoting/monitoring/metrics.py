@@ -1,6 +1,8 @@
 """Simple metrics facade for optional Prometheus/Sentry integration.
 
-- If prometheus_client is available, expose a Counter for named metrics.
+- If prometheus_client is available, expose a Counter for named metrics, plus Gauges
+  (`set_gauge`) and Histograms (`observe`, optionally with custom buckets) for queue
+  depths and latencies.
 - If sentry_sdk is available, provide a capture function.
 - Otherwise, functions are no-ops to keep POC simple.
 """
@@ -29,6 +31,33 @@ except Exception:
         except Exception:
             return
 
+try:
+    from prometheus_client import Gauge, Histogram
+    _gauges = {}
+    _histograms = {}
+    def set_gauge(name, value):
+        g = _gauges.get(name)
+        if g is None:
+            g = Gauge(f"university_evoting_{name}", f"Gauge for {name}")
+            _gauges[name] = g
+        g.set(value)
+
+    def observe(name, value, buckets=None):
+        h = _histograms.get(name)
+        if h is None:
+            # buckets apply when the histogram is first created
+            kwargs = {"buckets": buckets} if buckets else {}
+            h = Histogram(f"university_evoting_{name}", f"Histogram for {name}", **kwargs)
+            _histograms[name] = h
+        h.observe(value)
+except Exception:
+    # gauges and histograms are high-frequency, so they are not persisted to analytics
+    def set_gauge(name, value):
+        return
+
+    def observe(name, value, buckets=None):
+        return
+
 try:
     import sentry_sdk
     def capture_message(msg, **kwargs):
@@ -0,0 +1,160 @@
+"""Opt-in per-middleware profiling (MIDDLEWARE_PROFILING=True).
+
+`instrument(MIDDLEWARE)` rewrites every entry to a path in this module; resolving that
+path (module `__getattr__`) builds a wrapper class around the original middleware. The
+wrapper hands the middleware a timed `get_response`, so it can split the middleware's
+own cost into the inbound phase (before it calls the rest of the chain) and the
+outbound phase (after the chain returned), excluding everything downstream. A
+middleware that answers without calling the chain has its whole cost counted inbound.
+
+For each phase it records wall time, database queries (via connection execute
+wrappers) and cache calls (via wrapped cache backend methods), and exports them with
+`monitoring.metrics.observe` as histograms named
+`middleware_<name>_<inbound|outbound>_<seconds|queries|cache_calls>`.
+"""
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.utils.module_loading import import_string
+
+PREFIX = "profiled__"
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf"))
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, float("inf"))
+CACHE_METHODS = ("get", "set", "add", "delete", "get_many", "set_many", "delete_many", "has_key", "incr", "decr", "touch")
+
+_active = ContextVar("middleware_profiler_stats", default=None)
+_wrappers = {}
+_patched_caches = set()
+
+
+class _Stats:
+    """Counters for one request; the outermost wrapper installs it."""
+    __slots__ = ("queries", "cache_calls", "in_cache", "frames")
+
+    def __init__(self):
+        self.queries = 0
+        self.cache_calls = 0
+        self.in_cache = False
+        self.frames = []
+
+    def snapshot(self):
+        return time.perf_counter(), self.queries, self.cache_calls
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def instrument(middleware):
+    """Return the MIDDLEWARE list with every entry wrapped by the profiler."""
+    return [f"{__name__}.{PREFIX}{path.replace('.', '__')}" for path in middleware]
+
+
+def _metric_name(path):
+    name = path.rsplit(".", 1)[-1]
+    name = re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+    return re.sub(r"_middleware$", "", name)
+
+
+def _count_cache_calls(method):
+    def counted(self, *args, **kwargs):
+        stats = _active.get()
+        # nested calls (get_many implemented with get) count once
+        if stats is None or stats.in_cache:
+            return method(self, *args, **kwargs)
+        stats.in_cache = True
+        stats.cache_calls += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats.in_cache = False
+    counted.__wrapped__ = method
+    return counted
+
+
+def _instrument_caches():
+    from django.conf import settings
+    from django.core.cache import caches
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if backend in _patched_caches:
+            continue
+        _patched_caches.add(backend)
+        for name in CACHE_METHODS:
+            method = getattr(backend, name, None)
+            if method is not None:
+                setattr(backend, name, _count_cache_calls(method))
+
+
+def _observe(name, phase, start, end):
+    from monitoring import metrics
+    metrics.observe(f"middleware_{name}_{phase}_seconds", end[0] - start[0], buckets=LATENCY_BUCKETS)
+    metrics.observe(f"middleware_{name}_{phase}_queries", end[1] - start[1], buckets=COUNT_BUCKETS)
+    metrics.observe(f"middleware_{name}_{phase}_cache_calls", end[2] - start[2], buckets=COUNT_BUCKETS)
+
+
+def _wrapper_for(path):
+    middleware_class = import_string(path)
+    name = _metric_name(path)
+
+    class ProfiledMiddleware:
+        def __init__(self, get_response):
+            self.get_response = get_response
+            self.middleware = middleware_class(self._downstream)
+            # Django looks these hooks up on the instance it was given
+            for hook in ("process_view", "process_exception", "process_template_response"):
+                if hasattr(self.middleware, hook):
+                    setattr(self, hook, getattr(self.middleware, hook))
+            _instrument_caches()
+
+        def _downstream(self, request):
+            stats = _active.get()
+            frame = stats.frames[-1]
+            frame[1] = stats.snapshot()
+            try:
+                return self.get_response(request)
+            finally:
+                frame[2] = stats.snapshot()
+
+        def __call__(self, request):
+            stats = _active.get()
+            if stats is not None:
+                return self._profile(request, stats)
+            from django.db import connections
+            stats = _Stats()
+            token = _active.set(stats)
+            try:
+                with ExitStack() as stack:
+                    for alias in connections:
+                        stack.enter_context(connections[alias].execute_wrapper(stats.count_query))
+                    return self._profile(request, stats)
+            finally:
+                _active.reset(token)
+
+        def _profile(self, request, stats):
+            # [start, downstream entered, downstream returned]
+            frame = [stats.snapshot(), None, None]
+            stats.frames.append(frame)
+            try:
+                return self.middleware(request)
+            finally:
+                end = stats.snapshot()
+                stats.frames.pop()
+                if frame[1] is None:
+                    _observe(name, "inbound", frame[0], end)
+                else:
+                    _observe(name, "inbound", frame[0], frame[1])
+                    _observe(name, "outbound", frame[2], end)
+
+    ProfiledMiddleware.__name__ = ProfiledMiddleware.__qualname__ = f"Profiled{middleware_class.__name__}"
+    return ProfiledMiddleware
+
+
+def __getattr__(attr):
+    if not attr.startswith(PREFIX):
+        raise AttributeError(attr)
+    if attr not in _wrappers:
+        _wrappers[attr] = _wrapper_for(attr[len(PREFIX):].replace("__", "."))
+    return _wrappers[attr]
@@ -1,6 +1,8 @@
-import io
 import os
+import threading
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from PIL import Image, ImageDraw, ImageFont
 import qrcode
 from django.urls import reverse
@@ -8,33 +10,105 @@ import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 
 
-DEFAULT_FONT_PATH = getattr(settings, 'POSTER_FONT_PATH', None)
+class PosterRenderer:
+    """Poster renderer that keeps decoded assets for the life of the (Celery worker) process.
 
+    Template backgrounds are decoded once per file version (only the latest version of
+    each file is kept, at most MAX_BACKGROUNDS files) and copied for each poster,
+    fonts are loaded once per size, text widths are memoized per font and string, and
+    boto3 clients are created once per service and region. `clear()` drops everything;
+    it runs when settings change (tests) and in each freshly forked Celery worker.
+    """
 
-def _load_font(size=40):
-    try:
-        if DEFAULT_FONT_PATH:
-            return ImageFont.truetype(DEFAULT_FONT_PATH, size)
-    except Exception:
-        pass
-    return ImageFont.load_default()
-
-
-def _wrap_text(text, font, max_width, draw):
-    words = text.split()
-    lines = []
-    cur = ''
-    for w in words:
-        test = cur + (' ' if cur else '') + w
-        if draw.textsize(test, font=font)[0] <= max_width:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            cur = w
-    if cur:
-        lines.append(cur)
-    return '\n'.join(lines)
+    BLANK_SIZE = (2480, 3508)  # A4@300dpi approx
+    MAX_BACKGROUNDS = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._fonts = {}
+            self._backgrounds = {}
+            self._clients = {}
+            self._widths = {}
+
+    def font(self, size=40):
+        font = self._fonts.get(size)
+        if font is None:
+            path = getattr(settings, 'POSTER_FONT_PATH', None)
+            try:
+                font = ImageFont.truetype(path, size) if path else ImageFont.load_default()
+            except Exception:
+                font = ImageFont.load_default()
+            self._fonts[size] = font
+        return font
+
+    def text_width(self, text, size):
+        key = (size, text)
+        width = self._widths.get(key)
+        if width is None:
+            if len(self._widths) >= 10000:
+                self._widths.clear()
+            width = self._widths[key] = self.font(size).getlength(text)
+        return width
+
+    def wrap_text(self, text, size, max_width):
+        words = text.split()
+        lines = []
+        cur = ''
+        for w in words:
+            test = cur + (' ' if cur else '') + w
+            if self.text_width(test, size) <= max_width:
+                cur = test
+            else:
+                if cur:
+                    lines.append(cur)
+                cur = w
+        if cur:
+            lines.append(cur)
+        return '\n'.join(lines)
+
+    def canvas(self, template=None):
+        """Return a fresh copy of the template background, or of a blank A4 page."""
+        path = mtime = None
+        if template and template.background_image:
+            path = template.background_image.path
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        # one decoded image per path: a replaced background evicts its old version
+        entry = self._backgrounds.get(path)
+        if entry is None or entry[0] != mtime:
+            if path is None:
+                base = Image.new('RGB', self.BLANK_SIZE, 'white')
+            else:
+                with Image.open(path) as im:
+                    base = im.convert('RGB')
+            with self._lock:
+                if path not in self._backgrounds and len(self._backgrounds) >= self.MAX_BACKGROUNDS:
+                    self._backgrounds.clear()
+                self._backgrounds[path] = entry = (mtime, base)
+        return entry[1].copy()
+
+    def client(self, service):
+        region = getattr(settings, 'AWS_S3_REGION_NAME', None)
+        key = (service, region)
+        client = self._clients.get(key)
+        if client is None:
+            # boto3 clients are thread-safe; creating one costs tens of milliseconds
+            client = self._clients[key] = boto3.client(service, region_name=region)
+        return client
+
+
+renderer = PosterRenderer()
+
+
+@receiver(setting_changed)
+def _clear_renderer(**kwargs):
+    renderer.clear()
 
 
 def generate_qr_image(url, size=300):
@@ -68,11 +142,9 @@ def compliance_check_submission(candidate_name, slogan, photo_path):
 
     # Optional: use AWS Rekognition for NSFW / text detection if configured
     try:
-        from django.conf import settings
-        bucket = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
         use_rek = getattr(settings, 'POSTER_USE_REKOGNITION', False)
         if use_rek:
-            rek = boto3.client('rekognition', region_name=getattr(settings, 'AWS_S3_REGION_NAME', None))
+            rek = renderer.client('rekognition')
             with open(photo_path, 'rb') as f:
                 img_bytes = f.read()
             try:
@@ -109,22 +181,21 @@ def generate_poster_files(submission, template=None):
     out_dir = os.path.join(media_root, 'posters', str(submission.submission_id))
     os.makedirs(out_dir, exist_ok=True)
 
-    # Load base image: either template background or a plain canvas
-    if template and template.background_image:
-        base = Image.open(template.background_image.path).convert('RGB')
-    else:
-        base = Image.new('RGB', (2480, 3508), 'white')  # A4@300dpi approx
+    # template background (decoded once per worker) or a plain canvas
+    base = renderer.canvas(template)
 
     draw = ImageDraw.Draw(base)
     width, height = base.size
 
     # Candidate photo: open, resize, and paste on left
     try:
-        photo = Image.open(submission.photo.path).convert('RGB')
-        ph = photo.copy()
         # target box
         box_w = int(width * 0.45)
         box_h = int(height * 0.6)
+        with Image.open(submission.photo.path) as photo:
+            # let JPEG decode at a reduced scale when the photo is much larger than the box
+            photo.draft('RGB', (box_w, box_h))
+            ph = photo.convert('RGB')
         ph.thumbnail((box_w, box_h), Image.LANCZOS)
         # center vertically
         x = int(width * 0.05)
@@ -135,19 +206,17 @@ def generate_poster_files(submission, template=None):
         pass
 
     # Draw candidate text on right
-    font_title = _load_font(80)
-    font_slogan = _load_font(48)
     text_x = int(width * 0.55)
     text_w = int(width * 0.4)
     y_cursor = int(height * 0.2)
-    draw.text((text_x, y_cursor), submission.candidate_name, font=font_title, fill='black')
+    draw.text((text_x, y_cursor), submission.candidate_name, font=renderer.font(80), fill='black')
     y_cursor += 120
     # position
-    draw.text((text_x, y_cursor), submission.candidate_position, font=_load_font(60), fill='black')
+    draw.text((text_x, y_cursor), submission.candidate_position, font=renderer.font(60), fill='black')
     y_cursor += 100
     # wrap slogan
-    slogan_wrapped = _wrap_text(submission.slogan or '', font_slogan, text_w, draw)
-    draw.multiline_text((text_x, y_cursor), slogan_wrapped, font=font_slogan, fill='black', spacing=8)
+    slogan_wrapped = renderer.wrap_text(submission.slogan or '', 48, text_w)
+    draw.multiline_text((text_x, y_cursor), slogan_wrapped, font=renderer.font(48), fill='black', spacing=8)
 
     # Generate QR code linking to candidate detail (if possible)
     try:
@@ -170,7 +239,7 @@ def generate_poster_files(submission, template=None):
 
     # Save PNG
     png_path = os.path.join(out_dir, 'poster.png')
-    base.save(png_path, format='PNG')
+    base.save(png_path, format='PNG', compress_level=int(getattr(settings, 'POSTER_PNG_COMPRESS_LEVEL', 6)))
 
     # Save PDF (simple conversion)
     pdf_path = os.path.join(out_dir, 'poster.pdf')
@@ -192,10 +261,9 @@ def generate_poster_files(submission, template=None):
 
     # If S3 is configured, upload files and return presigned URLs instead of local paths
     try:
-        from django.conf import settings
         bucket = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
         if bucket:
-            s3 = boto3.client('s3', region_name=getattr(settings, 'AWS_S3_REGION_NAME', None))
+            s3 = renderer.client('s3')
             uploaded = {}
             for key_name, local_path in [('png', png_path), ('pdf', pdf_path), ('qr', qr_path)]:
                 if not local_path:
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posters.services import PosterRenderer
+
+
+class PosterRendererTests(TestCase):
+    def setUp(self):
+        self.renderer = PosterRenderer()
+        self.dir = tempfile.mkdtemp(prefix='test_renderer_')
+        self.background = os.path.join(self.dir, 'bg.png')
+        Image.new('RGB', (200, 300), 'red').save(self.background)
+        self.template = SimpleNamespace(background_image=SimpleNamespace(path=self.background))
+
+    def test_background_is_decoded_once_and_copied(self):
+        with mock.patch('posters.services.Image.open', wraps=Image.open) as image_open:
+            first = self.renderer.canvas(self.template)
+            second = self.renderer.canvas(self.template)
+        self.assertEqual(image_open.call_count, 1)
+        self.assertIsNot(first, second)
+        first.putpixel((0, 0), (0, 0, 0))
+        self.assertEqual(self.renderer.canvas(self.template).getpixel((0, 0)), (255, 0, 0))
+
+    def test_rewritten_background_is_reloaded(self):
+        self.renderer.canvas(self.template)
+        Image.new('RGB', (200, 300), 'blue').save(self.background)
+        os.utime(self.background, ns=(0, 10 ** 18))
+        self.assertEqual(self.renderer.canvas(self.template).getpixel((0, 0)), (0, 0, 255))
+        # the old version is replaced, not kept alongside
+        self.assertEqual(list(self.renderer._backgrounds), [self.background])
+
+    def test_background_cache_is_bounded(self):
+        for i in range(PosterRenderer.MAX_BACKGROUNDS + 1):
+            path = os.path.join(self.dir, f'bg{i}.png')
+            Image.new('RGB', (2, 2), 'red').save(path)
+            self.renderer.canvas(SimpleNamespace(background_image=SimpleNamespace(path=path)))
+        self.assertLessEqual(len(self.renderer._backgrounds), PosterRenderer.MAX_BACKGROUNDS)
+
+    def test_fonts_widths_and_clients_are_reused(self):
+        self.assertIs(self.renderer.font(48), self.renderer.font(48))
+        with mock.patch.object(self.renderer.font(48), 'getlength', return_value=10.0) as getlength:
+            self.renderer.wrap_text('one two one two', 48, 25)
+            self.renderer.wrap_text('one two one two', 48, 25)
+        # each growing prefix ("one", "one two", ...) is measured once across both calls
+        self.assertEqual(getlength.call_count, 4)
+        with mock.patch('posters.services.boto3.client') as client:
+            self.assertIs(self.renderer.client('s3'), self.renderer.client('s3'))
+        self.assertEqual(client.call_count, 1)
+
+    def test_setting_changes_clear_the_shared_renderer(self):
+        from posters.services import renderer
+        font = renderer.font(12)
+        with override_settings(POSTER_FONT_PATH=None):
+            self.assertIsNot(renderer.font(12), font)
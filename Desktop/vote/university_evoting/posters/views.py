@@ -5,7 +5,7 @@ from django.shortcuts import get_object_or_404
 from .models import PosterSubmission, PosterTemplate, ApprovedPoster
 from .serializers import PosterSubmissionSerializer, PosterTemplateSerializer
 from .services import compliance_check_submission
-from audit.models import AuditLog
+from audit.writer import log_event
 from .tasks import generate_poster_task
 from django.views.generic import TemplateView
 from django.contrib.auth.decorators import login_required
@@ -28,7 +28,7 @@ class PosterSubmissionCreateView(generics.CreateAPIView):
             sub = PosterSubmission.objects.get(submission_id=submission_id)
             errors = compliance_check_submission(sub.candidate_name, sub.slogan, sub.photo.path)
             if errors:
-                AuditLog.objects.create(user=request.user, action='poster.submission_compliance_failed', meta=str(errors))
+                log_event('poster.submission_compliance_failed', user=request.user, meta=errors)
                 return Response({'detail': 'submission failed compliance', 'errors': errors}, status=400)
             # enqueue background Celery task for generation
             try:
@@ -40,9 +40,9 @@ class PosterSubmissionCreateView(generics.CreateAPIView):
                     files = generate_poster_files(sub, template=sub.template)
                     sub.generated_files = files
                     sub.save()
-                    AuditLog.objects.create(user=sub.created_by, action='poster.generated', meta=str({'submission': str(sub.submission_id)}))
+                    log_event('poster.generated', user=sub.created_by, meta={'submission': str(sub.submission_id)})
                 except Exception:
-                    AuditLog.objects.create(user=request.user, action='poster.generate_failed', meta=str({'submission': str(submission_id)}))
+                    log_event('poster.generate_failed', user=request.user, meta={'submission': str(submission_id)})
         except Exception:
             pass
         return resp
@@ -97,11 +97,11 @@ class PosterModerationView(generics.RetrieveUpdateAPIView):
         if action == 'approve':
             obj.mark_approved(by_user=request.user, reason=reason)
             ApprovedPoster.objects.create(submission=obj)
-            AuditLog.objects.create(user=request.user, action='poster.approved', meta=str({'submission': str(obj.submission_id)}))
+            log_event('poster.approved', user=request.user, meta={'submission': str(obj.submission_id)})
             return Response({'detail': 'approved'})
         elif action == 'reject':
             obj.mark_rejected(by_user=request.user, reason=reason)
-            AuditLog.objects.create(user=request.user, action='poster.rejected', meta=str({'submission': str(obj.submission_id), 'reason': reason}))
+            log_event('poster.rejected', user=request.user, meta={'submission': str(obj.submission_id), 'reason': reason})
             return Response({'detail': 'rejected'})
         return Response({'detail': 'unknown action'}, status=status.HTTP_400_BAD_REQUEST)
 
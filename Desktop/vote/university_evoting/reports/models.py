@@ -47,15 +47,15 @@ class ResultPublication(models.Model):
         return f"Publication for {self.election} - {self.status}"
 
     def mark_reviewed(self, user):
-        from audit.models import AuditLog
+        from audit.writer import log_event
         self.status = self.STATUS_REVIEWED
         self.reviewed_by = user
         self.reviewed_at = timezone.now()
         self.save()
-        AuditLog.objects.create(user=user, action=f"Marked publication {self.pk} reviewed", meta=str({'election': self.election.pk}))
+        log_event(f"Marked publication {self.pk} reviewed", user=user, meta={'election': self.election_id}, durable=True)
 
     def publish(self, user):
-        from audit.models import AuditLog
+        from audit.writer import log_event
         if self.status != self.STATUS_REVIEWED:
             raise ValueError("Publication must be reviewed before publishing")
         if self.reviewed_by_id == user.id:
@@ -64,4 +64,4 @@ class ResultPublication(models.Model):
         self.published_by = user
         self.published_at = timezone.now()
         self.save()
-        AuditLog.objects.create(user=user, action=f"Published results for publication {self.pk}", meta=str({'election': self.election.pk}))
+        log_event(f"Published results for publication {self.pk}", user=user, meta={'election': self.election_id}, durable=True)
@@ -2,7 +2,9 @@ from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from accounts.models import MFATOTPDevice, Profile
 from cryptography.fernet import Fernet
+from io import StringIO
 from django.core.management import call_command
+from accounts import crypto
 
 
 class MFATOTPEncryptionTests(TestCase):
@@ -34,3 +36,29 @@ class MFATOTPEncryptionTests(TestCase):
             call_command('rotate_mfa_keys')
             d.refresh_from_db()
             self.assertEqual(d.plaintext_secret, "SOMETHING")
+
+    def test_key_ring_is_memoized_until_keys_change(self):
+        key = Fernet.generate_key().decode('utf-8')
+        with override_settings(MFA_SECRET_FERNET_KEY=key):
+            ring = crypto.key_ring()
+            self.assertIs(crypto.key_ring(), ring)
+        with override_settings(MFA_SECRET_FERNET_KEY=Fernet.generate_key().decode('utf-8')):
+            self.assertIsNot(crypto.key_ring(), ring)
+
+    def test_rotation_is_chunked_and_rerunnable(self):
+        old_key = Fernet.generate_key().decode('utf-8')
+        new_key = Fernet.generate_key().decode('utf-8')
+        with override_settings(MFA_SECRET_FERNET_KEY=old_key):
+            for i in range(5):
+                MFATOTPDevice.objects.create(user=self.user, label=f"d{i}", secret=f"SECRET{i}")
+        with override_settings(MFA_SECRET_FERNET_KEYS=[new_key, old_key]):
+            out = StringIO()
+            call_command('rotate_mfa_keys', chunk_size=2, workers=2, stdout=out)
+            self.assertIn("re-encrypted 5", out.getvalue())
+            self.assertIn("5/5 devices processed", out.getvalue())
+            for d in MFATOTPDevice.objects.order_by('id'):
+                self.assertEqual(Fernet(new_key.encode()).decrypt(d.secret.encode()).decode(), f"SECRET{d.label[1:]}")
+            # a second run finds everything already under the current key
+            out = StringIO()
+            call_command('rotate_mfa_keys', stdout=out)
+            self.assertIn("re-encrypted 0", out.getvalue())
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, Client, override_settings
+
+from monitoring.middleware_profiler import instrument
+
+
+class QueryingMiddleware:
+    """One query and two cache calls on the way in, one cache call on the way out."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        get_user_model().objects.exists()
+        cache.get("profiler-test")
+        cache.get_many(["profiler-test", "other"])
+        response = self.get_response(request)
+        cache.set("profiler-test", 1)
+        return response
+
+
+class ShortCircuitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return HttpResponse("blocked", status=403)
+
+
+PROFILED = instrument([
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "tests.test_middleware_profiler.QueryingMiddleware",
+])
+
+
+class MiddlewareProfilerTests(TestCase):
+
+    def _observed(self, path="/api/voting/qr/success/"):
+        with mock.patch("monitoring.metrics.observe") as observe:
+            response = Client().get(path)
+        return response, {call.args[0]: call.args[1] for call in observe.call_args_list}
+
+    @override_settings(MIDDLEWARE=PROFILED)
+    def test_phases_are_measured_per_middleware(self):
+        response, observed = self._observed()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(observed["middleware_querying_inbound_queries"], 1)
+        self.assertEqual(observed["middleware_querying_inbound_cache_calls"], 2)
+        self.assertEqual(observed["middleware_querying_outbound_cache_calls"], 1)
+        self.assertEqual(observed["middleware_querying_outbound_queries"], 0)
+        # the downstream middleware's work is not attributed to the session middleware
+        self.assertEqual(observed["middleware_session_inbound_queries"], 0)
+        self.assertIn("middleware_session_outbound_seconds", observed)
+
+    @override_settings(MIDDLEWARE=instrument([
+        "tests.test_middleware_profiler.ShortCircuitMiddleware",
+        "tests.test_middleware_profiler.QueryingMiddleware",
+    ]))
+    def test_short_circuit_counts_inbound_only(self):
+        response, observed = self._observed()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("middleware_short_circuit_inbound_seconds", observed)
+        self.assertNotIn("middleware_short_circuit_outbound_seconds", observed)
+        self.assertFalse(any(name.startswith("middleware_querying") for name in observed))
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
+
+from evoting_system import ratelimit
+from evoting_system.ratelimit import limiter, parse_rate, _gcra
+
+
+class GCRATests(TestCase):
+    def setUp(self):
+        limiter.local.reset()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/min"), (10, 60))
+        self.assertEqual(parse_rate("5/15m"), (5, 900))
+        self.assertEqual(parse_rate("100/s"), (100, 1))
+        self.assertIsNone(parse_rate(None))
+        with self.assertRaises(ValueError):
+            parse_rate("5/fortnight")
+
+    def test_burst_then_one_per_interval(self):
+        tat = None
+        for expected_remaining in (2, 1, 0):
+            tat, allowed, remaining, _, _ = _gcra(tat, 0, 1000, 3)
+            self.assertTrue(allowed)
+            self.assertEqual(remaining, expected_remaining)
+        denied = _gcra(tat, 0, 1000, 3)
+        self.assertFalse(denied[1])
+        self.assertEqual(denied[3], 1000)
+        # one emission interval later exactly one more request fits
+        self.assertTrue(_gcra(tat, 1000, 1000, 3)[1])
+
+    @override_settings(RATE_LIMIT_POLICIES={"login": "2/min"}, RATE_LIMIT_REDIS_URL="")
+    def test_login_is_limited_per_client_with_quota_headers(self):
+        client = Client()
+        first = client.post("/api/auth/login/", {"identifier": "x", "password": "y"}, content_type="application/json")
+        self.assertEqual(first["RateLimit-Limit"], "2")
+        self.assertEqual(first["RateLimit-Remaining"], "1")
+        client.post("/api/auth/login/", {"identifier": "x", "password": "y"}, content_type="application/json")
+        third = client.post("/api/auth/login/", {"identifier": "x", "password": "y"}, content_type="application/json")
+        self.assertEqual(third.status_code, 429)
+        self.assertIn("Retry-After", third)
+        other = client.post("/api/auth/login/", {"identifier": "x", "password": "y"}, content_type="application/json", REMOTE_ADDR="10.0.0.9")
+        self.assertNotEqual(other.status_code, 429)
+
+    @override_settings(RATE_LIMIT_REDIS_URL="redis://127.0.0.1:1/0", RATE_LIMIT_REDIS_RETRY=30)
+    def test_unreachable_redis_falls_back_to_local_state(self):
+        if ratelimit.redis is None:
+            self.skipTest("redis client not installed")
+        limiter._remote_down_until = 0.0
+        decision = limiter.hit("login", "fallback-client")
+        self.assertTrue(decision.allowed)
+        self.assertGreater(limiter._remote_down_until, 0)
+        # while Redis is marked down no connection is attempted
+        with mock.patch.object(ratelimit.RedisLimiter, "hit") as remote_hit:
+            limiter.hit("login", "fallback-client")
+        remote_hit.assert_not_called()
+        limiter._remote_down_until = 0.0
@@ -1,6 +1,6 @@
 from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
-from .models import VoteToken, EncryptedVote, QRLink
+from .models import VoteToken, EncryptedVote, QRLink, TallyCounter, TurnoutCount
 
 
 @admin.register(VoteToken)
@@ -11,10 +11,24 @@ class VoteTokenAdmin(admin.ModelAdmin):
 
 @admin.register(EncryptedVote)
 class EncryptedVoteAdmin(admin.ModelAdmin):
-    list_display = ("id", "election", "position", "timestamp")
+    list_display = ("id", "election", "position", "format_version", "timestamp")
     readonly_fields = ("encrypted_payload",)
 
 
+@admin.register(TallyCounter)
+class TallyCounterAdmin(admin.ModelAdmin):
+    list_display = ("election", "position", "candidate", "count", "updated_at")
+    list_filter = ("election",)
+    readonly_fields = ("count", "updated_at")
+
+
+@admin.register(TurnoutCount)
+class TurnoutCountAdmin(admin.ModelAdmin):
+    list_display = ("election", "dimension", "value", "count", "updated_at")
+    list_filter = ("election", "dimension")
+    readonly_fields = ("count", "updated_at")
+
+
 @admin.register(QRLink)
 class QRLinkAdmin(admin.ModelAdmin):
     list_display = ("user", "candidate", "created_at", "expires_at", "used")
@@ -0,0 +1,169 @@
+"""Batch (checkpoint) signing and verification of encrypted ballots.
+
+Instead of one RSA-PSS signature per ballot, contiguous runs of an election's ballots are
+sealed into a BallotBatchSignature: each ballot contributes a leaf digest, the leaves are
+combined into a Merkle root and only the root is signed with the tally key.
+
+Verification costs one PSS verify per batch. When a batch's recomputed root differs from
+the signed one, the stored (authenticated) tree is bisected against the current rows to
+identify exactly which ballots were altered or removed.
+
+Ballots younger than `VOTE_SIGNING_LAG` seconds are left for the next run, so a cast
+still committing with a lower id never ends up inside an already sealed range.
+"""
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import crypto
+
+
+def leaf_digest(vote_id, encrypted_payload: str) -> bytes:
+    payload_hash = hashlib.sha256(encrypted_payload.encode("utf-8")).digest()
+    return hashlib.sha256(b"\x00" + f"{vote_id}:".encode("utf-8") + payload_hash).digest()
+
+
+def merkle_root(leaves) -> bytes:
+    """Merkle root over a list of leaf digests (odd nodes are promoted unchanged)."""
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    level = list(leaves)
+    while len(level) > 1:
+        nxt = []
+        for i in range(0, len(level) - 1, 2):
+            nxt.append(hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest())
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0]
+
+
+def _signed_message(election_id, first_vote_id, last_vote_id, vote_count, root_hex) -> bytes:
+    return f"{election_id}:{first_vote_id}:{last_vote_id}:{vote_count}:{root_hex}".encode("utf-8")
+
+
+def seal_pending_ballots(election, batch_size=None, final=False):
+    """Seal not-yet-sealed, settled ballots of `election` into signed batches.
+
+    Only full batches of `batch_size` (default `VOTE_SIGNING_BATCH_SIZE`) are sealed
+    unless `final` is True, in which case the trailing partial batch is sealed too.
+    Returns the list of created BallotBatchSignature rows.
+    """
+    from elections.models import Election
+    from .models import BallotBatchSignature, EncryptedVote
+
+    batch_size = batch_size or int(getattr(settings, "VOTE_SIGNING_BATCH_SIZE", 500))
+    cutoff = timezone.now() - timedelta(seconds=int(getattr(settings, "VOTE_SIGNING_LAG", 5)))
+    created = []
+    with transaction.atomic():
+        # serialize sealers for this election so batches never overlap
+        Election.objects.select_for_update().filter(pk=election.pk).first()
+        last = (
+            BallotBatchSignature.objects.filter(election=election)
+            .order_by("-last_vote_id")
+            .values_list("last_vote_id", flat=True)
+            .first()
+        ) or 0
+        while True:
+            rows = list(
+                EncryptedVote.objects.filter(election=election, id__gt=last)
+                .order_by("id")
+                .values_list("id", "encrypted_payload", "timestamp")[:batch_size]
+            )
+            settled = []
+            for vid, payload, timestamp in rows:
+                if timestamp > cutoff:
+                    break
+                settled.append((vid, payload))
+            # a batch never extends past an unsettled ballot, even when final
+            if not settled or (len(settled) < batch_size and not final):
+                break
+            rows = settled
+            leaves = [(vid, leaf_digest(vid, payload)) for vid, payload in rows]
+            root_hex = merkle_root([leaf for _, leaf in leaves]).hex()
+            first_id, last_id = rows[0][0], rows[-1][0]
+            signature = crypto.sign_with_tally_private(_signed_message(election.pk, first_id, last_id, len(rows), root_hex))
+            created.append(
+                BallotBatchSignature.objects.create(
+                    election=election,
+                    first_vote_id=first_id,
+                    last_vote_id=last_id,
+                    vote_count=len(rows),
+                    leaves=[[vid, leaf.hex()] for vid, leaf in leaves],
+                    merkle_root=root_hex,
+                    signature=signature,
+                )
+            )
+            last = last_id
+    return created
+
+
+def _bisect_mismatches(stored, current, lo, hi, out):
+    """Append indexes in [lo, hi) where current leaves differ from the stored ones."""
+    segment = current[lo:hi]
+    if None not in segment and merkle_root(segment) == merkle_root(stored[lo:hi]):
+        return
+    if hi - lo == 1:
+        out.append(lo)
+        return
+    mid = (lo + hi) // 2
+    _bisect_mismatches(stored, current, lo, mid, out)
+    _bisect_mismatches(stored, current, mid, hi, out)
+
+
+def verify_batch(batch):
+    """Verify one BallotBatchSignature against the current rows.
+
+    Returns (verified_ids, invalid) where invalid is a list of (vote_id, reason).
+    """
+    from .models import EncryptedVote
+
+    stored_ids = [vid for vid, _ in batch.leaves]
+    stored = [bytes.fromhex(h) for _, h in batch.leaves]
+    message = _signed_message(batch.election_id, batch.first_vote_id, batch.last_vote_id, batch.vote_count, batch.merkle_root)
+    if len(stored) != batch.vote_count or merkle_root(stored).hex() != batch.merkle_root or not crypto.verify_with_tally_public(message, batch.signature):
+        # the batch record itself is not authentic: nothing in its range can be trusted
+        ids = EncryptedVote.objects.filter(
+            election_id=batch.election_id, id__gte=batch.first_vote_id, id__lte=batch.last_vote_id
+        ).values_list("id", flat=True)
+        return set(), [(vid, "batch signature invalid") for vid in ids]
+
+    rows = dict(
+        EncryptedVote.objects.filter(
+            election_id=batch.election_id, id__gte=batch.first_vote_id, id__lte=batch.last_vote_id
+        ).values_list("id", "encrypted_payload")
+    )
+    current = [leaf_digest(vid, rows[vid]) if vid in rows else None for vid in stored_ids]
+    sealed = set(stored_ids)
+    invalid = [(vid, "not in sealed batch") for vid in rows if vid not in sealed]
+    mismatched = []
+    _bisect_mismatches(stored, current, 0, len(stored), mismatched)
+    bad_ids = set()
+    for idx in mismatched:
+        vid = stored_ids[idx]
+        if vid in rows:
+            invalid.append((vid, "payload does not match sealed batch"))
+            bad_ids.add(vid)
+        else:
+            invalid.append((vid, "sealed ballot missing"))
+    verified = {vid for vid in stored_ids if vid in rows and vid not in bad_ids}
+    return verified, invalid
+
+
+def verify_election_batches(election):
+    """Verify every sealed batch of `election`.
+
+    Returns (verified_ids, invalid): ids whose payload is covered by a valid batch
+    signature and a list of (vote_id, reason) for rows that failed.
+    """
+    from .models import BallotBatchSignature
+
+    verified = set()
+    invalid = []
+    for batch in BallotBatchSignature.objects.filter(election=election).order_by("first_vote_id").iterator():
+        ok, bad = verify_batch(batch)
+        verified |= ok
+        invalid.extend(bad)
+    return verified, invalid
@@ -2,12 +2,13 @@ import base64
 import os
 from pathlib import Path
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.backends import default_backend
 from django.conf import settings
 
 
-from .key_provider import get_default_key_provider
+from .key_provider import get_default_key_provider, key_cache
 
 
 def keys_dir() -> Path:
@@ -38,12 +39,12 @@ def generate_rsa_keypair(bits: int = 2048, private_path: str | Path | None = Non
 
 def load_public_key(path: str | Path | None = None):
     provider = get_default_key_provider()
-    return provider.load_public_key(path=path)
+    return key_cache.get(provider, "public", path)
 
 
 def load_private_key(path: str | Path | None = None):
     provider = get_default_key_provider()
-    return provider.load_private_key(path=path)
+    return key_cache.get(provider, "private", path)
 
 
 def encrypt_with_public(plaintext: bytes) -> str:
@@ -66,6 +67,37 @@ def decrypt_with_private(ciphertext_b64: str) -> bytes:
     return pt
 
 
+# Envelope (hybrid) encryption helpers: ballots are sealed with AES-256-GCM under a data
+# key, and only the data key is RSA-wrapped. Payload format: base64(nonce || ciphertext+tag).
+
+ENVELOPE_NONCE_SIZE = 12
+
+
+def generate_data_key() -> bytes:
+    return AESGCM.generate_key(bit_length=256)
+
+
+def wrap_data_key(data_key: bytes) -> str:
+    """RSA-OAEP wrap a data key with the vote public key."""
+    return encrypt_with_public(data_key)
+
+
+def unwrap_data_key(wrapped_b64: str) -> bytes:
+    return decrypt_with_private(wrapped_b64)
+
+
+def envelope_encrypt(data_key: bytes, plaintext: bytes, aad: bytes | None = None) -> str:
+    nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+    ct = AESGCM(data_key).encrypt(nonce, plaintext, aad)
+    return base64.b64encode(nonce + ct).decode("utf-8")
+
+
+def envelope_decrypt(data_key: bytes, ciphertext_b64: str, aad: bytes | None = None) -> bytes:
+    raw = base64.b64decode(ciphertext_b64.encode("utf-8"))
+    nonce, ct = raw[:ENVELOPE_NONCE_SIZE], raw[ENVELOPE_NONCE_SIZE:]
+    return AESGCM(data_key).decrypt(nonce, ct, aad)
+
+
 # Signing helper utilities (use tally keys)
 
 def tally_private_key_path() -> Path:
@@ -82,12 +114,12 @@ def tally_public_key_path() -> Path:
 
 def load_tally_private_key(path: str | Path | None = None):
     provider = get_default_key_provider()
-    return provider.load_tally_private_key(path=path)
+    return key_cache.get(provider, "tally_private", path)
 
 
 def load_tally_public_key(path: str | Path | None = None):
     provider = get_default_key_provider()
-    return provider.load_tally_public_key(path=path)
+    return key_cache.get(provider, "tally_public", path)
 
 
 def sign_with_tally_private(message: bytes) -> str:
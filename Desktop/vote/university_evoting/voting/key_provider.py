@@ -1,6 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
 import os
+import threading
+import time
 from typing import Optional, Tuple
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization, hashes
@@ -118,6 +120,9 @@ class LocalFileKeyProvider(KeyProvider):
         with open(pub_path, "wb") as f:
             f.write(pub_bytes)
 
+        # rotation within this process must not wait for the mtime check
+        key_cache.invalidate(priv_path)
+        key_cache.invalidate(pub_path)
         return (str(priv_path), str(pub_path))
 
 
@@ -134,6 +139,104 @@ def get_default_key_provider() -> KeyProvider:
 def set_default_key_provider(provider: KeyProvider):
     global _default_provider
     _default_provider = provider
+    # keys loaded through the previous provider must not be served for the new one
+    key_cache.clear()
+
+
+class KeyCache:
+    """Process-wide cache of deserialized key objects.
+
+    Loading a key through a provider reads and parses a PEM file (or calls KMS), which
+    is too expensive to repeat on every cast. Entries are keyed by provider identity,
+    key kind and path, and are re-validated against the key file's mtime/size so that a
+    rotation performed by another process (e.g. `generate_keys`) is picked up. The stat
+    itself is throttled by `VOTE_KEY_CACHE_STAT_INTERVAL` seconds (default 1.0).
+
+    Providers without a backing file (KMS) are cached until the provider changes or
+    `clear()` is called.
+    """
+
+    _LOADERS = {
+        "private": ("private_key_path", "load_private_key"),
+        "public": ("public_key_path", "load_public_key"),
+        "tally_private": ("tally_private_key_path", "load_tally_private_key"),
+        "tally_public": ("tally_public_key_path", "load_tally_public_key"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_interval(self) -> float:
+        return float(getattr(settings, "VOTE_KEY_CACHE_STAT_INTERVAL", 1.0))
+
+    @staticmethod
+    def _file_stamp(path: Optional[Path]):
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self, provider: KeyProvider, kind: str, path: Optional[str | Path] = None):
+        """Return the key of `kind` for `provider`, loading it only when missing or stale."""
+        path_method, load_method = self._LOADERS[kind]
+        if path:
+            key_path = Path(path)
+        else:
+            key_path = getattr(provider, path_method)()
+            key_path = Path(key_path) if key_path else None
+        cache_key = (id(provider), kind, str(key_path) if key_path else None)
+        now = time.monotonic()
+
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry["provider"] is provider:
+            if key_path is None or now - entry["checked_at"] < self._stat_interval():
+                self.hits += 1
+                return entry["key"]
+            stamp = self._file_stamp(key_path)
+            if stamp is not None and stamp == entry["stamp"]:
+                entry["checked_at"] = now
+                self.hits += 1
+                return entry["key"]
+
+        with self._lock:
+            self.misses += 1
+            stamp = self._file_stamp(key_path)
+            key = getattr(provider, load_method)(path=path)
+            if key is None:
+                # nothing to cache yet; a later generate_keys will populate the file
+                self._entries.pop(cache_key, None)
+                return None
+            self._entries[cache_key] = {"provider": provider, "stamp": stamp, "checked_at": now, "key": key}
+            return key
+
+    def invalidate(self, path: Optional[str | Path] = None):
+        """Drop entries for `path` (or every entry when no path is given)."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            target = str(Path(path))
+            for k in [k for k in self._entries if k[2] == target]:
+                del self._entries[k]
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+key_cache = KeyCache()
 
 
 class AWSKMSKeyProvider(KeyProvider):
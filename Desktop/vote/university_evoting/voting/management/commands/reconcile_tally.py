@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import get_object_or_404
+from elections.models import Election
+from voting.tally import reconcile_counters, rebuild_counters, recount
+
+
+class Command(BaseCommand):
+    help = "Check that materialized TallyCounter rows equal a full recount of an election's ballots"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument("--fix", action="store_true", help="Rebuild the counters from the recount when they differ")
+
+    def handle(self, *args, **options):
+        election = get_object_or_404(Election, id=options["election_id"])
+        mismatches = reconcile_counters(election)
+        if not mismatches:
+            total = sum(recount(election).values())
+            self.stdout.write(self.style.SUCCESS(f"Counters match full recount for election {election.id} ({total} ballots)"))
+            return
+        for cid, (counter, actual) in sorted(mismatches.items()):
+            self.stdout.write(self.style.WARNING(f"  candidate {cid}: counter={counter} recount={actual}"))
+        if options.get("fix"):
+            rebuild_counters(election)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for election {election.id}"))
+            return
+        raise CommandError(f"{len(mismatches)} counter(s) differ from the recount; rerun with --fix to rebuild")
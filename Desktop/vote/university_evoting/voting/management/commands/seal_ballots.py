@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.shortcuts import get_object_or_404
+from elections.models import Election
+from voting.batch_signing import seal_pending_ballots, verify_election_batches
+
+
+class Command(BaseCommand):
+    help = "Seal unsigned ballots of an election into signed Merkle batches (and optionally verify them)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument("--batch-size", type=int, default=None, help="Ballots per batch (default VOTE_SIGNING_BATCH_SIZE)")
+        parser.add_argument("--final", action="store_true", help="Also seal the trailing partial batch (use once voting has closed)")
+        parser.add_argument("--verify", action="store_true", help="Verify all sealed batches after sealing")
+
+    def handle(self, *args, **options):
+        election = get_object_or_404(Election, id=options["election_id"])
+        batches = seal_pending_ballots(election, batch_size=options.get("batch_size"), final=options.get("final"))
+        sealed = sum(b.vote_count for b in batches)
+        self.stdout.write(self.style.SUCCESS(f"Sealed {len(batches)} batches ({sealed} ballots) for election {election.id}"))
+        if options.get("verify"):
+            verified, invalid = verify_election_batches(election)
+            self.stdout.write(f"Verified {len(verified)} ballots; {len(invalid)} invalid")
+            for vote_id, reason in invalid:
+                self.stdout.write(self.style.WARNING(f"  vote {vote_id}: {reason}"))
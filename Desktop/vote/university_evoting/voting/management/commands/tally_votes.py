@@ -1,10 +1,9 @@
 import csv
 import io
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from voting.crypto import decrypt_with_private
-from voting.models import EncryptedVote
+from voting.tally import parallel_tally
 from reports.models import Report
 from elections.models import Election
 
@@ -15,46 +14,23 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("election_id", type=int, help="ID of the election to tally")
         parser.add_argument("--export", action="store_true", help="Export CSV report and save to Reports")
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes for decrypt/verify (default: CPU count; 1 = in-process)")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Ballots fetched and dispatched per chunk")
 
     def handle(self, *args, **options):
         election_id = options["election_id"]
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
         election = get_object_or_404(Election, id=election_id)
+        verbosity = options.get("verbosity", 1)
 
-        votes = EncryptedVote.objects.filter(election=election)
+        def progress(processed, total, rate):
+            if verbosity >= 2:
+                self.stdout.write(f"  {processed}/{total} ballots ({rate:.0f} rows/sec)")
 
-        counts = {}
-        total = 0
-        invalid = []
-
-        for ev in votes:
-            # verify signature if present
-            if ev.signature:
-                try:
-                    ok = verify_with_tally_public(ev.encrypted_payload.encode("utf-8"), ev.signature)
-                except Exception as e:
-                    invalid.append((ev.id, f"signature verify error: {e}"))
-                    continue
-                if not ok:
-                    invalid.append((ev.id, "signature invalid"))
-                    continue
-
-            try:
-                pt = decrypt_with_private(ev.encrypted_payload)
-            except Exception as e:
-                # couldn't decrypt: skip and note
-                invalid.append((ev.id, str(e)))
-                continue
-
-            try:
-                # payload format: b"<candidate_id>|<token>"
-                parts = pt.decode("utf-8").split("|")
-                candidate_id = int(parts[0])
-            except Exception as e:
-                invalid.append((ev.id, f"parse error: {e}"))
-                continue
-
-            counts[candidate_id] = counts.get(candidate_id, 0) + 1
-            total += 1
+        result = parallel_tally(election, workers=options.get("workers"), chunk_size=options["chunk_size"], progress=progress)
+        counts = result.counts
+        invalid = result.invalid
 
         # Build CSV in-memory
         output = io.StringIO()
@@ -65,8 +41,9 @@ class Command(BaseCommand):
 
         summary = {
             "election": election.id,
-            "total_counted": total,
+            "total_counted": result.total,
             "invalid_records": len(invalid),
+            "rows_per_sec": round(result.rows_per_sec, 1),
             "generated_at": timezone.now().isoformat(),
         }
 
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0002_candidate_qr_slug'),
+        ('voting', '0004_qrlink'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BallotDataKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wrapped_key', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ballot_data_keys', to='elections.election')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='encryptedvote',
+            name='format_version',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'RSA-OAEP'), (2, 'AES-GCM envelope')], default=1),
+        ),
+        migrations.AddField(
+            model_name='encryptedvote',
+            name='data_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='votes', to='voting.ballotdatakey'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0002_candidate_qr_slug'),
+        ('voting', '0005_ballotdatakey_encryptedvote_format_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BallotBatchSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_vote_id', models.BigIntegerField()),
+                ('last_vote_id', models.BigIntegerField()),
+                ('vote_count', models.PositiveIntegerField()),
+                ('leaves', models.JSONField(default=list)),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('signature', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ballot_batches', to='elections.election')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['election', 'last_vote_id'], name='voting_ball_electio_7aba79_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_counters(apps, schema_editor):
+    EncryptedVote = apps.get_model('voting', 'EncryptedVote')
+    TallyCounter = apps.get_model('voting', 'TallyCounter')
+    rows = EncryptedVote.objects.values('election_id', 'position_id', 'candidate_id').annotate(n=Count('id'))
+    TallyCounter.objects.bulk_create([
+        TallyCounter(election_id=r['election_id'], position_id=r['position_id'], candidate_id=r['candidate_id'], count=r['n'])
+        for r in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0002_candidate_qr_slug'),
+        ('voting', '0006_ballotbatchsignature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TallyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='elections.candidate')),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tally_counters', to='elections.election')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='elections.position')),
+            ],
+            options={
+                'unique_together': {('election', 'candidate')},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elections', '0002_candidate_qr_slug'),
+        ('voting', '0007_tallycounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoutCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('election', 'Election'), ('position', 'Position'), ('faculty', 'Faculty'), ('campus', 'Campus')], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='turnout_counts', to='elections.election')),
+            ],
+            options={
+                'unique_together': {('election', 'dimension', 'value')},
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from elections.models import Election, Position, Candidate
 
 
@@ -14,19 +16,114 @@ class VoteToken(models.Model):
         return f"Token {self.token} for {self.user} ({'used' if self.used else 'unused'})"
 
 
+class BallotDataKey(models.Model):
+    """Symmetric data key used for envelope-encrypted ballots.
+
+    The AES-256 key is generated by a casting process, wrapped once with the vote public
+    key (RSA-OAEP) and stored here; ballots reference it so the tally unwraps one key per
+    batch instead of running one RSA decrypt per vote.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name="ballot_data_keys")
+    wrapped_key = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"BallotDataKey {self.id} for election {self.election_id}"
+
+
 class EncryptedVote(models.Model):
+    # format_version 1: legacy RSA-OAEP (or hash fallback) payload; 2: AES-GCM envelope
+    FORMAT_LEGACY = 1
+    FORMAT_ENVELOPE = 2
+    FORMAT_CHOICES = [
+        (FORMAT_LEGACY, "RSA-OAEP"),
+        (FORMAT_ENVELOPE, "AES-GCM envelope"),
+    ]
+
     election = models.ForeignKey(Election, on_delete=models.CASCADE)
     position = models.ForeignKey(Position, on_delete=models.CASCADE)
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     encrypted_payload = models.TextField()
     # Base64 signature of encrypted_payload signed by tally private key (PSS + SHA256)
     signature = models.TextField(blank=True, null=True)
+    format_version = models.PositiveSmallIntegerField(choices=FORMAT_CHOICES, default=FORMAT_LEGACY)
+    data_key = models.ForeignKey(BallotDataKey, on_delete=models.PROTECT, null=True, blank=True, related_name="votes")
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"EncryptedVote {self.id} - {self.election.name}"
 
 
+class BallotBatchSignature(models.Model):
+    """Tally-key signature over the Merkle root of a contiguous run of an election's ballots.
+
+    Replaces one RSA-PSS signature per ballot: the tally verifies one signature per batch
+    and compares leaf digests, bisecting the stored tree to pinpoint altered rows.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name="ballot_batches")
+    first_vote_id = models.BigIntegerField()
+    last_vote_id = models.BigIntegerField()
+    vote_count = models.PositiveIntegerField()
+    # [[vote_id, leaf_hex], ...] in vote id order
+    leaves = models.JSONField(default=list)
+    merkle_root = models.CharField(max_length=64)
+    signature = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["election", "last_vote_id"])]
+
+    def __str__(self):
+        return f"BallotBatchSignature {self.election_id} [{self.first_vote_id}..{self.last_vote_id}]"
+
+
+class TallyCounter(models.Model):
+    """Materialized running vote count per candidate.
+
+    Kept in step with EncryptedVote inside the casting transaction (see the signal
+    handlers below) so live results read a handful of rows instead of recounting every
+    ballot. `reconcile_tally` compares these counters against a full recount.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name="tally_counters")
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("election", "candidate")
+
+    def __str__(self):
+        return f"TallyCounter {self.election_id}/{self.candidate_id} = {self.count}"
+
+
+class TurnoutCount(models.Model):
+    """Flushed turnout per election broken down by dimension (election, position, faculty, campus).
+
+    Live increments land in sharded cache counters (see voting.turnout) and are folded
+    into these rows by the `update_turnout_counter` beat task; the row id also names the
+    cache keys, so this table doubles as the index of active dimensions.
+    """
+    DIMENSION_CHOICES = [
+        ("election", "Election"),
+        ("position", "Position"),
+        ("faculty", "Faculty"),
+        ("campus", "Campus"),
+    ]
+
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name="turnout_counts")
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=100, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("election", "dimension", "value")
+
+    def __str__(self):
+        return f"TurnoutCount {self.election_id} {self.dimension}={self.value!r}: {self.count}"
+
+
 class QRTokenUsage(models.Model):
     """Records used signed QR tokens to prevent replay."""
     token_hash = models.CharField(max_length=128, unique=True)
@@ -62,3 +159,18 @@ class QRLink(models.Model):
 
     def __str__(self):
         return f"QRLink token_hash={self.token_hash} user={self.user} candidate={self.candidate}"
+
+
+@receiver(post_save, sender=EncryptedVote)
+def increment_tally_counter(sender, instance, created, **kwargs):
+    # runs in the caller's transaction, so the counter commits or rolls back with the ballot;
+    # bulk_create bypasses signals and must be followed by rebuild_counters()
+    if created and not kwargs.get("raw"):
+        from .tally import adjust_counter
+        adjust_counter(instance.election_id, instance.position_id, instance.candidate_id, 1)
+
+
+@receiver(post_delete, sender=EncryptedVote)
+def decrement_tally_counter(sender, instance, **kwargs):
+    from .tally import adjust_counter
+    adjust_counter(instance.election_id, instance.position_id, instance.candidate_id, -1)
@@ -12,8 +12,8 @@ class VoteTokenSerializer(serializers.ModelSerializer):
 class EncryptedVoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = EncryptedVote
-        fields = ("id", "election", "position", "candidate", "encrypted_payload", "timestamp")
-        read_only_fields = ("id", "encrypted_payload", "timestamp")
+        fields = ("id", "election", "position", "candidate", "encrypted_payload", "format_version", "timestamp")
+        read_only_fields = ("id", "encrypted_payload", "format_version", "timestamp")
 
 
 class CastVoteSerializer(serializers.Serializer):
@@ -0,0 +1,87 @@
+"""Ballot casting service shared by the API, QR API and QR browser cast views.
+
+A cast claims the voter's token with a single conditional UPDATE
+(`... SET used = true WHERE ... AND used = false`), so of two concurrent requests only
+one can win; the ballot row, the QR replay guard and the audit entry are written in the
+same transaction. Encryption and signing happen before the transaction is opened so
+the token row is locked only for the inserts.
+"""
+from django.db import IntegrityError, transaction
+
+from abac.policy import is_eligible
+from audit.writer import log_event
+from elections.ballot_cache import ballot_cache
+from .models import VoteToken, EncryptedVote, QRTokenUsage
+from .turnout import record_cast
+from .utils import encrypt_ballot, sign_ballot
+
+
+class CastError(Exception):
+    """A cast was refused; `reason` is one of invalid_candidate, not_eligible, token_not_found, token_used, token_replayed."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _token_error(user, token, election_id):
+    """Work out why the conditional token update matched nothing (failure path only)."""
+    row = VoteToken.objects.filter(token=token, user=user).values_list("election_id", "used").first()
+    if row is None:
+        return CastError("token_not_found")
+    if row[0] != election_id:
+        return CastError("invalid_candidate")
+    return CastError("token_used")
+
+
+def cast_ballot(user, candidate_id, token=None, position_id=None, token_hash_value=None, audit_action=None, audit_meta=None):
+    """Encrypt and store one ballot for `user`; returns the new EncryptedVote.
+
+    `token` is the VoteToken value presented by API clients. Without it the voter's token
+    for the candidate's election is used (and created on first use), as the QR flows do.
+    When `position_id` is given the candidate must belong to that position.
+    `token_hash_value` records a signed QR token as used; `audit_action` writes an
+    AuditLog entry with `audit_meta` plus the new vote id. The voter must pass the
+    election's ABAC policy (from its voter roll once built). Raises CastError.
+    """
+    candidate = ballot_cache.candidate(candidate_id)
+    if candidate is None or (position_id is not None and candidate.position_id != int(position_id)):
+        raise CastError("invalid_candidate")
+    cand_position_id, election_id = candidate.position_id, candidate.election_id
+    if not is_eligible(user, election_id):
+        raise CastError("not_eligible")
+
+    if token is not None:
+        token_value = str(token)
+        claim = {"token": token, "user": user, "election_id": election_id}
+    else:
+        token_obj, _ = VoteToken.objects.get_or_create(user=user, election_id=election_id)
+        if token_obj.used:
+            raise CastError("token_used")
+        token_value = str(token_obj.token)
+        claim = {"pk": token_obj.pk}
+
+    ballot = encrypt_ballot(election_id, candidate_id, token_value)
+    signature = sign_ballot(ballot["encrypted_payload"])
+
+    try:
+        with transaction.atomic():
+            if not VoteToken.objects.filter(used=False, **claim).update(used=True):
+                raise _token_error(user, token, election_id) if token is not None else CastError("token_used")
+            ev = EncryptedVote.objects.create(
+                election_id=election_id,
+                position_id=cand_position_id,
+                candidate_id=candidate_id,
+                signature=signature,
+                **ballot,
+            )
+            if token_hash_value:
+                QRTokenUsage.objects.create(token_hash=token_hash_value, user=user, candidate_id=candidate_id)
+            if audit_action:
+                log_event(audit_action, user=user, meta=dict(audit_meta or {}, vote_id=ev.pk), durable=True)
+    except IntegrityError:
+        # the signed QR token was used by a concurrent request
+        raise CastError("token_replayed")
+
+    record_cast(user, election_id, cand_position_id)
+    return ev
@@ -1,10 +1,223 @@
-from collections import Counter
-from .models import EncryptedVote
+import os
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import EncryptedVote, TallyCounter
 
 
 def simple_tally(election):
-    """Return a dict mapping candidate_id to vote counts for the given election."""
-    qs = EncryptedVote.objects.filter(election=election)
-    counts = Counter(qs.values_list("candidate_id", flat=True))
-    # return as dict of candidate_id: count
-    return dict(counts)
+    """Return a dict mapping candidate_id to vote counts for the given election.
+
+    Reads the materialized TallyCounter rows; use `recount` for a full scan of the ballots.
+    """
+    qs = TallyCounter.objects.filter(election=election, count__gt=0)
+    return dict(qs.values_list("candidate_id", "count"))
+
+
+def recount(election):
+    """Count ballots per candidate straight from EncryptedVote (GROUP BY, no decryption)."""
+    qs = EncryptedVote.objects.filter(election=election).values("candidate_id").annotate(n=Count("id"))
+    return {row["candidate_id"]: row["n"] for row in qs}
+
+
+def adjust_counter(election_id, position_id, candidate_id, delta):
+    """Atomically add `delta` to a candidate's TallyCounter, creating the row on first use."""
+    updated = TallyCounter.objects.filter(election_id=election_id, candidate_id=candidate_id).update(count=F("count") + delta)
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            TallyCounter.objects.create(election_id=election_id, position_id=position_id, candidate_id=candidate_id, count=delta)
+    except IntegrityError:
+        # a concurrent cast created the row first
+        TallyCounter.objects.filter(election_id=election_id, candidate_id=candidate_id).update(count=F("count") + delta)
+
+
+def reconcile_counters(election):
+    """Compare counters with a full recount; returns {candidate_id: (counter, recount)} for mismatches."""
+    counters = simple_tally(election)
+    actual = recount(election)
+    return {
+        cid: (counters.get(cid, 0), actual.get(cid, 0))
+        for cid in set(counters) | set(actual)
+        if counters.get(cid, 0) != actual.get(cid, 0)
+    }
+
+
+def rebuild_counters(election):
+    """Replace the election's counters with a full recount (under a lock on the election)."""
+    from elections.models import Election
+
+    with transaction.atomic():
+        Election.objects.select_for_update().filter(pk=election.pk).first()
+        TallyCounter.objects.filter(election=election).delete()
+        rows = EncryptedVote.objects.filter(election=election).values("position_id", "candidate_id").annotate(n=Count("id"))
+        TallyCounter.objects.bulk_create(
+            [TallyCounter(election=election, position_id=r["position_id"], candidate_id=r["candidate_id"], count=r["n"]) for r in rows]
+        )
+    return simple_tally(election)
+
+
+# Parallel decrypt+verify tally engine
+#
+# Rows are streamed from the database in keyset-paginated chunks (id > last_id) so the
+# election is never materialized at once. Each chunk is a list of plain tuples handed to
+# a worker process, which verifies signatures and decrypts without touching the DB; the
+# per-chunk Counters are merged in the parent.
+
+BallotRow = namedtuple("BallotRow", ["id", "election_id", "encrypted_payload", "signature", "format_version", "data_key_id"])
+
+TallyResult = namedtuple("TallyResult", ["counts", "total", "invalid", "elapsed", "rows_per_sec"])
+
+_worker_data_keys = {}
+
+
+def iter_vote_chunks(election, chunk_size=2000):
+    """Yield lists of BallotRow for `election`, ordered by id, `chunk_size` rows at a time."""
+    last_id = 0
+    while True:
+        qs = (
+            EncryptedVote.objects.filter(election=election, id__gt=last_id)
+            .order_by("id")
+            .values_list(*BallotRow._fields)[:chunk_size]
+        )
+        chunk = [BallotRow(*row) for row in qs.iterator()]
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+        yield chunk
+
+
+def _init_worker(data_keys):
+    """Process initializer: set up Django if needed and load keys once per worker."""
+    global _worker_data_keys
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+    from . import crypto
+    _worker_data_keys = dict(data_keys)
+    # warm the per-process key cache so chunks never parse PEM files
+    crypto.load_private_key()
+    crypto.load_tally_public_key()
+
+
+def _tally_chunk(rows):
+    """Verify and decrypt a chunk of BallotRow; returns (Counter, invalid, rows_seen)."""
+    from . import crypto
+    from .utils import decrypt_ballot
+    counts = Counter()
+    invalid = []
+    for row in rows:
+        if row.signature:
+            try:
+                ok = crypto.verify_with_tally_public(row.encrypted_payload.encode("utf-8"), row.signature)
+            except Exception as e:
+                invalid.append((row.id, f"signature verify error: {e}"))
+                continue
+            if not ok:
+                invalid.append((row.id, "signature invalid"))
+                continue
+        try:
+            pt = decrypt_ballot(row, _worker_data_keys)
+        except Exception as e:
+            invalid.append((row.id, str(e) or e.__class__.__name__))
+            continue
+        try:
+            # payload format: b"<candidate_id>|<token>"
+            candidate_id = int(pt.decode("utf-8").split("|")[0])
+        except Exception as e:
+            invalid.append((row.id, f"parse error: {e}"))
+            continue
+        counts[candidate_id] += 1
+    return counts, invalid, len(rows)
+
+
+def parallel_tally(election, workers=None, chunk_size=2000, progress=None):
+    """Decrypt and count every ballot of `election`, fanning chunks out to `workers` processes.
+
+    Sealed batches (see voting.batch_signing) are verified first; rows they reject are
+    reported as invalid and rows they cover skip per-ballot signature verification. In
+    batch signing mode the settled tail is sealed first, and a ballot that is still
+    neither signed nor covered by a verified batch is reported invalid, never counted.
+
+    `workers` defaults to the CPU count and is capped at the number of chunks, so an
+    election with no more than one `chunk_size` of ballots runs in-process instead of
+    paying for worker startup; 1 (or 0) always runs in-process. `progress`, if given, is
+    called as progress(processed, total, rows_per_sec) after each merged chunk.
+    Returns a TallyResult.
+    """
+    from django.db import connections
+    from .batch_signing import seal_pending_ballots, verify_election_batches
+    from .utils import load_data_keys
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    data_keys = load_data_keys(election)
+    total = EncryptedVote.objects.filter(election=election).count()
+    # no more workers than chunks; a single chunk is tallied in-process
+    workers = min(workers, -(-total // chunk_size))
+    counts = Counter()
+    processed = 0
+    started = time.monotonic()
+    batch_mode = getattr(settings, "VOTE_SIGNING_MODE", "ballot") == "batch"
+    if batch_mode:
+        seal_pending_ballots(election, final=True)
+    # one PSS verify per sealed batch; rows it covers skip per-ballot signature checks
+    verified_ids, invalid = verify_election_batches(election)
+    rejected = {vote_id for vote_id, _ in invalid}
+
+    def merge(result):
+        nonlocal processed
+        chunk_counts, chunk_invalid, seen = result
+        counts.update(chunk_counts)
+        invalid.extend(chunk_invalid)
+        processed += seen
+        if progress:
+            progress(processed, total, processed / max(time.monotonic() - started, 1e-9))
+
+    def prepare(chunk):
+        nonlocal processed
+        rows = []
+        for r in chunk:
+            if r.id in rejected:
+                continue
+            if r.id in verified_ids:
+                rows.append(r._replace(signature=None))
+            elif batch_mode and not r.signature:
+                # nothing authenticates this ballot: unsealed (e.g. cast within the signing lag)
+                invalid.append((r.id, "not signed or sealed"))
+            else:
+                rows.append(r)
+        processed += len(chunk) - len(rows)
+        return rows
+
+    chunks = (prepare(chunk) for chunk in iter_vote_chunks(election, chunk_size))
+    if workers <= 1:
+        _init_worker(data_keys)
+        for chunk in chunks:
+            merge(_tally_chunk(chunk))
+    else:
+        # workers never use the DB; don't let them inherit an open connection
+        if not any(conn.in_atomic_block for conn in connections.all()):
+            connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_keys,)) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(_tally_chunk, chunk))
+                # bound the number of chunks held in memory
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        merge(fut.result())
+            for fut in pending:
+                merge(fut.result())
+
+    elapsed = time.monotonic() - started
+    counted = sum(counts.values())
+    return TallyResult(dict(counts), counted, invalid, elapsed, processed / elapsed if elapsed else 0.0)
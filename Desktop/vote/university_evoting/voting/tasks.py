@@ -0,0 +1,15 @@
+from datetime import timedelta
+from django.utils import timezone
+from evoting_system.celery import app
+from elections.models import Election
+from .batch_signing import seal_pending_ballots
+
+
+@app.task
+def seal_ballot_batches():
+    """Seal full batches of unsigned ballots for elections that are open (or just closed)."""
+    now = timezone.now()
+    sealed = 0
+    for election in Election.objects.filter(start_time__lte=now, end_time__gte=now - timedelta(hours=1)):
+        sealed += len(seal_pending_ballots(election))
+    return {'sealed_batches': sealed}
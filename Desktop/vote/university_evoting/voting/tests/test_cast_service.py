@@ -0,0 +1,65 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from unittest.mock import patch
+
+from audit.models import AuditLog
+from elections.models import Election, Position, Candidate
+from voting.models import VoteToken, EncryptedVote, QRTokenUsage
+from voting.services import cast_ballot, CastError
+
+
+class CastBallotServiceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='caster', password='pass')
+        now = timezone.now()
+        self.election = Election.objects.create(name='E', start_time=now - timedelta(hours=1), end_time=now + timedelta(days=1))
+        self.position = Position.objects.create(name='P', election=self.election)
+        self.candidate = Candidate.objects.create(name='C', position=self.position)
+
+    def test_cast_writes_ballot_and_audit_together(self):
+        ev = cast_ballot(self.user, self.candidate.pk, audit_action='qr.cast_success', audit_meta={'candidate': self.candidate.pk})
+        self.assertEqual(ev.candidate_id, self.candidate.pk)
+        self.assertTrue(VoteToken.objects.get(user=self.user, election=self.election).used)
+        self.assertTrue(AuditLog.objects.filter(action='qr.cast_success', meta__contains=f'"vote_id": {ev.pk}').exists())
+
+    def test_token_claimed_concurrently_is_rejected(self):
+        token = VoteToken.objects.create(user=self.user, election=self.election)
+        real_encrypt = __import__('voting.utils', fromlist=['encrypt_ballot']).encrypt_ballot
+
+        def encrypt_then_race(*args, **kwargs):
+            # another request claims the token while this one is encrypting
+            VoteToken.objects.filter(pk=token.pk).update(used=True)
+            return real_encrypt(*args, **kwargs)
+
+        with patch('voting.services.encrypt_ballot', side_effect=encrypt_then_race):
+            with self.assertRaises(CastError) as ctx:
+                cast_ballot(self.user, self.candidate.pk, token=token.token)
+        self.assertEqual(ctx.exception.reason, 'token_used')
+        self.assertFalse(EncryptedVote.objects.exists())
+
+    def test_replayed_qr_token_rolls_back_cast(self):
+        QRTokenUsage.objects.create(token_hash='h1', user=self.user, candidate=self.candidate)
+        with self.assertRaises(CastError) as ctx:
+            cast_ballot(self.user, self.candidate.pk, token_hash_value='h1', audit_action='qr.cast_success')
+        self.assertEqual(ctx.exception.reason, 'token_replayed')
+        self.assertFalse(EncryptedVote.objects.exists())
+        self.assertFalse(VoteToken.objects.get(user=self.user, election=self.election).used)
+        self.assertFalse(AuditLog.objects.filter(action='qr.cast_success').exists())
+
+    def test_candidate_must_match_position(self):
+        other = Position.objects.create(name='Other', election=self.election)
+        token = VoteToken.objects.create(user=self.user, election=self.election)
+        with self.assertRaises(CastError) as ctx:
+            cast_ballot(self.user, self.candidate.pk, token=token.token, position_id=other.pk)
+        self.assertEqual(ctx.exception.reason, 'invalid_candidate')
+
+    def test_unknown_token(self):
+        import uuid
+        with self.assertRaises(CastError) as ctx:
+            cast_ballot(self.user, self.candidate.pk, token=uuid.uuid4())
+        self.assertEqual(ctx.exception.reason, 'token_not_found')
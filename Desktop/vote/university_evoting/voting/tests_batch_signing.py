@@ -0,0 +1,87 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from elections.models import Election, Position, Candidate
+from voting.crypto import generate_rsa_keypair, tally_private_key_path, tally_public_key_path
+from voting.models import EncryptedVote
+from voting.batch_signing import seal_pending_ballots, verify_election_batches, merkle_root
+from voting.tally import parallel_tally
+from voting.utils import encrypt_ballot, sign_ballot
+
+
+@override_settings(VOTE_SIGNING_LAG=0)
+class BatchSigningTests(TestCase):
+    def setUp(self):
+        generate_rsa_keypair(private_path=None, public_path=None)
+        generate_rsa_keypair(private_path=tally_private_key_path(), public_path=tally_public_key_path())
+        now = timezone.now()
+        self.election = Election.objects.create(name="Batch", start_time=now, end_time=now)
+        self.position = Position.objects.create(election=self.election, name="President")
+        self.cand = Candidate.objects.create(position=self.position, name="Alice")
+        self.votes = []
+        for i in range(7):
+            fields = encrypt_ballot(self.election, self.cand.id, f"token-{i}")
+            self.votes.append(EncryptedVote.objects.create(election=self.election, position=self.position, candidate=self.cand, **fields))
+
+    def test_only_full_batches_sealed_until_final(self):
+        self.assertEqual(len(seal_pending_ballots(self.election, batch_size=3)), 2)
+        self.assertEqual(len(seal_pending_ballots(self.election, batch_size=3)), 0)
+        last = seal_pending_ballots(self.election, batch_size=3, final=True)
+        self.assertEqual([b.vote_count for b in last], [1])
+
+    def test_unsettled_ballots_left_for_next_run(self):
+        EncryptedVote.objects.filter(id__gte=self.votes[4].id).update(timestamp=timezone.now() + timedelta(minutes=5))
+        with self.settings(VOTE_SIGNING_LAG=60):
+            self.assertEqual(seal_pending_ballots(self.election, batch_size=3, final=True), [])
+        EncryptedVote.objects.filter(id__lte=self.votes[3].id).update(timestamp=timezone.now() - timedelta(minutes=5))
+        with self.settings(VOTE_SIGNING_LAG=60):
+            batches = seal_pending_ballots(self.election, batch_size=3, final=True)
+        self.assertEqual([b.vote_count for b in batches], [3, 1])
+        self.assertEqual(batches[-1].last_vote_id, self.votes[3].id)
+
+    def test_all_sealed_ballots_verify(self):
+        seal_pending_ballots(self.election, batch_size=4, final=True)
+        verified, invalid = verify_election_batches(self.election)
+        self.assertEqual(verified, {v.id for v in self.votes})
+        self.assertEqual(invalid, [])
+
+    def test_bisection_pinpoints_tampered_and_missing_rows(self):
+        seal_pending_ballots(self.election, batch_size=7)
+        EncryptedVote.objects.filter(id=self.votes[2].id).update(encrypted_payload="forged")
+        removed_id = self.votes[5].id
+        self.votes[5].delete()
+        verified, invalid = verify_election_batches(self.election)
+        self.assertEqual(dict(invalid), {self.votes[2].id: "payload does not match sealed batch", removed_id: "sealed ballot missing"})
+        self.assertNotIn(self.votes[2].id, verified)
+        self.assertEqual(len(verified), 5)
+
+    def test_forged_batch_record_rejects_whole_range(self):
+        batch = seal_pending_ballots(self.election, batch_size=7)[0]
+        batch.merkle_root = merkle_root([]).hex()
+        batch.save()
+        verified, invalid = verify_election_batches(self.election)
+        self.assertEqual(verified, set())
+        self.assertEqual(len(invalid), 7)
+
+    def test_tally_excludes_rows_rejected_by_batch(self):
+        seal_pending_ballots(self.election, batch_size=7)
+        EncryptedVote.objects.filter(id=self.votes[0].id).update(encrypted_payload="forged")
+        result = parallel_tally(self.election, workers=1)
+        self.assertEqual(result.counts, {self.cand.id: 6})
+        self.assertEqual([vid for vid, _ in result.invalid], [self.votes[0].id])
+
+    def test_batch_mode_tally_seals_tail_and_rejects_unsealed_rows(self):
+        # cast unsigned in batch mode; only the first four are sealed so far
+        EncryptedVote.objects.update(signature=None, timestamp=timezone.now() - timedelta(minutes=5))
+        seal_pending_ballots(self.election, batch_size=4)
+        # the last ballot is still within the signing lag when the tally runs
+        EncryptedVote.objects.filter(id=self.votes[6].id).update(timestamp=timezone.now() + timedelta(minutes=5))
+        with self.settings(VOTE_SIGNING_MODE="batch", VOTE_SIGNING_LAG=60):
+            result = parallel_tally(self.election, workers=1)
+        self.assertEqual(result.counts, {self.cand.id: 6})
+        self.assertEqual(result.invalid, [(self.votes[6].id, "not signed or sealed")])
+        self.assertEqual(result.total, 6)
+
+    @override_settings(VOTE_SIGNING_MODE="batch")
+    def test_batch_mode_skips_per_ballot_signature(self):
+        self.assertIsNone(sign_ballot("payload"))
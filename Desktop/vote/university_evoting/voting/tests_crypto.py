@@ -22,3 +22,19 @@ class CryptoTests(TestCase):
             privkey = serialization.load_pem_private_key(priv_data, password=None, backend=default_backend())
             pt = privkey.decrypt(ciphertext, __import__("cryptography.hazmat.primitives.asymmetric.padding", fromlist=["OAEP"]).OAEP(mgf=__import__("cryptography.hazmat.primitives.asymmetric.padding", fromlist=["MGF1"]).MGF1(algorithm=__import__("cryptography.hazmat.primitives.hashes", fromlist=["SHA256"]).SHA256()), algorithm=__import__("cryptography.hazmat.primitives.hashes", fromlist=["SHA256"]).SHA256(), label=None))
             self.assertEqual(pt, plaintext)
+
+
+class EnvelopeCryptoTests(TestCase):
+    def test_envelope_roundtrip(self):
+        from voting.crypto import generate_data_key, envelope_encrypt, envelope_decrypt
+        key = generate_data_key()
+        ct = envelope_encrypt(key, b"7|token", aad=b"election:1")
+        self.assertEqual(envelope_decrypt(key, ct, aad=b"election:1"), b"7|token")
+
+    def test_envelope_rejects_other_election(self):
+        from cryptography.exceptions import InvalidTag
+        from voting.crypto import generate_data_key, envelope_encrypt, envelope_decrypt
+        key = generate_data_key()
+        ct = envelope_encrypt(key, b"7|token", aad=b"election:1")
+        with self.assertRaises(InvalidTag):
+            envelope_decrypt(key, ct, aad=b"election:2")
@@ -44,3 +44,48 @@ class KeyProviderTests(TestCase):
             self.assertTrue(Path(tpub).exists())
             self.assertIsNotNone(provider.load_tally_private_key())
             self.assertIsNotNone(provider.load_tally_public_key())
+
+
+class KeyCacheTests(TestCase):
+    def test_repeated_loads_hit_cache(self):
+        from voting.key_provider import KeyCache
+        with tempfile.TemporaryDirectory() as td:
+            provider = LocalFileKeyProvider(base_dir=Path(td), vote_private="priv.pem", vote_public="pub.pem")
+            provider.generate_rsa_keypair(bits=1024)
+            cache = KeyCache()
+            first = cache.get(provider, "public")
+            second = cache.get(provider, "public")
+            self.assertIs(first, second)
+            self.assertEqual(cache.stats()["misses"], 1)
+            self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_rotation_invalidates_cached_key(self):
+        from voting.key_provider import key_cache
+        with tempfile.TemporaryDirectory() as td:
+            provider = LocalFileKeyProvider(base_dir=Path(td), vote_private="priv.pem", vote_public="pub.pem")
+            provider.generate_rsa_keypair(bits=1024)
+            old = key_cache.get(provider, "public")
+            provider.generate_rsa_keypair(bits=1024)
+            new = key_cache.get(provider, "public")
+            self.assertNotEqual(old.public_numbers(), new.public_numbers())
+
+    def test_mtime_change_detected(self):
+        import os
+        from django.test import override_settings
+        from voting.key_provider import KeyCache
+        with tempfile.TemporaryDirectory() as td:
+            provider = LocalFileKeyProvider(base_dir=Path(td), vote_private="priv.pem", vote_public="pub.pem")
+            other = LocalFileKeyProvider(base_dir=Path(td), vote_private="p2.pem", vote_public="q2.pem")
+            provider.generate_rsa_keypair(bits=1024)
+            other.generate_rsa_keypair(bits=1024)
+            cache = KeyCache()
+            with override_settings(VOTE_KEY_CACHE_STAT_INTERVAL=0):
+                old = cache.get(provider, "public")
+                # simulate an out-of-process rotation: replace file content and bump mtime
+                pub = provider.public_key_path()
+                pub.write_bytes(other.public_key_path().read_bytes())
+                st = os.stat(pub)
+                os.utime(pub, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+                new = cache.get(provider, "public")
+            self.assertNotEqual(old.public_numbers(), new.public_numbers())
+            self.assertEqual(cache.stats()["misses"], 2)
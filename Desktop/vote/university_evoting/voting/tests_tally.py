@@ -45,3 +45,77 @@ class TallyTests(TestCase):
         self.assertIn("'total_counted': 3", output)
         # basic check: command succeeded and mentions "Tally complete"
         self.assertIn("Tally complete for election", output)
+
+    def test_tally_command_counts_envelope_ballots(self):
+        from voting.utils import encrypt_ballot, data_key_ring
+        data_key_ring.clear()
+        for cand in (self.c2, self.c2):
+            fields = encrypt_ballot(self.election, cand.id, "token-env")
+            self.assertEqual(fields["format_version"], EncryptedVote.FORMAT_ENVELOPE)
+            EncryptedVote.objects.create(election=self.election, position=self.position, candidate=cand, **fields)
+        # both envelope ballots share one wrapped data key
+        self.assertEqual(self.election.ballot_data_keys.count(), 1)
+        out = io.StringIO()
+        call_command("tally_votes", str(self.election.id), stdout=out)
+        self.assertIn("'total_counted': 5", out.getvalue())
+        self.assertIn("'invalid_records': 0", out.getvalue())
+
+    def test_parallel_tally_merges_chunks_across_workers(self):
+        from voting.tally import parallel_tally
+        seen = []
+        result = parallel_tally(self.election, workers=2, chunk_size=1, progress=lambda done, total, rate: seen.append(done))
+        self.assertEqual(result.counts, {self.c1.id: 2, self.c2.id: 1})
+        self.assertEqual(result.total, 3)
+        self.assertEqual(result.invalid, [])
+        self.assertEqual(seen[-1], 3)
+
+    def test_small_election_tallied_in_process(self):
+        from unittest import mock
+        from voting.tally import parallel_tally
+        with mock.patch("voting.tally.ProcessPoolExecutor") as pool:
+            result = parallel_tally(self.election, workers=4)
+        pool.assert_not_called()
+        self.assertEqual(result.counts, {self.c1.id: 2, self.c2.id: 1})
+
+    def test_chunk_size_must_be_positive(self):
+        from django.core.management.base import CommandError
+        from voting.tally import parallel_tally
+        with self.assertRaises(ValueError):
+            parallel_tally(self.election, chunk_size=0)
+        with self.assertRaises(CommandError):
+            call_command("tally_votes", str(self.election.id), "--chunk-size", "-1")
+
+    def test_missing_data_key_is_reported_by_name(self):
+        from voting.tally import BallotRow, _tally_chunk
+        row = BallotRow(1, self.election.id, "payload", None, EncryptedVote.FORMAT_ENVELOPE, 999)
+        counts, invalid, _ = _tally_chunk([row])
+        self.assertEqual(invalid, [(1, "unknown data key 999")])
+
+    def test_tally_flags_invalid_rows(self):
+        EncryptedVote.objects.create(election=self.election, position=self.position, candidate=self.c2, encrypted_payload="not-ciphertext")
+        from voting.tally import parallel_tally
+        result = parallel_tally(self.election, workers=1, chunk_size=2)
+        self.assertEqual(result.total, 3)
+        self.assertEqual(len(result.invalid), 1)
+
+    def test_counters_follow_casts_and_deletes(self):
+        from voting.tally import simple_tally
+        from voting.models import TallyCounter
+        self.assertEqual(simple_tally(self.election), {self.c1.id: 2, self.c2.id: 1})
+        EncryptedVote.objects.filter(candidate=self.c1).first().delete()
+        self.assertEqual(simple_tally(self.election), {self.c1.id: 1, self.c2.id: 1})
+        self.assertEqual(TallyCounter.objects.filter(election=self.election).count(), 2)
+
+    def test_reconcile_detects_and_fixes_drift(self):
+        from voting.models import TallyCounter
+        from voting.tally import simple_tally
+        from django.core.management.base import CommandError
+        out = io.StringIO()
+        call_command("reconcile_tally", str(self.election.id), stdout=out)
+        self.assertIn("match full recount", out.getvalue())
+
+        TallyCounter.objects.filter(candidate=self.c2).update(count=7)
+        with self.assertRaises(CommandError):
+            call_command("reconcile_tally", str(self.election.id), stdout=io.StringIO())
+        call_command("reconcile_tally", str(self.election.id), "--fix", stdout=io.StringIO())
+        self.assertEqual(simple_tally(self.election), {self.c1.id: 2, self.c2.id: 1})
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Profile
+from audit.models import AuditLog
+from elections.models import Election, Position, Candidate
+from voting import turnout
+from voting.models import TurnoutCount
+
+
+@override_settings(VOTE_TURNOUT_SHARDS=4)
+class TurnoutCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        turnout.spike_detector.reset()
+        now = timezone.now()
+        self.election = Election.objects.create(name="Turnout", start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1))
+        self.position = Position.objects.create(election=self.election, name="President")
+        self.candidate = Candidate.objects.create(position=self.position, name="Alice", approved=True)
+        User = get_user_model()
+        self.users = []
+        for i, faculty in enumerate(["Science", "Science", "Arts"]):
+            user = User.objects.create_user(username=f"t{i}", password="pass")
+            Profile.objects.create(user=user, faculty=faculty, campus="Main")
+            self.users.append(user)
+
+    def test_increments_are_sharded_and_summed(self):
+        for user in self.users:
+            turnout.increment(user, self.election.id, self.position.id)
+        result = turnout.get_turnout(self.election)
+        self.assertEqual(result["total"], 3)
+        self.assertEqual(result["position"], {str(self.position.id): 3})
+        self.assertEqual(result["faculty"], {"Science": 2, "Arts": 1})
+        self.assertEqual(result["campus"], {"Main": 3})
+        # nothing has been flushed yet
+        self.assertEqual(TurnoutCount.objects.get(election=self.election, dimension="election").count, 0)
+
+    def test_flush_moves_pending_counts_to_rows(self):
+        for user in self.users:
+            turnout.increment(user, self.election.id, self.position.id)
+        from evoting_system.tasks import update_turnout_counter
+        self.assertEqual(update_turnout_counter()["flushed_votes"], 3 + 3 + 3 + 3)
+        self.assertEqual(TurnoutCount.objects.get(election=self.election, dimension="faculty", value="Science").count, 2)
+        # a second flush finds nothing and the view still reports the same turnout
+        self.assertEqual(turnout.flush(self.election), 0)
+        self.assertEqual(turnout.get_turnout(self.election)["total"], 3)
+
+    def test_flush_survives_an_evicted_shard(self):
+        # cast into the first shard so the evicted (last) one holds nothing real
+        with patch("voting.turnout.random.randrange", return_value=0):
+            turnout.increment(self.users[0], self.election.id, self.position.id)
+        row = TurnoutCount.objects.get(election=self.election, dimension="election")
+        evicted = turnout._shard_keys(row.id)[-1]
+        get_many = cache.get_many
+
+        def stale_get_many(keys):
+            # the shard was read, then evicted before it could be drained
+            found = get_many(keys)
+            found.setdefault(evicted, 2)
+            return found
+
+        with patch.object(cache, "get_many", side_effect=stale_get_many):
+            self.assertEqual(turnout.flush(self.election), 4 + 2)
+        row.refresh_from_db()
+        self.assertEqual(row.count, 3)
+
+    def test_failed_flush_restores_every_drained_shard(self):
+        for user in self.users:
+            turnout.increment(user, self.election.id, self.position.id)
+        from django.db.models.query import QuerySet
+        with patch.object(QuerySet, "update", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                turnout.flush(self.election)
+        self.assertEqual(turnout.get_turnout(self.election)["total"], 3)
+        self.assertEqual(turnout.flush(self.election), 12)
+
+    def test_cast_view_counts_after_commit(self):
+        self.client.login(username="t0", password="pass")
+        with patch("abac.policy.evaluate", return_value=True), self.captureOnCommitCallbacks(execute=True):
+            res = self.client.get(f"/api/voting/qr/{self.candidate.qr_slug}/")
+        self.assertEqual(res.status_code, 201)
+        res = self.client.get(f"/api/voting/turnout/{self.election.id}/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["total"], 1)
+        self.assertEqual(res.json()["faculty"], {"Science": 1})
+
+
+class SpikeDetectorTests(TestCase):
+    def test_reports_spike_against_baseline(self):
+        detector = turnout.SpikeDetector(window=10, baseline=100, ratio=3.0, min_votes=20)
+        # steady 1 cast/s for the whole baseline
+        for second in range(100):
+            self.assertIsNone(detector.observe(1, now=second))
+        # burst of 5 casts/s
+        spikes = [detector.observe(1, now=100 + i // 5) for i in range(50)]
+        fired = [s for s in spikes if s]
+        self.assertEqual(len(fired), 1)
+        rate, baseline_rate = fired[0]
+        self.assertGreaterEqual(rate, 3.0 * baseline_rate)
+
+    def test_no_alert_without_history(self):
+        detector = turnout.SpikeDetector(window=10, baseline=100, ratio=3.0, min_votes=5)
+        self.assertTrue(all(detector.observe(1, now=0) is None for _ in range(100)))
+
+    def test_notify_records_audit_entry(self):
+        cache.clear()
+        with patch("evoting_system.tasks.notify_voting_spike.delay", side_effect=RuntimeError("no broker")):
+            turnout._notify_spike(42, 5.0, 1.0)
+            turnout._notify_spike(42, 5.0, 1.0)
+        self.assertEqual(AuditLog.objects.filter(action="turnout.spike").count(), 1)
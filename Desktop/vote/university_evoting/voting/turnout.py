@@ -0,0 +1,241 @@
+"""Live turnout counters for election-day dashboards.
+
+Each cast increments one counter per dimension (election total, position, voter faculty
+and campus) in the turnout cache (Redis in production). Every counter is split across
+`VOTE_TURNOUT_SHARDS` keys picked at random per cast, so concurrent casts for the same
+election do not serialize on a single hot key; readers sum the shards with one get_many.
+
+The `update_turnout_counter` beat task drains the shards into TurnoutCount rows, so
+`get_turnout` reads a few rows plus the pending deltas and never touches EncryptedVote.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import TurnoutCount
+
+logger = logging.getLogger(__name__)
+
+# how long a (dimension, value) -> TurnoutCount id mapping is trusted in the cache
+DIMENSION_TTL = 3600
+
+
+def _cache():
+    return caches[getattr(settings, "VOTE_TURNOUT_CACHE", "default")]
+
+
+def _shard_count():
+    return max(1, int(getattr(settings, "VOTE_TURNOUT_SHARDS", 8)))
+
+
+def _shard_keys(row_id):
+    return [f"turnout:n:{row_id}:{i}" for i in range(_shard_count())]
+
+
+def _dimension_key(election_id, dimension, value):
+    digest = hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+    return f"turnout:dim:{election_id}:{dimension}:{digest}"
+
+
+def _dimensions(user, position_id):
+    dims = [("election", ""), ("position", str(position_id))]
+    profile = getattr(user, "profile", None)
+    for dimension in ("faculty", "campus"):
+        value = (getattr(profile, dimension, "") or "")[:100]
+        if value:
+            dims.append((dimension, value))
+    return dims
+
+
+def _resolve_rows(election_id, dims):
+    """Map dimensions to TurnoutCount ids, creating rows the first time a value is seen."""
+    cache = _cache()
+    keys = {_dimension_key(election_id, dim, value): (dim, value) for dim, value in dims}
+    found = cache.get_many(list(keys))
+    ids = []
+    for key, (dim, value) in keys.items():
+        row_id = found.get(key)
+        if row_id is None:
+            row, _ = TurnoutCount.objects.get_or_create(election_id=election_id, dimension=dim, value=value)
+            row_id = row.id
+            cache.set(key, row_id, DIMENSION_TTL)
+        ids.append(row_id)
+    return ids
+
+
+def _incr(cache, key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # first increment of this shard: create it without expiry, flush drains it
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def increment(user, election_id, position_id):
+    """Count one cast by `user` for `position_id` in every turnout dimension."""
+    cache = _cache()
+    shard = random.randrange(_shard_count())
+    for row_id in _resolve_rows(election_id, _dimensions(user, position_id)):
+        _incr(cache, f"turnout:n:{row_id}:{shard}")
+    spike = spike_detector.observe(election_id)
+    if spike:
+        _notify_spike(election_id, *spike)
+
+
+def record_cast(user, election_id, position_id):
+    """Count a cast once the surrounding transaction commits. Never raises into the cast path."""
+    def _apply():
+        try:
+            increment(user, election_id, position_id)
+        except Exception:
+            logger.exception("turnout increment failed for election %s", election_id)
+    transaction.on_commit(_apply)
+
+
+def flush(election=None, chunk_size=500):
+    """Move pending shard counts into TurnoutCount rows; returns the number of casts moved.
+
+    Each shard is drained with a relative decr, so casts that land while flushing stay in
+    the cache for the next run. All row deltas of a chunk are applied in one UPDATE.
+    """
+    cache = _cache()
+    qs = TurnoutCount.objects.all() if election is None else TurnoutCount.objects.filter(election=election)
+    ids = list(qs.order_by("id").values_list("id", flat=True))
+    moved = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        pending = cache.get_many([key for row_id in chunk for key in _shard_keys(row_id)])
+        deltas = {}
+        drained = []
+        try:
+            for row_id in chunk:
+                for key in _shard_keys(row_id):
+                    amount = int(pending.get(key) or 0)
+                    if amount <= 0:
+                        continue
+                    try:
+                        cache.decr(key, amount)
+                    except ValueError:
+                        # evicted since get_many: the counts left the cache, apply what was read
+                        pass
+                    drained.append((key, amount))
+                    deltas[row_id] = deltas.get(row_id, 0) + amount
+            if not deltas:
+                continue
+            TurnoutCount.objects.filter(pk__in=deltas).update(
+                count=F("count") + Case(
+                    *[When(pk=row_id, then=Value(n)) for row_id, n in deltas.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        except Exception:
+            # put every drained count back so the next flush retries them
+            for key, amount in drained:
+                _incr(cache, key, amount)
+            raise
+        moved += sum(deltas.values())
+    return moved
+
+
+def get_turnout(election):
+    """Return {'total': n, 'position': {...}, 'faculty': {...}, 'campus': {...}} for `election`."""
+    rows = list(TurnoutCount.objects.filter(election=election).values_list("id", "dimension", "value", "count"))
+    pending = _cache().get_many([key for row in rows for key in _shard_keys(row[0])])
+    out = {"total": 0, "position": {}, "faculty": {}, "campus": {}}
+    for row_id, dimension, value, count in rows:
+        count += sum(int(pending.get(key) or 0) for key in _shard_keys(row_id))
+        if dimension == "election":
+            out["total"] = count
+        else:
+            out[dimension][value] = count
+    return out
+
+
+def cached_turnout(election, ttl=1):
+    """`get_turnout` shared across viewers for `ttl` seconds (dashboards poll at ~1 Hz)."""
+    election_id = getattr(election, "pk", election)
+    return _cache().get_or_set(f"turnout:view:{election_id}", lambda: get_turnout(election_id), ttl)
+
+
+class SpikeDetector:
+    """Sliding-window cast-rate monitor kept in process memory.
+
+    Casts are bucketed per second for the last `baseline` seconds. A spike is reported
+    when the rate over the last `window` seconds is at least `min_votes` casts and
+    `ratio` times the rate over the rest of the baseline. Each process sees a share of
+    the traffic, but the ratio is independent of that share.
+    """
+
+    def __init__(self, window=None, baseline=None, ratio=None, min_votes=None):
+        self.window = window or int(getattr(settings, "VOTE_TURNOUT_SPIKE_WINDOW", 60))
+        self.baseline = baseline or int(getattr(settings, "VOTE_TURNOUT_SPIKE_BASELINE", 900))
+        self.ratio = ratio or float(getattr(settings, "VOTE_TURNOUT_SPIKE_RATIO", 3.0))
+        self.min_votes = min_votes or int(getattr(settings, "VOTE_TURNOUT_SPIKE_MIN_VOTES", 50))
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._totals = {}
+        self._first_seen = {}
+        self._last_alert = {}
+
+    def observe(self, election_id, now=None):
+        """Record one cast; returns (rate, baseline_rate) per second on a spike, else None."""
+        second = int(now if now is not None else time.time())
+        with self._lock:
+            buckets = self._buckets.setdefault(election_id, deque())
+            self._first_seen.setdefault(election_id, second)
+            if buckets and buckets[-1][0] == second:
+                buckets[-1][1] += 1
+            else:
+                buckets.append([second, 1])
+            total = self._totals.get(election_id, 0) + 1
+            while buckets and buckets[0][0] <= second - self.baseline:
+                total -= buckets.popleft()[1]
+            self._totals[election_id] = total
+
+            if second - self._first_seen[election_id] < self.baseline:
+                return None  # not enough history for a baseline yet
+            if second - self._last_alert.get(election_id, -self.window) < self.window:
+                return None
+            recent = 0
+            for bucket_second, count in reversed(buckets):
+                if bucket_second <= second - self.window:
+                    break
+                recent += count
+            if recent < self.min_votes:
+                return None
+            rate = recent / self.window
+            baseline_rate = (total - recent) / (self.baseline - self.window)
+            if rate < self.ratio * baseline_rate:
+                return None
+            self._last_alert[election_id] = second
+            return rate, baseline_rate
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._totals.clear()
+            self._first_seen.clear()
+            self._last_alert.clear()
+
+
+spike_detector = SpikeDetector()
+
+
+def _notify_spike(election_id, rate, baseline_rate):
+    # only one process alerts per election and window
+    if not _cache().add(f"turnout:spike:{election_id}", 1, spike_detector.window):
+        return
+    from evoting_system.tasks import notify_voting_spike
+    try:
+        notify_voting_spike.delay(election_id, rate, baseline_rate)
+    except Exception:
+        notify_voting_spike(election_id, rate, baseline_rate)
@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import IssueTokenView, CastVoteView, QRCastView, QRLandingView, QRConfirmView, qr_success
-from .views import QRIssueView, QRVerifyView
+from .views import QRIssueView, QRVerifyView, TurnoutView
 
 urlpatterns = [
     path("issue/<int:election_id>/", IssueTokenView.as_view(), name="api-issue-token"),
     path("cast/", CastVoteView.as_view(), name="api-cast-vote"),
+    path("turnout/<int:election_id>/", TurnoutView.as_view(), name="api-turnout"),
     path("qr/<uuid:qr_slug>/", QRCastView.as_view(), name="api-qr-cast"),
     # public landing for QR scans (browser)
     path("qr/scan/<uuid:qr_slug>/", QRLandingView.as_view(), name="voting-qr-landing"),
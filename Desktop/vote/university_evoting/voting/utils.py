@@ -1,4 +1,7 @@
 import hashlib
+import threading
+from django.conf import settings
+from django.db import transaction
 from . import crypto
 
 
@@ -13,3 +16,126 @@ def simple_encrypt_vote(candidate_id: int, token: str) -> str:
     except Exception:
         # Fallback to hash (non-reversible)
         return hashlib.sha256(payload).hexdigest()
+
+
+def ballot_aad(election_id) -> bytes:
+    """Associated data binding an envelope ciphertext to its election."""
+    return f"election:{election_id}".encode("utf-8")
+
+
+class DataKeyRing:
+    """Per-process current data key for each election (cast side).
+
+    A key is generated and RSA-wrapped once, stored as a BallotDataKey row and then reused
+    for up to `VOTE_DATA_KEY_MAX_BALLOTS` ballots. Keys created inside a transaction are
+    re-checked until that transaction commits so a rollback never leaves the ring
+    pointing at a row that does not exist.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = {}
+
+    def _new_entry(self, election_id):
+        from .models import BallotDataKey
+        key = crypto.generate_data_key()
+        row = BallotDataKey.objects.create(election_id=election_id, wrapped_key=crypto.wrap_data_key(key))
+        entry = {"row": row, "key": key, "uses": 0, "confirmed": not transaction.get_connection().in_atomic_block}
+        if not entry["confirmed"]:
+            transaction.on_commit(lambda: entry.__setitem__("confirmed", True))
+        return entry
+
+    def current(self, election):
+        """Return (BallotDataKey, key bytes) to encrypt the next ballot for `election` (instance or id)."""
+        from .models import BallotDataKey
+        election_id = getattr(election, "pk", election)
+        max_uses = int(getattr(settings, "VOTE_DATA_KEY_MAX_BALLOTS", 10000))
+        with self._lock:
+            entry = self._current.get(election_id)
+            if entry is not None and not entry["confirmed"]:
+                if not BallotDataKey.objects.filter(pk=entry["row"].pk).exists():
+                    entry = None
+            if entry is None or entry["uses"] >= max_uses:
+                entry = self._new_entry(election_id)
+                self._current[election_id] = entry
+            entry["uses"] += 1
+            return entry["row"], entry["key"]
+
+    def clear(self):
+        with self._lock:
+            self._current.clear()
+
+
+data_key_ring = DataKeyRing()
+
+
+def encrypt_ballot(election, candidate_id: int, token: str) -> dict:
+    """Encrypt a ballot for `election` (instance or id) and return its EncryptedVote field values.
+
+    With `VOTE_ENCRYPTION_MODE = "envelope"` (default) the ballot is sealed with AES-GCM
+    under the election's current data key. If no data key can be wrapped (no public key)
+    or the mode is "rsa", the legacy `simple_encrypt_vote` format is used.
+    """
+    from .models import EncryptedVote
+    if getattr(settings, "VOTE_ENCRYPTION_MODE", "envelope") == "envelope":
+        try:
+            row, key = data_key_ring.current(election)
+        except Exception:
+            row = None
+        if row is not None:
+            payload = f"{candidate_id}|{token}".encode("utf-8")
+            return {
+                "encrypted_payload": crypto.envelope_encrypt(key, payload, aad=ballot_aad(getattr(election, "pk", election))),
+                "format_version": EncryptedVote.FORMAT_ENVELOPE,
+                "data_key": row,
+            }
+    return {
+        "encrypted_payload": simple_encrypt_vote(candidate_id, token),
+        "format_version": EncryptedVote.FORMAT_LEGACY,
+    }
+
+
+def sign_ballot(encrypted_payload: str):
+    """Per-ballot tally signature, or None when unavailable or batch signing is enabled.
+
+    With `VOTE_SIGNING_MODE = "batch"` ballots are left unsigned at cast time and are
+    sealed later by `voting.batch_signing.seal_pending_ballots`.
+    """
+    if getattr(settings, "VOTE_SIGNING_MODE", "ballot") == "batch":
+        return None
+    try:
+        return crypto.sign_with_tally_private(encrypted_payload.encode("utf-8"))
+    except Exception:
+        # no signing key present — signature left empty
+        return None
+
+
+def load_data_keys(election) -> dict:
+    """Unwrap every data key of an election once; returns {data_key_id: key bytes}."""
+    from .models import BallotDataKey
+    keys = {}
+    for row in BallotDataKey.objects.filter(election=election).only("id", "wrapped_key"):
+        keys[row.id] = crypto.unwrap_data_key(row.wrapped_key)
+    return keys
+
+
+def decrypt_ballot(ev, data_keys: dict | None = None) -> bytes:
+    """Return the plaintext `<candidate_id>|<token>` payload of an EncryptedVote.
+
+    `data_keys` maps data_key_id to unwrapped key bytes; missing keys are unwrapped and
+    added to it so callers can share one dict across a whole tally. Rows without a
+    `data_key` relation (such as tally BallotRows) must find their key in `data_keys`.
+    """
+    from .models import EncryptedVote
+    if ev.format_version == EncryptedVote.FORMAT_ENVELOPE:
+        if data_keys is None:
+            data_keys = {}
+        key = data_keys.get(ev.data_key_id)
+        if key is None:
+            data_key = getattr(ev, "data_key", None) if ev.data_key_id is not None else None
+            if data_key is None:
+                raise ValueError(f"unknown data key {ev.data_key_id}")
+            key = crypto.unwrap_data_key(data_key.wrapped_key)
+            data_keys[ev.data_key_id] = key
+        return crypto.envelope_decrypt(key, ev.encrypted_payload, aad=ballot_aad(ev.election_id))
+    return crypto.decrypt_with_private(ev.encrypted_payload)
@@ -3,10 +3,12 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.permissions import IsAdminUser
 from django.shortcuts import get_object_or_404
-from .models import VoteToken, EncryptedVote
+from .models import VoteToken
 from .serializers import VoteTokenSerializer, EncryptedVoteSerializer, CastVoteSerializer
-from .utils import simple_encrypt_vote
-from elections.models import Election, Position, Candidate
+from .services import cast_ballot, CastError
+from .turnout import cached_turnout
+from elections.models import Election, Candidate
+from elections.ballot_cache import ballot_cache
 from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
@@ -18,7 +20,7 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.urls import reverse
 from django.http import HttpResponseForbidden
-from audit.models import AuditLog
+from audit.writer import log_event
 from .utils_qr import generate_signed_qr_token, verify_signed_qr_token, token_hash
 from .models import QRTokenUsage
 
@@ -27,15 +29,14 @@ class QRLandingView(View):
     """Public landing page for scanned QR codes. Shows candidate and prompts login/SSO."""
 
     def get(self, request, qr_slug):
-        try:
-            candidate = Candidate.objects.get(qr_slug=qr_slug)
-        except Candidate.DoesNotExist:
+        candidate = ballot_cache.candidate_by_slug(qr_slug)
+        if candidate is None:
             return render(request, 'voting/qr_not_found.html', status=404)
 
         # log the scan
         try:
             ip = request.META.get('REMOTE_ADDR')
-            AuditLog.objects.create(user=None, action='qr.scan', meta=str({'candidate': candidate.pk, 'ip': ip}))
+            log_event('qr.scan', meta={'candidate': candidate.pk, 'ip': ip})
         except Exception:
             pass
 
@@ -49,9 +50,8 @@ class QRConfirmView(View):
     """Confirmation page (requires login) for casting via QR. Supports optional signed token auto-cast."""
 
     def get(self, request, qr_slug):
-        try:
-            candidate = Candidate.objects.get(qr_slug=qr_slug)
-        except Candidate.DoesNotExist:
+        candidate = ballot_cache.candidate_by_slug(qr_slug)
+        if candidate is None:
             return render(request, 'voting/qr_not_found.html', status=404)
 
         signed_token = request.GET.get('token')
@@ -77,9 +77,8 @@ class QRConfirmView(View):
         return render(request, 'voting/qr_confirm.html', {'candidate': candidate, 'signed_token': signed_token})
 
     def post(self, request, qr_slug):
-        try:
-            candidate = Candidate.objects.get(qr_slug=qr_slug)
-        except Candidate.DoesNotExist:
+        candidate = ballot_cache.candidate_by_slug(qr_slug)
+        if candidate is None:
             return render(request, 'voting/qr_not_found.html', status=404)
         return self._do_cast(request, candidate)
 
@@ -87,35 +86,18 @@ class QRConfirmView(View):
         user = request.user
         from abac.policy import evaluate
         if not evaluate(user, action='cast_vote'):
-            AuditLog.objects.create(user=user, action='qr.cast_failure', meta=str({'candidate': candidate.pk, 'reason': 'abac_deny'}))
+            log_event('qr.cast_failure', user=user, meta={'candidate': candidate.pk, 'reason': 'abac_deny'})
             return HttpResponseForbidden('Not eligible to vote')
 
-        election = candidate.position.election
-        token_obj, _ = VoteToken.objects.get_or_create(user=user, election=election)
-        if token_obj.used:
-            AuditLog.objects.create(user=user, action='qr.cast_failure', meta=str({'candidate': candidate.pk, 'reason': 'token_used'}))
-            return HttpResponseForbidden('Token already used')
-
-        encrypted = simple_encrypt_vote(candidate.id, str(token_obj.token))
-        signature = None
+        # ballot, signed-token replay guard and success audit are written in one transaction
         try:
-            from . import crypto
-            signature = crypto.sign_with_tally_private(encrypted.encode('utf-8'))
-        except Exception:
-            signature = None
-
-        ev = EncryptedVote.objects.create(election=election, position=candidate.position, candidate=candidate, encrypted_payload=encrypted, signature=signature)
-        token_obj.used = True
-        token_obj.save()
-
-        # mark signed token as used to prevent replay
-        if token_hash_value:
-            try:
-                QRTokenUsage.objects.create(token_hash=token_hash_value, user=user, candidate=candidate)
-            except Exception:
-                pass
-
-        AuditLog.objects.create(user=user, action='qr.cast_success', meta=str({'candidate': candidate.pk, 'vote_id': ev.pk}))
+            cast_ballot(user, candidate.pk, token_hash_value=token_hash_value,
+                        audit_action='qr.cast_success', audit_meta={'candidate': candidate.pk})
+        except CastError as e:
+            log_event('qr.cast_failure', user=user, meta={'candidate': candidate.pk, 'reason': e.reason})
+            if e.reason == 'not_eligible':
+                return HttpResponseForbidden('Not eligible to vote')
+            return HttpResponseForbidden('Token already used' if e.reason in ('token_used', 'token_replayed') else 'Invalid candidate')
         return redirect(reverse('voting-qr-success'))
 
 
@@ -132,9 +114,8 @@ class QRCastView(APIView):
             return Response({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Find candidate by qr_slug
-        try:
-            candidate = Candidate.objects.get(qr_slug=qr_slug)
-        except Candidate.DoesNotExist:
+        candidate = ballot_cache.candidate_by_slug(qr_slug)
+        if candidate is None:
             return Response({"detail": "Invalid QR code"}, status=status.HTTP_404_NOT_FOUND)
 
         # ABAC check for casting
@@ -142,30 +123,15 @@ class QRCastView(APIView):
         if not evaluate(request.user, action="cast_vote", resource=None):
             return Response({"detail": "User not eligible to vote"}, status=status.HTTP_403_FORBIDDEN)
 
-        # Ensure a VoteToken exists for this user and election
-        election = candidate.position.election
-        token_obj, _ = VoteToken.objects.get_or_create(user=request.user, election=election)
-        if token_obj.used:
-            return Response({"detail": "Token already used"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Proceed to cast vote for candidate
-        encrypted = simple_encrypt_vote(candidate.id, str(token_obj.token))
-        signature = None
+        # Cast with the user's VoteToken for this election (created on first use)
         try:
-            from . import crypto
-            signature = crypto.sign_with_tally_private(encrypted.encode("utf-8"))
-        except Exception:
-            signature = None
-
-        ev = EncryptedVote.objects.create(
-            election=election,
-            position=candidate.position,
-            candidate=candidate,
-            encrypted_payload=encrypted,
-            signature=signature,
-        )
-        token_obj.used = True
-        token_obj.save()
+            ev = cast_ballot(request.user, candidate.pk)
+        except CastError as e:
+            if e.reason == "not_eligible":
+                return Response({"detail": "User not eligible to vote"}, status=status.HTTP_403_FORBIDDEN)
+            if e.reason == "token_used":
+                return Response({"detail": "Token already used"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Invalid QR code"}, status=status.HTTP_404_NOT_FOUND)
         out = EncryptedVoteSerializer(ev)
         return Response(out.data, status=status.HTTP_201_CREATED)
 
@@ -187,6 +153,7 @@ class IssueTokenView(APIView):
 
 class CastVoteView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = "cast"
 
     def post(self, request):
         # ABAC policy: check eligibility to cast
@@ -200,36 +167,28 @@ class CastVoteView(APIView):
         position_id = serializer.validated_data["position_id"]
         candidate_id = serializer.validated_data["candidate_id"]
 
-        token_obj = get_object_or_404(VoteToken, token=token_value, user=request.user)
-        if token_obj.used:
-            return Response({"detail": "Token already used"}, status=status.HTTP_400_BAD_REQUEST)
-
-        position = get_object_or_404(Position, id=position_id, election=token_obj.election)
-        candidate = get_object_or_404(Candidate, id=candidate_id, position=position)
-
-        encrypted = simple_encrypt_vote(candidate_id, str(token_value))
-        # sign the encrypted payload using tally signing key if present
-        signature = None
         try:
-            signature = crypto.sign_with_tally_private(encrypted.encode("utf-8"))
-        except Exception:
-            # no signing key present — signature left empty
-            signature = None
-
-        ev = EncryptedVote.objects.create(
-            election=token_obj.election,
-            position=position,
-            candidate=candidate,
-            encrypted_payload=encrypted,
-            signature=signature,
-        )
-        token_obj.used = True
-        token_obj.save()
+            ev = cast_ballot(request.user, candidate_id, token=token_value, position_id=position_id)
+        except CastError as e:
+            if e.reason == "not_eligible":
+                return Response({"detail": "User not eligible to vote"}, status=status.HTTP_403_FORBIDDEN)
+            if e.reason == "token_used":
+                return Response({"detail": "Token already used"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
         out = EncryptedVoteSerializer(ev)
         return Response(out.data, status=status.HTTP_201_CREATED)
 
 
+class TurnoutView(APIView):
+    """Live turnout for dashboards; served from the turnout counters, never from EncryptedVote."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, election_id):
+        election = get_object_or_404(Election, id=election_id)
+        return Response({"election": election.id, **cached_turnout(election)})
+
+
 class QRIssueView(APIView):
     """Endpoint for staff/admins to issue a signed QR token for a specific user and candidate.
 
@@ -279,6 +238,7 @@ class QRVerifyView(APIView):
     """
 
     permission_classes = ()
+    throttle_scope = 'qr_verify'
 
     def post(self, request):
         token = request.data.get('token')
@@ -296,9 +256,8 @@ class QRVerifyView(APIView):
             return Response({'valid': False, 'reason': 'already_used'}, status=status.HTTP_400_BAD_REQUEST)
 
         # check candidate exists
-        try:
-            candidate = Candidate.objects.get(id=int(payload.get('c')))
-        except Candidate.DoesNotExist:
+        candidate = ballot_cache.candidate(int(payload.get('c')))
+        if candidate is None:
             return Response({'valid': False, 'reason': 'candidate_not_found'}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({'valid': True, 'candidate_id': candidate.id, 'candidate_name': candidate.name}, status=status.HTTP_200_OK)